@@ -0,0 +1,5 @@
+"""
+The benchmarks of the submarines client (codecs, streams parsing, transports and end-to-end turns)
+
+Usage: python -m benchmarks.run
+"""
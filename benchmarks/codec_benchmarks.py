@@ -0,0 +1,61 @@
+"""
+The codecs benchmarks - encode and decode throughput of every message type
+"""
+
+from typing import Iterator
+
+from benchmarks.harness import BenchmarkResult, time_operation
+from submarines_client import messages, protocol_utils
+from submarines_client.constants import Protocol
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import MessagesCodec, StructMessagesCodec, CachedMessagesCodec
+
+SAMPLE_MESSAGES = {
+    SubmarineMessageType.GAME_REQUEST: messages.GameRequestMessage(),
+    SubmarineMessageType.GAME_REPLY: messages.GameReplyMessage(True),
+    SubmarineMessageType.ORDER: messages.OrderMessage(),
+    SubmarineMessageType.GUESS: messages.GuessMessage(row=3, column=7),
+    SubmarineMessageType.RESULT: messages.ResultMessage(Protocol.SubmarineSize.SUBMARINE_THREE, did_sink=True),
+    SubmarineMessageType.ACKNOWLEDGE: messages.AcknowledgeMessage(result_code=2),
+    SubmarineMessageType.ERROR: messages.ErrorMessage(Protocol.ErrorCode.ALREADY_ATTACKED_ERROR),
+}
+
+CODECS = {
+    'default': MessagesCodec,
+    'struct': StructMessagesCodec,
+    'cached': CachedMessagesCodec,
+}
+
+
+def run(number: int) -> Iterator[BenchmarkResult]:
+    """
+    Run the codecs benchmarks
+
+    :param number: The number of operations in every timing
+    :return: An iterator of the benchmarks results
+    """
+
+    magic = Protocol.Magic.VERSION_ONE_MAGIC
+
+    for codec_name, codec_class in CODECS.items():
+        messages_codec = codec_class()
+
+        for message_type, message in SAMPLE_MESSAGES.items():
+            encoded_message = messages_codec.encode_message(message)
+            type_name = message_type.name.lower()
+
+            yield BenchmarkResult(f'codec.{codec_name}.encode.{type_name}',
+                                  time_operation(lambda: messages_codec.encode_message(message), number))
+            yield BenchmarkResult(f'codec.{codec_name}.decode.{type_name}',
+                                  time_operation(lambda: messages_codec.decode_message(encoded_message), number))
+
+    encoded_guess = MessagesCodec().encode_message(SAMPLE_MESSAGES[SubmarineMessageType.GUESS])
+
+    yield BenchmarkResult('protocol_utils.encode_headers',
+                          time_operation(lambda: protocol_utils.encode_headers(SubmarineMessageType.GUESS, magic),
+                                         number))
+    yield BenchmarkResult('protocol_utils.decode_headers',
+                          time_operation(lambda: protocol_utils.decode_headers(encoded_guess), number))
+    yield BenchmarkResult('protocol_utils.calc_body_size',
+                          time_operation(lambda: protocol_utils.calc_body_size(SubmarineMessageType.RESULT, b'\x02'),
+                                         number))
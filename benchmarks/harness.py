@@ -0,0 +1,143 @@
+"""
+The benchmarks harness - timing operations, and saving and comparing results
+The suites run several times (after a warm up run), every benchmark's result is the median of its runs,
+and the range of its runs is kept as its spread - a slowdown within the measured spread is not a regression
+"""
+
+import json
+import platform
+import statistics
+import timeit
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+
+class BenchmarkResult(NamedTuple):
+    """
+    The result of a benchmark, the time of a single operation (lower is better)
+    and the spread of its runs (the range of the runs' times, relative to the result)
+    """
+
+    name: str
+    nanoseconds: float
+    spread: float = 0.0
+
+
+def time_operation(operation: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """
+    Time an operation, the best of the repeats is taken (the others are slowed by noise)
+
+    :param operation: The operation you wish to time
+    :param number: The number of times the operation runs in every repeat
+    :param repeat: The number of repeats
+    :return: The time of a single operation in nanoseconds
+    """
+
+    return min(timeit.Timer(operation).repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def time_runs(run: Callable[[], float], repeat: int = 5) -> float:
+    """
+    Time runs that measure themselves (for operations that need a fresh setup in every run)
+
+    :param run: A run, returns the time of a single operation in nanoseconds
+    :param repeat: The number of runs
+    :return: The best time of a single operation in nanoseconds
+    """
+
+    return min(run() for _ in range(repeat))
+
+
+def run_repeatedly(run: Callable[[], Iterable[BenchmarkResult]], runs: int) -> List[BenchmarkResult]:
+    """
+    Run benchmarks several times, after a warm up run (its results are dropped)
+
+    :param run: Runs the benchmarks once, returns their results
+    :param runs: The number of measured runs
+    :return: The median result of every benchmark, with the spread of its runs
+    """
+
+    list(run())
+    runs_results: Dict[str, List[float]] = {}
+
+    for _ in range(runs):
+        for result in run():
+            runs_results.setdefault(result.name, []).append(result.nanoseconds)
+
+    results = []
+
+    for name, runs_nanoseconds in runs_results.items():
+        median_nanoseconds = statistics.median(runs_nanoseconds)
+        spread = (max(runs_nanoseconds) - min(runs_nanoseconds)) / median_nanoseconds
+        results.append(BenchmarkResult(name, median_nanoseconds, spread))
+
+    return results
+
+
+def save_results(results: List[BenchmarkResult], path: str):
+    """
+    Save results as json
+
+    :param results: The benchmarks results
+    :param path: The json file's path
+    """
+
+    document = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': {result.name: round(result.nanoseconds, 1) for result in results},
+        'spreads': {result.name: round(result.spread, 3) for result in results},
+    }
+
+    with open(path, 'w') as results_file:
+        json.dump(document, results_file, indent=2, sort_keys=True)
+        results_file.write('\n')
+
+
+def load_results(path: str) -> Dict[str, BenchmarkResult]:
+    """
+    Load results saved as json
+
+    :param path: The json file's path
+    :return: The results of the benchmarks, by the benchmark's name
+    """
+
+    with open(path) as results_file:
+        document = json.load(results_file)
+
+    spreads = document.get('spreads', {})
+
+    return {name: BenchmarkResult(name, nanoseconds, spreads.get(name, 0.0))
+            for name, nanoseconds in document['results'].items()}
+
+
+def find_regressions(results: List[BenchmarkResult],
+                     baseline: Dict[str, BenchmarkResult],
+                     tolerance: float) -> List[str]:
+    """
+    Compare results against a baseline
+    The allowed slowdown of a benchmark is the tolerance, or the measured spread of its runs
+    (in the results and in the baseline) when the runs are noisier than the tolerance
+
+    :param results: The benchmarks results
+    :param baseline: The baseline's results, by the benchmark's name
+    :param tolerance: The minimal allowed slowdown ratio (0.25 allows operations to be 25% slower than the baseline)
+    :return: A description of every regression
+    """
+
+    regressions = []
+
+    for result in results:
+        baseline_result = baseline.get(result.name)
+
+        if not baseline_result or not baseline_result.nanoseconds:
+            continue
+
+        slowdown = result.nanoseconds / baseline_result.nanoseconds - 1
+        allowed_slowdown = max(tolerance, result.spread + baseline_result.spread)
+
+        if slowdown > allowed_slowdown:
+            regressions.append(f'{result.name}: {result.nanoseconds:.0f}ns '
+                               f'(baseline {baseline_result.nanoseconds:.0f}ns, '
+                               f'+{slowdown:.0%}, allowed +{allowed_slowdown:.0%})')
+
+    return regressions
@@ -0,0 +1,121 @@
+"""
+The network benchmarks - loopback turn latency and game connection setup, over tcp
+"""
+
+import threading
+import time
+from typing import Iterator
+
+from benchmarks.codec_benchmarks import SAMPLE_MESSAGES
+from benchmarks.harness import BenchmarkResult, time_runs
+from submarines_client import messages, transports
+from submarines_client.client import TransportSubmarinesClient
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import CachedMessagesCodec
+
+LOOPBACK_HOST = '127.0.0.1'
+
+
+def _listen(transport_factory: transports.TCPTransportFactory):
+    """
+    Listen on an ephemeral loopback port
+
+    :param transport_factory: The tcp transport factory
+    :return: The listener and its port
+    """
+
+    listener = transport_factory.listen(0)
+    return listener, listener.socket.getsockname()[1]
+
+
+def _answer_guesses(responder: TransportSubmarinesClient, turns_count: int):
+    """
+    Play the defending side of turns - answer every guess and receive its acknowledge
+
+    :param responder: The defending player's client
+    :param turns_count: The number of turns to play
+    """
+
+    result = SAMPLE_MESSAGES[SubmarineMessageType.RESULT]
+
+    with responder:
+        responder.wait_for_game()
+
+        for _ in range(turns_count):
+            responder.receive_message(SubmarineMessageType.GUESS)
+            responder.send_message(result)
+            responder.receive_message(SubmarineMessageType.ACKNOWLEDGE)
+
+
+def _accept_games(listener: transports.BaseListener, games_count: int):
+    """
+    Accept game requests, every game is closed right after its handshake
+
+    :param listener: The listener to accept games on
+    :param games_count: The number of games to accept
+    """
+
+    messages_codec = CachedMessagesCodec()
+
+    for _ in range(games_count):
+        responder = TransportSubmarinesClient(messages_codec=messages_codec,
+                                              transport_factory=None,
+                                              listener=listener)
+        responder.wait_for_game()
+        responder._close_game_transport()
+
+
+def run(number: int) -> Iterator[BenchmarkResult]:
+    """
+    Run the network benchmarks
+
+    :param number: The number of operations in every timing (the network benchmarks time a hundredth of them)
+    :return: An iterator of the benchmarks results
+    """
+
+    operations_count = max(number // 100, 10)
+
+    transport_factory = transports.TCPTransportFactory()
+    messages_codec = CachedMessagesCodec()
+    guess = SAMPLE_MESSAGES[SubmarineMessageType.GUESS]
+    acknowledge = messages.AcknowledgeMessage(result_code=2)
+
+    def play_turns(buffered: bool) -> float:
+        listener, port = _listen(transport_factory)
+        responder = TransportSubmarinesClient(messages_codec, transport_factory, listener=listener, buffered=buffered)
+        responder_thread = threading.Thread(target=_answer_guesses, args=(responder, operations_count))
+        responder_thread.start()
+
+        with TransportSubmarinesClient(messages_codec, transport_factory, buffered=buffered) as inviter:
+            inviter.invite_player(LOOPBACK_HOST, port)
+            start_time = time.perf_counter()
+
+            for _ in range(operations_count):
+                inviter.send_message(guess)
+                inviter.receive_message(SubmarineMessageType.RESULT)
+                inviter.send_message(acknowledge)
+
+            turn_nanoseconds = (time.perf_counter() - start_time) / operations_count * 1e9
+
+        responder_thread.join()
+        return turn_nanoseconds
+
+    def connect_games() -> float:
+        listener, port = _listen(transport_factory)
+        responder_thread = threading.Thread(target=_accept_games, args=(listener, operations_count))
+        responder_thread.start()
+        start_time = time.perf_counter()
+
+        for _ in range(operations_count):
+            with TransportSubmarinesClient(messages_codec, transport_factory) as inviter:
+                inviter.invite_player(LOOPBACK_HOST, port)
+
+        connection_nanoseconds = (time.perf_counter() - start_time) / operations_count * 1e9
+
+        responder_thread.join()
+        listener.close()
+        return connection_nanoseconds
+
+    yield BenchmarkResult('network.tcp.turn_round_trip', time_runs(lambda: play_turns(False), repeat=3))
+    yield BenchmarkResult('network.tcp.buffered_turn_round_trip', time_runs(lambda: play_turns(True), repeat=3))
+    yield BenchmarkResult('network.tcp.game_connection_setup', time_runs(connect_games, repeat=3))
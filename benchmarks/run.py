@@ -0,0 +1,78 @@
+"""
+Run the benchmarks, save their results as json and compare them against the baseline
+
+Usage: python -m benchmarks.run [--output results.json] [--update-baseline]
+"""
+
+import argparse
+import os
+import sys
+from typing import Iterator, Sequence
+
+from benchmarks import codec_benchmarks, stream_benchmarks, network_benchmarks
+from benchmarks.harness import BenchmarkResult, run_repeatedly, save_results, load_results, find_regressions
+
+BENCHMARKS_SUITES = {
+    'codec': codec_benchmarks,
+    'stream': stream_benchmarks,
+    'network': network_benchmarks,
+}
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main(arguments: Sequence[str] = None) -> int:
+    """
+    Run the benchmarks from the command line
+
+    :param arguments: optional, the command line arguments (sys.argv by default)
+    :return: The exit code (1 if a benchmark regressed)
+    """
+
+    parser = argparse.ArgumentParser(description='Run the submarines client benchmarks')
+    parser.add_argument('--suite', choices=BENCHMARKS_SUITES, action='append',
+                        help='a suite to run (all the suites by default)')
+    parser.add_argument('--number', type=int, default=10000, help='the number of operations in every timing')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='the number of measured runs (every result is the median of the runs)')
+    parser.add_argument('--output', default=None, help='a json file to write the results to')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='the baseline json file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='the minimal allowed slowdown ratio against the baseline '
+                             '(widened by the measured spread of the runs)')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args(arguments)
+
+    def run_suites() -> Iterator[BenchmarkResult]:
+        for suite_name in args.suite or BENCHMARKS_SUITES:
+            yield from BENCHMARKS_SUITES[suite_name].run(args.number)
+
+    results = run_repeatedly(run_suites, args.runs)
+
+    for result in results:
+        print(f'{result.name:<50} {result.nanoseconds:>12.0f} ns {result.spread:>8.0%}')
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, run with --update-baseline to create it')
+        return 0
+
+    regressions = find_regressions(results, load_results(args.baseline), args.tolerance)
+
+    if regressions:
+        print(f'\n{len(regressions)} benchmarks regressed (slower than the baseline beyond their allowed slowdown):')
+        print('\n'.join(regressions))
+        return 1
+
+    print('\nNo regressions against the baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
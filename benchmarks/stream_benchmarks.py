@@ -0,0 +1,104 @@
+"""
+The streams benchmarks - receiving messages that arrive coalesced or fragmented
+"""
+
+import time
+from typing import Iterator
+
+from benchmarks.codec_benchmarks import SAMPLE_MESSAGES
+from benchmarks.harness import BenchmarkResult, time_runs
+from submarines_client.client import TransportSubmarinesClient
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import MessagesCodec, CachedMessagesCodec
+from submarines_client.transports import BaseTransport
+
+# a turn's messages, as they arrive to a player
+TURN_MESSAGES = (
+    SAMPLE_MESSAGES[SubmarineMessageType.GUESS],
+    SAMPLE_MESSAGES[SubmarineMessageType.RESULT],
+    SAMPLE_MESSAGES[SubmarineMessageType.ACKNOWLEDGE],
+)
+
+# the chunk size of every arrival pattern (None - all the messages arrive in a single chunk)
+CHUNK_SIZES = {
+    'coalesced': None,
+    'fragmented': 1,
+    'split': 4,
+}
+
+
+class ChunkedTransport(BaseTransport):
+    """
+    A transport that replays received data in chunks of a fixed size
+    """
+
+    def __init__(self, data: bytes, chunk_size: int = None):
+        """
+        Initializing a transport
+
+        :param data: The data to receive
+        :param chunk_size: optional, the size of every received chunk (all the data by default)
+        """
+
+        self._data = memoryview(data)
+        self._offset = 0
+        self._chunk_size = chunk_size or len(data)
+
+    def sendall(self, data: bytes):
+        """
+        Send all the data to the connected player (the data is dropped)
+
+        :param data: The data you wish to send
+        """
+
+        pass
+
+    def recv_into(self, buffer) -> int:
+        """
+        Receive the next chunk into a buffer
+
+        :param buffer: The writable buffer you wish to receive into
+        :return: The number of received bytes (0 means all the data was received)
+        """
+
+        received_size = min(len(buffer), self._chunk_size, len(self._data) - self._offset)
+        buffer[:received_size] = self._data[self._offset:self._offset + received_size]
+        self._offset += received_size
+
+        return received_size
+
+    def close(self):
+        """
+        Close the transport
+        """
+
+        pass
+
+
+def run(number: int) -> Iterator[BenchmarkResult]:
+    """
+    Run the streams benchmarks
+
+    :param number: The number of received messages in every timing
+    :return: An iterator of the benchmarks results
+    """
+
+    for codec_name, codec_class in (('default', MessagesCodec), ('cached', CachedMessagesCodec)):
+        messages_codec = codec_class()
+        turns_count = max(number // len(TURN_MESSAGES), 1)
+        data = messages_codec.encode_many(TURN_MESSAGES * turns_count)
+        messages_count = turns_count * len(TURN_MESSAGES)
+
+        for pattern_name, chunk_size in CHUNK_SIZES.items():
+            def receive_all() -> float:
+                client = TransportSubmarinesClient(messages_codec=messages_codec,
+                                                   transport_factory=None,
+                                                   game_transport=ChunkedTransport(data, chunk_size))
+                start_time = time.perf_counter()
+
+                for _ in range(messages_count):
+                    client.receive_message()
+
+                return (time.perf_counter() - start_time) / messages_count * 1e9
+
+            yield BenchmarkResult(f'stream.{codec_name}.receive_message.{pattern_name}', time_runs(receive_all))
@@ -2,7 +2,12 @@
 The client's entry point
 """
 
-from submarines_client.client import BaseSubmarinesClient, TCPSubmarinesClient
-from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
-from submarines_client import messages, constants, exceptions, protocol_utils
+from submarines_client.client import BaseSubmarinesClient, TransportSubmarinesClient, TCPSubmarinesClient
+from submarines_client.async_client import BaseAsyncSubmarinesClient, AsyncTCPSubmarinesClient
+from submarines_client.server import BaseSessionHandler, GameSession, TCPSubmarinesServer
+from submarines_client.board import Board
+from submarines_client.metrics import ClientMetrics
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec, StructMessagesCodec, CachedMessagesCodec
+from submarines_client import messages, message_records, constants, exceptions, protocol_utils, transports, recording, \
+    dispatch, lobby, spectators
 
@@ -0,0 +1,423 @@
+"""
+The asyncio client classes, handle all client functionality on an event loop
+"""
+
+
+from abc import ABCMeta, abstractmethod
+import asyncio
+import collections
+import logging
+from typing import Optional, Sequence, Tuple
+
+from submarines_client import messages, constants, exceptions, protocol_utils
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec, MessagesStreamDecoder
+from submarines_client.messages import SubmarineMessageType
+
+
+class BaseAsyncSubmarinesClient(metaclass=ABCMeta):
+    """
+    The main asyncio client class, handles all client functionality
+    """
+
+    @classmethod
+    @abstractmethod
+    async def listen(cls, listening_port: int):
+        """
+        Start listen to incoming tcp connections
+
+        :param listening_port: The listening port to use
+        :return: A client instance (on listen mode)
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def wait_for_game(self):
+        """
+        Wait for a game request, and accept it
+        Note: this coroutine will exit only
+        when a game connection is established
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def invite_player(self, player_host: str, player_port: int) -> bool:
+        """
+        Invite a player for a game
+        Note: this coroutine will exit only
+        when a response is received or an error is raised
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: whether the player accepted the game invite
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def send_message(self, message: messages.BaseSubmarinesMessage):
+        """
+        send a message to the connected player
+
+        :param message: The message you wish to send
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        raise NotImplementedError()
+
+    async def send_messages(self, messages_to_send: Sequence[messages.BaseSubmarinesMessage]):
+        """
+        send a sequence of messages to the connected player
+
+        :param messages_to_send: The messages you wish to send
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        for message in messages_to_send:
+            await self.send_message(message)
+
+    @abstractmethod
+    async def receive_message(self, expected_type: SubmarineMessageType) -> messages.BaseSubmarinesMessage:
+        """
+        Receive a message from the connected player
+
+        :param expected_type: optional, an expected message type
+        :return: The decoded message
+        :raise NotConnectedError: No player is connected to the client
+        :raise ProtocolException: if the message is not expected type
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def __aenter__(self):
+        """
+        The client's entering point
+
+        :return: The client
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        The client's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        raise NotImplementedError()
+
+
+class AsyncTCPSubmarinesClient(BaseAsyncSubmarinesClient):
+    """
+    The main asyncio client class, handles all client functionality,
+    using asyncio tcp streams
+    """
+
+    def __init__(self,
+                 messages_codec: BaseMessagesCodec,
+                 server: asyncio.AbstractServer = None,
+                 reader: asyncio.StreamReader = None,
+                 writer: asyncio.StreamWriter = None):
+        """
+        Initializing a client
+
+        :param messages_codec: The messages codec of the client
+        :param server: The server in which you listen to incoming requests
+        :param reader: A game stream reader, this stream has to be in a game session,
+        means a game request and response was passed on this stream
+        :param writer: The game stream writer, matching the game stream reader
+        """
+
+        self._messages_codec = messages_codec
+        self._server = server
+        self._reader = reader
+        self._writer = writer
+        self._incoming_connections = asyncio.Queue()
+        self._messages_decoder = MessagesStreamDecoder(messages_codec)
+        self._received_messages = collections.deque()
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+    @classmethod
+    async def listen(cls,
+                     listening_port: int = constants.Network.DEFAULT_PORT,
+                     messages_codec: BaseMessagesCodec = MessagesCodec()):
+        """
+        Start listen to incoming tcp connections
+
+        :param listening_port: The listening port to use
+        :param messages_codec: The messages codec for the client
+        :return: A client instance (on listen mode)
+        """
+
+        client = cls(messages_codec=messages_codec)
+        client._server = await asyncio.start_server(client._on_connection,
+                                                    constants.Network.PUBLIC_IP,
+                                                    listening_port)
+
+        return client
+
+    async def _on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Queue an incoming connection until a game is waited for
+
+        :param reader: The connection's stream reader
+        :param writer: The connection's stream writer
+        """
+
+        await self._incoming_connections.put((reader, writer))
+
+    async def wait_for_game(self):
+        """
+        Wait for a game request, and accept it
+        Note: this coroutine will exit only
+        when a game connection is established
+        """
+
+        while not self._writer:
+            self._reader, self._writer = await self._incoming_connections.get()
+            self._clear_received_messages()
+            address = self._writer.get_extra_info('peername')
+
+            try:
+                # receive game request
+                await self.receive_message(SubmarineMessageType.GAME_REQUEST)
+                self._logger.info(f'Incoming game request: from {address}')
+
+                # send game reply
+                await self.send_message(messages.GameReplyMessage())
+                self._logger.info('Game reply sent: game starts')
+            except exceptions.ProtocolException as pe:
+                self._logger.warning(f'Protocol error: {pe}')
+                self._close_game_stream()
+            except OSError as se:
+                self._logger.warning(f'Network error: {se}')
+                self._close_game_stream()
+
+    async def invite_player(self, player_host: str, player_port: int = constants.Network.DEFAULT_PORT) -> bool:
+        """
+        Invite a player for a game
+        Note: this coroutine will exit only
+        when a response is received or an error is raised
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: whether the player accepted the game invite
+        """
+
+        # Connect to player
+        self._reader, self._writer = await asyncio.open_connection(player_host, player_port)
+        self._clear_received_messages()
+
+        # send game request
+        await self.send_message(messages.GameRequestMessage())
+
+        # receive game reply
+        game_reply: messages.GameReplyMessage = await self.receive_message(SubmarineMessageType.GAME_REPLY)
+        return game_reply.response
+
+    async def invite_any(self,
+                         candidates: Sequence[Tuple[str, int]],
+                         timeout: float = None) -> Optional[Tuple[str, int]]:
+        """
+        Invite many players for a game at once, the first player to accept the invite is the opponent
+        Note: this coroutine will exit once a player accepts the invite,
+        all the players decline or fail, or the timeout expires. The other players' connections are closed
+
+        :param candidates: The (host, port) of the players
+        :param timeout: optional, the maximal time (in seconds) to wait for an accepting player
+        :return: The (host, port) of the player that accepted the invite (None if no player accepted)
+        """
+
+        game_request_frame = self._messages_codec.encode_message(messages.GameRequestMessage())
+        invites = {asyncio.ensure_future(self._invite_candidate(candidate, game_request_frame)): candidate
+                   for candidate in candidates}
+        pending_invites = set(invites)
+        loop = asyncio.get_running_loop()
+        end_time = None if timeout is None else loop.time() + timeout
+        winner = None
+
+        try:
+            while pending_invites and not winner:
+                wait_timeout = None if end_time is None else max(0.0, end_time - loop.time())
+                done_invites, pending_invites = await asyncio.wait(pending_invites,
+                                                                   timeout=wait_timeout,
+                                                                   return_when=asyncio.FIRST_COMPLETED)
+
+                if not done_invites:
+                    self._logger.warning(f'Invite timed out: no player accepted in {timeout} seconds')
+                    break
+
+                for invite in done_invites:
+                    try:
+                        game_stream = invite.result()
+                    except (exceptions.ProtocolException, OSError, asyncio.IncompleteReadError, ValueError) as e:
+                        # a player that failed (or replied with an undecodable frame) drops only itself
+                        self._logger.warning(f'Invite failed: {invites[invite]} ({e})')
+                        continue
+
+                    if not game_stream:
+                        continue
+
+                    if winner:
+                        game_stream[1].close()
+                        continue
+
+                    winner = invites[invite]
+                    self._reader, self._writer, self._messages_decoder = game_stream
+                    self._received_messages.clear()
+        finally:
+            for invite in pending_invites:
+                invite.cancel()
+
+            if pending_invites:
+                await asyncio.wait(pending_invites)
+
+        if winner:
+            self._logger.info(f'Game invite accepted: game starts with {winner}')
+
+        return winner
+
+    async def _invite_candidate(self, candidate: Tuple[str, int], game_request_frame: bytes):
+        """
+        Invite a single player of invite_any
+
+        :param candidate: The (host, port) of the player
+        :param game_request_frame: The encoded game request
+        :return: The game stream (reader, writer and a messages decoder that holds the data that followed the reply),
+        or None if the player declined
+        :raise ProtocolException: if the player replied with an unexpected message
+        """
+
+        reader, writer = await asyncio.open_connection(*candidate)
+
+        try:
+            writer.write(game_request_frame)
+            messages_decoder = MessagesStreamDecoder(self._messages_codec)
+            game_reply_frame = None
+
+            while game_reply_frame is None:
+                new_data = await reader.read(constants.Network.BUFFER_SIZE)
+
+                if not new_data:
+                    raise ConnectionResetError('The game connection was closed by the player')
+
+                messages_decoder.feed(new_data)
+                game_reply_frame = next(messages_decoder.iter_frames(), None)
+
+            game_reply = self._messages_codec.decode_message(game_reply_frame)
+            protocol_utils.insure_message_type(game_reply, SubmarineMessageType.GAME_REPLY)
+        except BaseException:
+            writer.close()
+            raise
+
+        if not game_reply.response:
+            writer.close()
+            return None
+
+        return reader, writer, messages_decoder
+
+    async def send_message(self, message: messages.BaseSubmarinesMessage):
+        """
+        send a message to the connected player
+        Note: control is given up only when the stream's write buffer is full
+
+        :param message: The message you wish to send
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        encoded_message = self._messages_codec.encode_message(message)
+        self._writer.write(encoded_message)
+        await self._writer.drain()
+
+    async def send_messages(self, messages_to_send: Sequence[messages.BaseSubmarinesMessage]):
+        """
+        send a sequence of messages to the connected player,
+        the messages are encoded into a single buffer and written together
+
+        :param messages_to_send: The messages you wish to send
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        encoded_messages = self._messages_codec.encode_many(messages_to_send)
+        self._writer.write(encoded_messages)
+        await self._writer.drain()
+
+    async def receive_message(self, expected_type: SubmarineMessageType = None) -> messages.BaseSubmarinesMessage:
+        """
+        Receive a message from the connected player
+
+        :param expected_type: optional, an expected message type
+        :return: The decoded message
+        :raise NotConnectedError: No player is connected to the client
+        :raise ProtocolException: if the message is not expected type
+        """
+
+        while not self._received_messages:
+            new_data = await self._reader.read(constants.Network.BUFFER_SIZE)
+
+            if not new_data:
+                raise ConnectionResetError('The game connection was closed by the player')
+
+            self._messages_decoder.feed(new_data)
+            self._received_messages.extend(self._messages_decoder.decode_messages())
+
+        message = self._received_messages.popleft()
+
+        if message.get_message_type() == SubmarineMessageType.ERROR:
+            raise message.exception
+
+        if expected_type:
+            protocol_utils.insure_message_type(message, expected_type)
+
+        return message
+
+    def _clear_received_messages(self):
+        """
+        Drop all the received data of the previous game connection
+        """
+
+        self._messages_decoder.clear()
+        self._received_messages.clear()
+
+    def _close_game_stream(self):
+        """
+        Close the current game stream (if any)
+        """
+
+        if self._writer:
+            self._writer.close()
+
+        self._reader = None
+        self._writer = None
+
+    async def __aenter__(self):
+        """
+        The client's entering point
+
+        :return: The client
+        """
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        The client's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self._close_game_stream()
+
+        while not self._incoming_connections.empty():
+            _, writer = self._incoming_connections.get_nowait()
+            writer.close()
+
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+        return False
@@ -0,0 +1,196 @@
+"""
+The batch codec encodes and decodes whole streams of messages as NumPy columns
+Note: this module requires NumPy
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from submarines_client import exceptions, protocol_utils
+from submarines_client.constants import Protocol
+from submarines_client.messages import SubmarineMessageType
+
+_SUBMARINE_SIZES = np.array([submarine_size.value for submarine_size in Protocol.SubmarineSize], dtype=np.uint8)
+
+
+class MessagesColumns(NamedTuple):
+    """
+    The values of a stream of messages, a column per message field
+    Note: fields that are not part of a message are zero in its row
+    """
+
+    message_type: np.ndarray
+    row: np.ndarray
+    column: np.ndarray
+    result_code: np.ndarray
+    submarine_size: np.ndarray
+
+
+class BatchMessagesCodec:
+    """
+    A vectorized codec of messages streams (the messages are encoded with headers, back to back),
+    supports the messages whose values fit the columns - game request, order, guess, result and acknowledge
+    """
+
+    SUPPORTED_MESSAGE_TYPES = (
+        SubmarineMessageType.GAME_REQUEST,
+        SubmarineMessageType.ORDER,
+        SubmarineMessageType.GUESS,
+        SubmarineMessageType.RESULT,
+        SubmarineMessageType.ACKNOWLEDGE,
+    )
+
+    def __init__(self, version_magic: Protocol.Magic = Protocol.Magic.VERSION_ONE_MAGIC):
+        self._version_magic = version_magic
+        self._encoded_magic = np.frombuffer(version_magic.value.encode(), dtype=np.uint8)
+        self._headers_size = protocol_utils.calc_headers_size()
+
+        # the body size of every message type, or -1 for unsupported message types
+        self._body_sizes = np.full(2 ** 8, -1, dtype=np.int64)
+
+        for message_type in BatchMessagesCodec.SUPPORTED_MESSAGE_TYPES:
+            self._body_sizes[message_type] = protocol_utils.calc_body_size(message_type)
+
+    def decode_frames(self, buffer) -> MessagesColumns:
+        """
+        decodes a stream of messages (with headers) into columns
+
+        :param buffer: The stream you wish to decode (any bytes-like object)
+        :return: The decoded messages columns
+        :raise InvalidMessageTypeException: if a message type is invalid or unsupported
+        :raise InvalidMagicException: if a magic is not matching the current magic
+        :raise InvalidHeadersException: if the stream ends in the middle of a message
+        :raise ValueError: if a result's submarine size is invalid
+        """
+
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        offsets = self._split_frames(data)
+
+        # pad the data, so that the first bytes of an empty body can be read
+        padded_data = np.concatenate((data, np.zeros(2, dtype=np.uint8)))
+
+        magics = padded_data[offsets[:, np.newaxis] + np.arange(Protocol.MAGIC_SIZE)]
+
+        if not np.array_equal(magics, np.broadcast_to(self._encoded_magic, magics.shape)):
+            raise exceptions.InvalidMagicException('The given version magic is different from the current one')
+
+        message_types = padded_data[offsets + Protocol.MAGIC_SIZE]
+        first_body_bytes = padded_data[offsets + self._headers_size]
+        second_body_bytes = padded_data[offsets + self._headers_size + 1]
+
+        is_guess = message_types == SubmarineMessageType.GUESS
+        is_result = message_types == SubmarineMessageType.RESULT
+        has_result_code = is_result | (message_types == SubmarineMessageType.ACKNOWLEDGE)
+        coordinate_mask = 2 ** Protocol.Formats.COORDINATE_DELIMITER - 1
+        zeros = np.zeros_like(first_body_bytes)
+        submarine_sizes = np.where(is_result & (first_body_bytes > 0), second_body_bytes, zeros)
+
+        invalid_sizes = submarine_sizes[~np.isin(submarine_sizes, _SUBMARINE_SIZES)]
+
+        if invalid_sizes.size:
+            raise ValueError(f'{invalid_sizes[0]} is not a valid {Protocol.SubmarineSize.__name__}')
+
+        return MessagesColumns(
+            message_type=message_types,
+            row=np.where(is_guess, first_body_bytes >> Protocol.Formats.COORDINATE_DELIMITER, zeros),
+            column=np.where(is_guess, first_body_bytes & coordinate_mask, zeros),
+            result_code=np.where(has_result_code, first_body_bytes, zeros),
+            submarine_size=submarine_sizes,
+        )
+
+    def encode_frames(self, columns: MessagesColumns) -> bytes:
+        """
+        encodes messages columns into a stream of messages (with headers)
+
+        :param columns: The messages columns you wish to encode
+        :return: The encoded messages as bytes
+        :raise InvalidMessageTypeException: if a message type is invalid or unsupported
+        :raise ValueError: if a guess coordinate is out of the protocol's bounds
+        """
+
+        message_types = np.asarray(columns.message_type, dtype=np.int64)
+        result_codes = np.asarray(columns.result_code, dtype=np.int64)
+        body_sizes = self._body_sizes[message_types & 0xff]
+
+        if np.any((message_types < 0) | (message_types > 0xff) | (body_sizes < 0)):
+            raise exceptions.InvalidMessageTypeException('A message type provided is invalid or unsupported')
+
+        is_guess = message_types == SubmarineMessageType.GUESS
+        has_submarine_size = (message_types == SubmarineMessageType.RESULT) & (result_codes > 0)
+
+        coordinates = np.asarray(columns.column, dtype=np.int64) % (2 ** Protocol.Formats.COORDINATE_DELIMITER)
+        coordinates += np.asarray(columns.row, dtype=np.int64) << Protocol.Formats.COORDINATE_DELIMITER
+
+        if np.any(is_guess & ((coordinates < 0) | (coordinates > 0xff))):
+            raise ValueError('A guess coordinate is out of the protocol\'s bounds')
+
+        frames_sizes = self._headers_size + body_sizes + has_submarine_size
+        offsets = np.cumsum(frames_sizes) - frames_sizes
+        encoded_messages = np.empty(int(frames_sizes.sum()), dtype=np.uint8)
+
+        encoded_messages[offsets[:, np.newaxis] + np.arange(Protocol.MAGIC_SIZE)] = self._encoded_magic
+        encoded_messages[offsets + Protocol.MAGIC_SIZE] = message_types
+
+        has_body = body_sizes > 0
+        first_body_bytes = np.where(is_guess, coordinates, result_codes)
+        encoded_messages[offsets[has_body] + self._headers_size] = first_body_bytes[has_body]
+
+        submarine_sizes = np.asarray(columns.submarine_size, dtype=np.int64)
+        encoded_messages[offsets[has_submarine_size] + self._headers_size + 1] = submarine_sizes[has_submarine_size]
+
+        return encoded_messages.tobytes()
+
+    def _split_frames(self, data: np.ndarray) -> np.ndarray:
+        """
+        Find the offsets of the messages in a stream
+
+        :param data: The stream as an array of bytes
+        :return: The offsets of the messages
+        :raise InvalidMessageTypeException: if a message type is invalid or unsupported
+        :raise InvalidHeadersException: if the stream ends in the middle of a message
+        """
+
+        if not len(data):
+            return np.zeros(0, dtype=np.int64)
+
+        # the size of a message that would start at every offset of the stream
+        padded_data = np.concatenate((data, np.zeros(self._headers_size + 1, dtype=np.uint8)))
+        message_types = padded_data[Protocol.MAGIC_SIZE:Protocol.MAGIC_SIZE + len(data)]
+        first_body_bytes = padded_data[self._headers_size:self._headers_size + len(data)]
+
+        frames_sizes = self._headers_size + self._body_sizes[message_types]
+        frames_sizes += (message_types == SubmarineMessageType.RESULT) & (first_body_bytes > 0)
+
+        # fast path - the messages start where the magic is found, when the message sizes chain them
+        # through the whole stream (a stream that does not chain is an invalid stream, or a stream
+        # whose bodies hold the magic - it is scanned message by message)
+        is_magic = padded_data[:len(data)] == self._encoded_magic[0]
+
+        for magic_index in range(1, Protocol.MAGIC_SIZE):
+            is_magic &= padded_data[magic_index:magic_index + len(data)] == self._encoded_magic[magic_index]
+
+        offsets = np.flatnonzero(is_magic)
+        offsets_frames_sizes = frames_sizes[offsets]
+        chained_offsets = np.cumsum(offsets_frames_sizes) - offsets_frames_sizes
+
+        if (len(offsets) and np.array_equal(offsets, chained_offsets) and
+                offsets[-1] + offsets_frames_sizes[-1] == len(data) and
+                np.all(offsets_frames_sizes >= self._headers_size)):
+            return offsets
+
+        offsets = []
+        offset = 0
+        sizes = frames_sizes.tolist()
+
+        while offset < len(data):
+            if sizes[offset] < self._headers_size:
+                raise exceptions.InvalidMessageTypeException('A message type provided is invalid or unsupported')
+
+            offsets.append(offset)
+            offset += sizes[offset]
+
+        if offset != len(data):
+            raise exceptions.InvalidHeadersException('The stream ends in the middle of a message')
+
+        return np.array(offsets, dtype=np.int64)
@@ -0,0 +1,229 @@
+"""
+The game board, holds a player's fleet and answers the opponent's guesses
+"""
+
+from random import Random
+from typing import Iterable, Sequence
+
+from submarines_client import messages, exceptions
+from submarines_client.constants import Protocol, Game
+
+
+_SUBMARINE_SIZES = frozenset(size for size in Protocol.SubmarineSize if size != Protocol.SubmarineSize.NO_SUBMARINE)
+
+
+class Board:
+    """
+    A player's board, the fleet and the attacked cells are kept as bitmasks,
+    where the bit of a cell is its encoded coordinate (as in a guess message)
+    """
+
+    RANDOM_PLACEMENT_ATTEMPTS = 32
+
+    def __init__(self, board_size: int = Game.BOARD_SIZE):
+        """
+        Initializing an empty board
+
+        :param board_size: The number of rows (and columns) of the board
+        """
+
+        if not 0 < board_size <= Game.BOARD_SIZE:
+            raise ValueError(f'The board size has to be between 1 and {Game.BOARD_SIZE}')
+
+        self.board_size = board_size
+
+        self._fleet_mask = 0
+        self._attacked_mask = 0
+        self._submarines_masks = []
+        self._submarines_sizes = []
+        self._cells_submarines = [None] * (Game.BOARD_SIZE ** 2)
+
+    @classmethod
+    def random(cls,
+               fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET,
+               board_size: int = Game.BOARD_SIZE,
+               random_generator: Random = None):
+        """
+        Create a board with a randomly placed fleet
+
+        :param fleet: The sizes of the fleet's submarines
+        :param board_size: The number of rows (and columns) of the board
+        :param random_generator: optional, the random generator to use
+        :return: A board instance
+        :raise InvalidPlacementException: if the fleet doesn't fit the board
+        """
+
+        random_generator = random_generator or Random()
+        board = cls(board_size)
+
+        for submarine_size in fleet:
+            board._add_random_submarine(submarine_size, random_generator)
+
+        return board
+
+    def _add_random_submarine(self, submarine_size: Protocol.SubmarineSize, random_generator: Random):
+        """
+        Add a submarine to a random free placement on the board
+        Note: random placements are tried first, the free placements are listed only if they all overlap
+
+        :param submarine_size: The submarine's size
+        :param random_generator: The random generator to use
+        :raise InvalidPlacementException: if the submarine doesn't fit the board, or its size is invalid
+        """
+
+        self._validate_submarine_size(submarine_size)
+
+        if submarine_size > self.board_size:
+            raise exceptions.InvalidPlacementException('The fleet doesn\'t fit the board')
+
+        for _ in range(Board.RANDOM_PLACEMENT_ATTEMPTS):
+            horizontal = random_generator.random() < 0.5
+            row = random_generator.randrange(self.board_size - (0 if horizontal else submarine_size - 1))
+            column = random_generator.randrange(self.board_size - (submarine_size - 1 if horizontal else 0))
+
+            if not self._fleet_mask & self._calc_submarine_mask(row, column, submarine_size, horizontal):
+                self.add_submarine(row, column, submarine_size, horizontal)
+                return
+
+        placements = list(self.iter_free_placements(submarine_size))
+
+        if not placements:
+            raise exceptions.InvalidPlacementException('The fleet doesn\'t fit the board')
+
+        row, column, horizontal = random_generator.choice(placements)
+        self.add_submarine(row, column, submarine_size, horizontal)
+
+    def iter_free_placements(self, submarine_size: int) -> Iterable:
+        """
+        Get all the placements in which a submarine can be added to the board
+
+        :param submarine_size: The submarine's size
+        :return: An iterator of (row, column, horizontal) placements
+        """
+
+        for horizontal in (True, False):
+            for row in range(self.board_size - (0 if horizontal else submarine_size - 1)):
+                for column in range(self.board_size - (submarine_size - 1 if horizontal else 0)):
+                    if not self._fleet_mask & self._calc_submarine_mask(row, column, submarine_size, horizontal):
+                        yield row, column, horizontal
+
+    def add_submarine(self, row: int, column: int, submarine_size: Protocol.SubmarineSize, horizontal: bool = True):
+        """
+        Add a submarine to the board
+
+        :param row: The row of the submarine's first cell
+        :param column: The column of the submarine's first cell
+        :param submarine_size: The submarine's size
+        :param horizontal: Whether the submarine is placed along a row (or along a column)
+        :raise InvalidPlacementException: if the submarine is out of the board, overlaps another submarine,
+        or its size is invalid
+        """
+
+        self._validate_submarine_size(submarine_size)
+
+        last_row = row + (0 if horizontal else submarine_size - 1)
+        last_column = column + (submarine_size - 1 if horizontal else 0)
+
+        if min(row, column) < 0 or max(last_row, last_column) >= self.board_size:
+            raise exceptions.InvalidPlacementException('The submarine is out of the board')
+
+        submarine_mask = self._calc_submarine_mask(row, column, submarine_size, horizontal)
+
+        if self._fleet_mask & submarine_mask:
+            raise exceptions.InvalidPlacementException('The submarine overlaps another submarine')
+
+        submarine_index = len(self._submarines_masks)
+        self._submarines_masks.append(submarine_mask)
+        self._submarines_sizes.append(Protocol.SubmarineSize(submarine_size))
+        self._fleet_mask |= submarine_mask
+
+        for offset in range(submarine_size):
+            cell = self._calc_cell(row + (0 if horizontal else offset), column + (offset if horizontal else 0))
+            self._cells_submarines[cell] = submarine_index
+
+    @staticmethod
+    def _validate_submarine_size(submarine_size: int):
+        """
+        Validate the size of a submarine (the protocol's sizes, without NO_SUBMARINE)
+
+        :param submarine_size: The submarine's size
+        :raise InvalidPlacementException: if the size is not a protocol's submarine size
+        """
+
+        if submarine_size not in _SUBMARINE_SIZES:
+            raise exceptions.InvalidPlacementException(f'The submarine size {submarine_size} is invalid')
+
+    def attack(self, guess: messages.GuessMessage) -> messages.ResultMessage:
+        """
+        Attack the board by a guess
+
+        :param guess: The opponent's guess
+        :return: The guess' result
+        :raise InvalidCoordinateException: if the guess is out of the board
+        :raise AlreadyAttackedException: if the guess' cell was already attacked
+        """
+
+        if not (0 <= guess.row < self.board_size and 0 <= guess.column < self.board_size):
+            raise exceptions.InvalidCoordinateException()
+
+        cell = self._calc_cell(guess.row, guess.column)
+        cell_mask = 1 << cell
+
+        if self._attacked_mask & cell_mask:
+            raise exceptions.AlreadyAttackedException()
+
+        self._attacked_mask |= cell_mask
+        submarine_index = self._cells_submarines[cell]
+
+        if submarine_index is None:
+            return messages.ResultMessage()
+
+        did_sink = not self._submarines_masks[submarine_index] & ~self._attacked_mask
+        did_sink_last = did_sink and not self._fleet_mask & ~self._attacked_mask
+
+        return messages.ResultMessage(submarine_size=self._submarines_sizes[submarine_index],
+                                      did_sink=did_sink,
+                                      did_sink_last=did_sink_last)
+
+    @property
+    def is_defeated(self) -> bool:
+        """
+        Whether all the fleet's submarines were sunk
+
+        :return: Whether all the fleet's submarines were sunk
+        """
+
+        return bool(self._fleet_mask) and not self._fleet_mask & ~self._attacked_mask
+
+    @staticmethod
+    def _calc_cell(row: int, column: int) -> int:
+        """
+        Get the bit of a cell in the board's masks
+
+        :param row: The cell's row
+        :param column: The cell's column
+        :return: The cell's bit index
+        """
+
+        return (row << Protocol.Formats.COORDINATE_DELIMITER) + column
+
+    @staticmethod
+    def _calc_submarine_mask(row: int, column: int, submarine_size: int, horizontal: bool) -> int:
+        """
+        Get the mask of a submarine's cells
+
+        :param row: The row of the submarine's first cell
+        :param column: The column of the submarine's first cell
+        :param submarine_size: The submarine's size
+        :param horizontal: Whether the submarine is placed along a row (or along a column)
+        :return: The submarine's mask
+        """
+
+        step = 1 if horizontal else 1 << Protocol.Formats.COORDINATE_DELIMITER
+        first_cell_mask = 1 << Board._calc_cell(row, column)
+        submarine_mask = 0
+
+        for offset in range(submarine_size):
+            submarine_mask |= first_cell_mask << (offset * step)
+
+        return submarine_mask
@@ -4,11 +4,18 @@ The main client class, handles all client functionality
 
 
 from abc import ABCMeta, abstractmethod
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import socket
 import logging
-
-from submarines_client import messages, constants, exceptions, protocol_utils
-from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
+import threading
+import time
+from typing import Optional, Sequence, Tuple
+
+from submarines_client import messages, constants, exceptions, protocol_utils, transports, recording
+from submarines_client.dispatch import MessageDispatcher
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec, MessagesStreamDecoder
+from submarines_client.metrics import ClientMetrics
 from submarines_client.messages import SubmarineMessageType
 
 
@@ -64,6 +71,27 @@ class BaseSubmarinesClient(metaclass=ABCMeta):
 
         raise NotImplementedError()
 
+    def send_messages(self, messages_to_send: Sequence[messages.BaseSubmarinesMessage]):
+        """
+        send a sequence of messages to the connected player
+
+        :param messages_to_send: The messages you wish to send
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        for message in messages_to_send:
+            self.send_message(message)
+
+    def flush(self):
+        """
+        Send all the buffered messages to the connected player
+        (clients that send every message right away have nothing to flush)
+
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        pass
+
     @abstractmethod
     def receive_message(self, expected_type: SubmarineMessageType) -> messages.BaseSubmarinesMessage:
         """
@@ -77,6 +105,25 @@ class BaseSubmarinesClient(metaclass=ABCMeta):
 
         raise NotImplementedError()
 
+    def dispatch_messages(self, dispatcher: MessageDispatcher) -> int:
+        """
+        Receive from the connected player and pass the received messages to a dispatcher,
+        the errors are passed to the dispatcher's error handler instead of being raised
+
+        :param dispatcher: The dispatcher of the messages
+        :return: The number of dispatched messages and errors
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        try:
+            message = self.receive_message()
+        except exceptions.SubmarinesClientException as sce:
+            dispatcher.dispatch_error(self, sce)
+            return 1
+
+        dispatcher.dispatch(self, message)
+        return 1
+
     @abstractmethod
     def __enter__(self):
         """
@@ -98,51 +145,75 @@ class BaseSubmarinesClient(metaclass=ABCMeta):
         raise NotImplementedError()
 
 
-class TCPSubmarinesClient(BaseSubmarinesClient):
+class TransportSubmarinesClient(BaseSubmarinesClient):
     """
     The main client class, handles all client functionality,
-    using tcp connection
+    over the transports of a transport factory
     """
 
     def __init__(self,
                  messages_codec: BaseMessagesCodec,
-                 listening_socket: socket.socket,
-                 game_socket: socket.socket = None):
+                 transport_factory: transports.BaseTransportFactory,
+                 listener: transports.BaseListener = None,
+                 game_transport: transports.BaseTransport = None,
+                 metrics: ClientMetrics = None,
+                 buffered: bool = False,
+                 recorder: recording.BaseRecorder = None):
         """
         Initializing a client
 
         :param messages_codec: The messages codec of the client
-        :param listening_socket: The socket in which you listen to incoming requests
-        :param game_socket: A game socket, this socket has to be in a game session,
-        means a game request and response was passed on this socket
+        :param transport_factory: The factory of the client's transports
+        :param listener: The listener in which you listen to incoming requests
+        :param game_transport: A game transport, this transport has to be in a game session,
+        means a game request and response was passed on this transport
+        :param metrics: optional, metrics to update with the client's messages, calls and errors
+        :param buffered: Whether to buffer the sent messages until a flush (explicit, or before receiving),
+        so the messages of a turn are sent together
+        :param recorder: optional, a recorder to report the sent and received message frames to
         """
 
+        self.metrics = metrics
+        self.buffered = buffered
+        self.recorder = recorder
+        self._send_buffer = bytearray()
         self._messages_codec = messages_codec
-        self._listening_socket = listening_socket
-        self._game_socket = game_socket
+        self._transport_factory = transport_factory
+        self._listener = listener
+        self._game_transport = game_transport
+        self._messages_decoder = MessagesStreamDecoder(messages_codec)
+        self._received_messages = collections.deque()
         self._logger = logging.getLogger(constants.LOGGER_NAME)
 
     @classmethod
     def listen(cls,
                listening_port: int = constants.Network.DEFAULT_PORT,
-               messages_codec: BaseMessagesCodec = MessagesCodec()):
+               messages_codec: BaseMessagesCodec = MessagesCodec(),
+               transport_factory: transports.BaseTransportFactory = None,
+               metrics: ClientMetrics = None,
+               buffered: bool = False,
+               recorder: recording.BaseRecorder = None):
         """
-        Start listen to incoming tcp connections
+        Start listen to incoming connections
 
         :param listening_port: The listening port to use
         :param messages_codec: The messages codec for the client
+        :param transport_factory: optional, the factory of the client's transports (tcp by default)
+        :param metrics: optional, metrics to update with the client's messages, calls and errors
+        :param buffered: Whether to buffer the sent messages until a flush
+        :param recorder: optional, a recorder to report the sent and received message frames to
         :return: A client instance (on listen mode)
         """
 
-        try:
-            listening_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            listening_socket.bind((constants.Network.PUBLIC_IP, listening_port))
-            listening_socket.listen(1)
+        transport_factory = transport_factory or transports.TCPTransportFactory()
+        listener = transport_factory.listen(listening_port)
 
-            return cls(messages_codec=messages_codec, listening_socket=listening_socket)
-        except socket.error:
-            raise
+        return cls(messages_codec=messages_codec,
+                   transport_factory=transport_factory,
+                   listener=listener,
+                   metrics=metrics,
+                   buffered=buffered,
+                   recorder=recorder)
 
     def wait_for_game(self):
         """
@@ -151,24 +222,29 @@ class TCPSubmarinesClient(BaseSubmarinesClient):
         when a game connection is established
         """
 
-        while not self._game_socket:
+        while not self._game_transport:
             try:
                 # accept connection
-                self._game_socket, address = self._listening_socket.accept()
+                self._game_transport, address = self._listener.accept()
+                self._clear_received_messages()
+
+                if self.recorder:
+                    self.recorder.start_game()
 
                 # receive game request
                 self.receive_message(SubmarineMessageType.GAME_REQUEST)
-                self._logger.info('Incoming game request: ', f'from {address}')
+                self._logger.info(f'Incoming game request: from {address}')
 
                 # send game reply
                 self.send_message(messages.GameReplyMessage())
-                self._logger.info('Game reply sent: ', 'game starts')
+                self.flush()
+                self._logger.info('Game reply sent: game starts')
             except exceptions.ProtocolException as pe:
-                self._logger.warning('Protocol error: ', pe)
-                self._game_socket = None
+                self._logger.warning(f'Protocol error: {pe}')
+                self._close_game_transport()
             except socket.error as se:
-                self._logger.warning('Network error: ', se)
-                self._game_socket = None
+                self._logger.warning(f'Network error: {se}')
+                self._close_game_transport()
 
     def invite_player(self, player_host: str, player_port: int = constants.Network.DEFAULT_PORT) -> bool:
         """
@@ -183,8 +259,11 @@ class TCPSubmarinesClient(BaseSubmarinesClient):
 
         try:
             # Connect to player
-            self._game_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._game_socket.connect((player_host, player_port))
+            self._game_transport = self._transport_factory.connect(player_host, player_port)
+            self._clear_received_messages()
+
+            if self.recorder:
+                self.recorder.start_game()
 
             # send game request
             self.send_message(messages.GameRequestMessage())
@@ -197,16 +276,102 @@ class TCPSubmarinesClient(BaseSubmarinesClient):
         except socket.error:
             raise
 
+    def invite_any(self, candidates: Sequence[Tuple[str, int]], timeout: float = None) -> Optional[Tuple[str, int]]:
+        """
+        Invite many players for a game at once, the first player to accept the invite is the opponent
+        Note: this is a blocking method, it will exit once a player accepts the invite,
+        all the players decline or fail, or the timeout expires. The other players' connections are closed
+
+        :param candidates: The (host, port) of the players
+        :param timeout: optional, the maximal time (in seconds) to wait for an accepting player
+        :return: The (host, port) of the player that accepted the invite (None if no player accepted)
+        """
+
+        if not candidates:
+            return None
+
+        game_request_frame = self._messages_codec.encode_message(messages.GameRequestMessage())
+        invites = _InvitesRace(self._transport_factory)
+        executor = ThreadPoolExecutor(max_workers=min(len(candidates), constants.Network.MAX_CONCURRENT_INVITES))
+        futures = {}
+        winner = None
+
+        try:
+            futures = {executor.submit(invites.invite, candidate, game_request_frame, self._messages_codec): candidate
+                       for candidate in candidates}
+
+            for future in as_completed(futures, timeout):
+                try:
+                    transport, messages_decoder, game_reply_frame = future.result()
+                except (exceptions.ProtocolException, socket.error, ValueError) as e:
+                    # a player that failed (or replied with an undecodable frame) drops only itself
+                    self._logger.warning(f'Invite failed: {futures[future]} ({e})')
+                    continue
+
+                if transport and invites.take(transport):
+                    winner = futures[future]
+                    break
+        except FuturesTimeoutError:
+            self._logger.warning(f'Invite timed out: no player accepted in {timeout} seconds')
+        finally:
+            invites.close()
+
+            # the invites that did not start are dropped
+            for future in futures:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+
+        if not winner:
+            return None
+
+        self._game_transport = transport
+        self._messages_decoder = messages_decoder
+        self._received_messages.clear()
+
+        if self.recorder:
+            self.recorder.start_game()
+            self.recorder.record(recording.Direction.SENT, game_request_frame)
+            self.recorder.record(recording.Direction.RECEIVED, game_reply_frame)
+
+        if self.metrics:
+            self.metrics.count_sent(SubmarineMessageType.GAME_REQUEST, len(game_request_frame))
+            self.metrics.count_received(SubmarineMessageType.GAME_REPLY, len(game_reply_frame))
+
+        self._logger.info(f'Game invite accepted: game starts with {winner}')
+        return winner
+
     def send_message(self, message: messages.BaseSubmarinesMessage):
         """
-        send a message to the connected player
+        send a message to the connected player (or buffer it, in buffered mode)
 
         :param message: The message you wish to send
         :raise NotConnectedError: No player is connected to the client
         """
 
-        encoded_message = self._messages_codec.encode_message(message)
-        self._game_socket.send(encoded_message)
+        if self.metrics or self.recorder:
+            encoded_message = self._encode_observed(message)
+        else:
+            encoded_message = self._messages_codec.encode_message(message)
+
+        self._send(encoded_message)
+
+    def send_messages(self, messages_to_send: Sequence[messages.BaseSubmarinesMessage]):
+        """
+        send a sequence of messages to the connected player,
+        the messages are encoded into a single buffer and sent together
+
+        :param messages_to_send: The messages you wish to send
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        if self.metrics or self.recorder:
+            # observed messages are encoded one by one, so every message is timed and recorded on its own
+            encoded_messages = bytes().join([self._encode_observed(message) for message in messages_to_send])
+        else:
+            encoded_messages = self._messages_codec.encode_many(messages_to_send)
+
+        self._send(encoded_messages)
 
     def receive_message(self, expected_type: SubmarineMessageType = None) -> messages.BaseSubmarinesMessage:
         """
@@ -218,20 +383,23 @@ class TCPSubmarinesClient(BaseSubmarinesClient):
         :raise ProtocolException: if the message is not expected type
         """
 
-        encoded_message = bytes()
+        if self._send_buffer:
+            self.flush()
 
         try:
-            new_data = self._game_socket.recv(constants.Network.BUFFER_SIZE)
+            while not self._received_messages:
+                if self.metrics:
+                    self.metrics.recv_calls += 1
 
-            while new_data:
-                encoded_message += new_data
+                if not self._messages_decoder.receive_into(self._game_transport):
+                    raise ConnectionResetError('The game connection was closed by the player')
 
-                if len(new_data) < constants.Network.BUFFER_SIZE:
-                    break
-
-                new_data = self._game_socket.recv(constants.Network.BUFFER_SIZE)
+                if self.metrics or self.recorder:
+                    self._received_messages.extend(self._decode_observed())
+                else:
+                    self._received_messages.extend(self._messages_decoder.decode_messages())
 
-            message = self._messages_codec.decode_message(encoded_message)
+            message = self._received_messages.popleft()
 
             if message.get_message_type() == SubmarineMessageType.ERROR:
                 raise message.exception
@@ -241,11 +409,165 @@ class TCPSubmarinesClient(BaseSubmarinesClient):
 
             return message
 
-        except exceptions.ProtocolException:
+        except exceptions.SubmarinesClientException as sce:
+            if self.metrics:
+                self.metrics.count_error(sce)
+
             raise
         except socket.error:
             raise
 
+    def dispatch_messages(self, dispatcher: MessageDispatcher) -> int:
+        """
+        Receive from the connected player once (blocks until some data is available),
+        and pass all the complete received messages to a dispatcher
+        Note: the frames are dispatched by their type byte, the errors are passed to the dispatcher's error handler
+
+        :param dispatcher: The dispatcher of the messages
+        :return: The number of dispatched messages and errors
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        if self._send_buffer:
+            self.flush()
+
+        dispatched_count = 0
+
+        # messages that were already received, by receive_message
+        while self._received_messages:
+            dispatcher.dispatch(self, self._received_messages.popleft())
+            dispatched_count += 1
+
+        if dispatched_count:
+            return dispatched_count
+
+        if self.metrics:
+            self.metrics.recv_calls += 1
+
+        if not self._messages_decoder.receive_into(self._game_transport):
+            raise ConnectionResetError('The game connection was closed by the player')
+
+        try:
+            for frame in self._messages_decoder.iter_frames():
+                if self.recorder:
+                    self.recorder.record(recording.Direction.RECEIVED, frame)
+
+                if self.metrics:
+                    self.metrics.count_received(frame[constants.Protocol.MAGIC_SIZE], len(frame))
+
+                dispatcher.dispatch_frame(self, frame, self._messages_codec)
+                dispatched_count += 1
+        except exceptions.ProtocolException as pe:
+            # the stream can't be split anymore
+            if self.metrics:
+                self.metrics.count_error(pe)
+
+            dispatcher.dispatch_error(self, pe)
+            dispatched_count += 1
+
+        return dispatched_count
+
+    def flush(self):
+        """
+        Send all the buffered messages to the connected player, in a single send call
+
+        :raise NotConnectedError: No player is connected to the client
+        """
+
+        if self._send_buffer:
+            self._write(self._send_buffer)
+            self._send_buffer.clear()
+
+    def _send(self, data: bytes):
+        """
+        Send encoded messages to the connected player (or buffer them, in buffered mode)
+
+        :param data: The encoded messages
+        """
+
+        if self.buffered:
+            self._send_buffer += data
+        else:
+            self._write(data)
+
+    def _write(self, data: bytes):
+        """
+        Write encoded messages to the game transport
+
+        :param data: The encoded messages
+        """
+
+        if self.metrics:
+            self.metrics.send_calls += 1
+
+        self._game_transport.sendall(data)
+
+    def _encode_observed(self, message: messages.BaseSubmarinesMessage) -> bytes:
+        """
+        Encode a message, and report it to the metrics (its encoding time and size) and to the recorder
+
+        :param message: The message you wish to encode
+        :return: The encoded message
+        """
+
+        if not self.metrics:
+            encoded_message = self._messages_codec.encode_message(message)
+        else:
+            start_time = time.perf_counter()
+            encoded_message = self._messages_codec.encode_message(message)
+            self.metrics.encode_seconds.observe(time.perf_counter() - start_time)
+            self.metrics.count_sent(message.get_message_type(), len(encoded_message))
+
+        if self.recorder:
+            self.recorder.record(recording.Direction.SENT, encoded_message)
+
+        return encoded_message
+
+    def _decode_observed(self):
+        """
+        Decode all the complete messages in the received data,
+        and report them to the metrics (their decoding time and size) and to the recorder
+
+        :return: An iterator of the decoded messages
+        :raise ProtocolException: if a message is invalid
+        """
+
+        for frame in self._messages_decoder.iter_frames():
+            if self.recorder:
+                self.recorder.record(recording.Direction.RECEIVED, frame)
+
+            if not self.metrics:
+                yield self._messages_codec.decode_message(frame)
+                continue
+
+            self.metrics.count_received(frame[constants.Protocol.MAGIC_SIZE], len(frame))
+
+            start_time = time.perf_counter()
+            message = self._messages_codec.decode_message(frame)
+            self.metrics.decode_seconds.observe(time.perf_counter() - start_time)
+
+            yield message
+
+    def _clear_received_messages(self):
+        """
+        Drop all the received data of the previous game connection
+        """
+
+        self._messages_decoder.clear()
+        self._received_messages.clear()
+
+    def _close_game_transport(self):
+        """
+        Close the current game transport (if any), the unsent buffered messages are dropped
+        """
+
+        self._send_buffer.clear()
+
+        if self._game_transport:
+            self._game_transport.close()
+
+        self._game_transport = None
+
     def __enter__(self):
         """
         The client's entering point
@@ -262,10 +584,200 @@ class TCPSubmarinesClient(BaseSubmarinesClient):
         :return: Should the exception be suppressed
         """
 
-        if self._game_socket:
-            self._game_socket.close()
+        try:
+            if exc_type is None and self._game_transport:
+                self.flush()
+        finally:
+            self._close_game_transport()
 
-        if self._listening_socket:
-            self._listening_socket.close()
+        if self._listener:
+            self._listener.close()
 
         return False
+
+
+class _InvitesRace:
+    """
+    The concurrent invites of invite_any, the first accepting player's transport is taken,
+    the other transports are closed (including the ones that connect after the race is over)
+    """
+
+    def __init__(self, transport_factory: transports.BaseTransportFactory):
+        self._transport_factory = transport_factory
+        self._open_transports = set()
+        self._taken_transport = None
+        self._is_over = False
+        self._lock = threading.Lock()
+
+    def invite(self, candidate: Tuple[str, int], game_request_frame: bytes, messages_codec: BaseMessagesCodec):
+        """
+        Invite a player (on a pool thread)
+
+        :param candidate: The (host, port) of the player
+        :param game_request_frame: The encoded game request
+        :param messages_codec: The messages codec of the game
+        :return: The transport, its messages decoder (holds the data that followed the reply)
+        and the game reply frame, or Nones if the player declined or the race is over
+        :raise ProtocolException: if the player replied with an unexpected message
+        """
+
+        transport = self._transport_factory.connect(*candidate)
+
+        with self._lock:
+            if self._is_over:
+                transport.close()
+                return None, None, None
+
+            self._open_transports.add(transport)
+
+        try:
+            transport.sendall(game_request_frame)
+            messages_decoder = MessagesStreamDecoder(messages_codec)
+            game_reply_frame = None
+
+            while game_reply_frame is None:
+                if not messages_decoder.receive_into(transport):
+                    raise ConnectionResetError('The game connection was closed by the player')
+
+                game_reply_frame = next(messages_decoder.iter_frames(), None)
+
+            game_reply = messages_codec.decode_message(game_reply_frame)
+            protocol_utils.insure_message_type(game_reply, SubmarineMessageType.GAME_REPLY)
+
+            if not game_reply.response:
+                self._discard(transport)
+                return None, None, None
+
+            return transport, messages_decoder, bytes(game_reply_frame)
+        except BaseException:
+            self._discard(transport)
+            raise
+
+    def take(self, transport: transports.BaseTransport) -> bool:
+        """
+        Take the transport of an accepting player, if no transport was taken yet
+
+        :param transport: The transport
+        :return: Whether the transport was taken
+        """
+
+        with self._lock:
+            if self._is_over or transport not in self._open_transports:
+                return False
+
+            self._taken_transport = transport
+            self._open_transports.discard(transport)
+            self._is_over = True
+            return True
+
+    def close(self):
+        """
+        End the race, and close all the transports but the taken one
+        Note: closing a transport wakes up the pool thread that waits for its reply
+        """
+
+        with self._lock:
+            self._is_over = True
+            open_transports, self._open_transports = self._open_transports, set()
+
+        for transport in open_transports:
+            transport.close()
+
+    def _discard(self, transport: transports.BaseTransport):
+        """
+        Close a transport that is out of the race
+
+        :param transport: The transport
+        """
+
+        with self._lock:
+            self._open_transports.discard(transport)
+
+        transport.close()
+
+
+class TCPSubmarinesClient(TransportSubmarinesClient):
+    """
+    The main client class, handles all client functionality,
+    using tcp connection
+    """
+
+    def __init__(self,
+                 messages_codec: BaseMessagesCodec,
+                 listening_socket: socket.socket,
+                 game_socket: socket.socket = None,
+                 metrics: ClientMetrics = None,
+                 buffered: bool = False,
+                 recorder: recording.BaseRecorder = None):
+        """
+        Initializing a client
+        Note: nagle's algorithm is disabled on the tcp game sockets (TCP_NODELAY)
+
+        :param messages_codec: The messages codec of the client
+        :param listening_socket: The socket in which you listen to incoming requests
+        :param game_socket: A game socket, this socket has to be in a game session,
+        means a game request and response was passed on this socket
+        :param metrics: optional, metrics to update with the client's messages, calls and errors
+        :param buffered: Whether to buffer the sent messages until a flush (explicit, or before receiving),
+        so the messages of a turn are sent in a single packet
+        :param recorder: optional, a recorder to report the sent and received message frames to
+        """
+
+        listener = None
+        game_transport = None
+
+        if listening_socket:
+            listener = transports.SocketListener(listening_socket, self._get_socket_options(listening_socket))
+
+        if game_socket:
+            for level, option, value in self._get_socket_options(game_socket):
+                game_socket.setsockopt(level, option, value)
+
+            game_transport = transports.SocketTransport(game_socket)
+
+        super().__init__(messages_codec=messages_codec,
+                         transport_factory=transports.TCPTransportFactory(),
+                         listener=listener,
+                         game_transport=game_transport,
+                         metrics=metrics,
+                         buffered=buffered,
+                         recorder=recorder)
+
+    @staticmethod
+    def _get_socket_options(game_socket: socket.socket):
+        """
+        Get the options to set on the game sockets of a socket's family (the tcp options apply only to ip sockets)
+
+        :param game_socket: A listening or a game socket
+        :return: The socket options (level, option, value)
+        """
+
+        if game_socket.family in (socket.AF_INET, socket.AF_INET6):
+            return transports.TCP_NO_DELAY_OPTIONS
+
+        return ()
+
+    @classmethod
+    def listen(cls,
+               listening_port: int = constants.Network.DEFAULT_PORT,
+               messages_codec: BaseMessagesCodec = MessagesCodec(),
+               metrics: ClientMetrics = None,
+               buffered: bool = False,
+               recorder: recording.BaseRecorder = None):
+        """
+        Start listen to incoming tcp connections
+
+        :param listening_port: The listening port to use
+        :param messages_codec: The messages codec for the client
+        :param metrics: optional, metrics to update with the client's messages, calls and errors
+        :param buffered: Whether to buffer the sent messages until a flush
+        :param recorder: optional, a recorder to report the sent and received message frames to
+        :return: A client instance (on listen mode)
+        """
+
+        listener = transports.TCPTransportFactory().listen(listening_port, backlog=1)
+        return cls(messages_codec=messages_codec,
+                   listening_socket=listener.socket,
+                   metrics=metrics,
+                   buffered=buffered,
+                   recorder=recorder)
@@ -42,9 +42,28 @@ class Protocol:
         INVALID_COORDINATE_ERROR = 2
 
 
+class Game:
+    BOARD_SIZE = 2 ** Protocol.Formats.COORDINATE_DELIMITER
+
+    DEFAULT_FLEET = (
+        Protocol.SubmarineSize.SUBMARINE_FIVE,
+        Protocol.SubmarineSize.SUBMARINE_FOUR,
+        Protocol.SubmarineSize.SUBMARINE_THREE,
+        Protocol.SubmarineSize.SUBMARINE_THREE,
+        Protocol.SubmarineSize.SUBMARINE_TWO,
+    )
+
+
 class Network:
 
     DEFAULT_PORT = 8300
     PUBLIC_IP = '0.0.0.0'
 
     BUFFER_SIZE = 1024
+
+    DEFAULT_BACKLOG = 128
+
+    # the time (in seconds) a server stops accepting after a failed accept (such as running out of descriptors)
+    ACCEPT_ERROR_BACKOFF = 0.1
+
+    MAX_CONCURRENT_INVITES = 64
@@ -0,0 +1,203 @@
+"""
+The probability density guess strategy
+Note: this module requires NumPy
+"""
+
+import collections
+from typing import Sequence, Union
+
+import numpy as np
+
+from submarines_client import messages
+from submarines_client.constants import Protocol, Game
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.strategy import BaseGuessStrategy
+
+
+class ProbabilityDensityStrategy(BaseGuessStrategy):
+    """
+    A strategy that guesses the cell covered by the most legal placements of the remaining submarines,
+    placements that cover unsunk hits are weighted higher,
+    the density of every row and column is kept, so a result updates only the guessed cell's row and column
+    """
+
+    HIT_WEIGHT = 20
+
+    def __init__(self,
+                 fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET,
+                 board_size: int = Game.BOARD_SIZE):
+        """
+        Initializing a strategy
+
+        :param fleet: The sizes of the opponent's submarines
+        :param board_size: The number of rows (and columns) of the opponent's board
+        """
+
+        self._board_size = board_size
+        self._remaining_submarines = collections.Counter(int(submarine_size) for submarine_size in fleet)
+
+        # cells that can't hold an unsunk submarine (misses and sunk submarines)
+        self._blocked = np.zeros((board_size, board_size), dtype=np.int64)
+        self._hits = np.zeros((board_size, board_size), dtype=np.int64)
+        self._guessed = np.zeros((board_size, board_size), dtype=bool)
+
+        # the covered cells range of every placement start, by the submarine size
+        cells = np.arange(board_size)
+        self._coverage_ranges = {
+            submarine_size: (np.maximum(cells - submarine_size + 1, 0),
+                             np.minimum(cells + 1, board_size - submarine_size + 1))
+            for submarine_size in self._remaining_submarines
+        }
+
+        self._rows_density = np.zeros((board_size, board_size))
+        self._columns_density = np.zeros((board_size, board_size))
+        self._update_density()
+
+    def next_guess(self) -> messages.GuessMessage:
+        """
+        Get the next guess to send (the unguessed cell with the highest density)
+        Note: when no placement is left (a zero density), the first unguessed cell is guessed
+
+        :return: The next guess
+        :raise IndexError: if all the board's cells were guessed
+        """
+
+        density = self._rows_density + self._columns_density
+        density[self._guessed] = -1
+        cell = int(np.argmax(density))
+
+        if density.flat[cell] < 0:
+            raise IndexError('All the board\'s cells were guessed')
+
+        row, column = np.unravel_index(cell, density.shape)
+        return messages.GuessMessage(row=int(row), column=int(column))
+
+    def update(self,
+               guess: messages.GuessMessage,
+               result: Union[messages.ResultMessage, messages.AcknowledgeMessage]):
+        """
+        Update the strategy by the result of a guess
+
+        :param guess: The guess that was sent
+        :param result: The guess' result (or its acknowledge)
+        """
+
+        row, column = guess.row, guess.column
+        self._guessed[row, column] = True
+
+        if not result.result_code:
+            self._blocked[row, column] = 1
+            self._update_density(row, column)
+            return
+
+        self._hits[row, column] = 1
+
+        if result.result_code == 1:
+            self._update_density(row, column)
+            return
+
+        submarine_size = None
+
+        if result.get_message_type() == SubmarineMessageType.RESULT:
+            submarine_size = int(result.submarine_size)
+
+        self._sink_submarine(row, column, submarine_size)
+        self._update_density()
+
+    def _sink_submarine(self, row: int, column: int, submarine_size: int = None):
+        """
+        Block the cells of a sunk submarine, and remove it from the remaining submarines
+
+        :param row: The row of the sinking guess
+        :param column: The column of the sinking guess
+        :param submarine_size: optional, the sunk submarine's size (found by the hits when not given)
+        """
+
+        for hits, blocked, line_index, cell_index in ((self._hits, self._blocked, row, column),
+                                                      (self._hits.T, self._blocked.T, column, row)):
+            line = hits[line_index]
+            start, end = cell_index, cell_index + 1
+
+            while start > 0 and line[start - 1]:
+                start -= 1
+
+            while end < self._board_size and line[end]:
+                end += 1
+
+            size = submarine_size or end - start
+
+            if end - start < size or size not in self._remaining_submarines:
+                continue
+
+            # the submarine is the part of the hits run that is closest to the sinking guess
+            start = min(max(start, cell_index - size + 1), end - size)
+            hits[line_index, start:start + size] = 0
+            blocked[line_index, start:start + size] = 1
+
+            self._remove_submarine(size)
+            return
+
+        if submarine_size in self._remaining_submarines:
+            self._remove_submarine(submarine_size)
+
+    def _remove_submarine(self, submarine_size: int):
+        """
+        Remove a submarine from the remaining submarines
+
+        :param submarine_size: The submarine's size
+        """
+
+        self._remaining_submarines[submarine_size] -= 1
+
+        if not self._remaining_submarines[submarine_size]:
+            del self._remaining_submarines[submarine_size]
+
+    def _update_density(self, row: int = None, column: int = None):
+        """
+        Recalculate the density of a row and a column (or of the whole board)
+
+        :param row: optional, the row to update
+        :param column: optional, the column to update
+        """
+
+        if row is None:
+            self._rows_density = self._calc_lines_density(self._blocked, self._hits)
+            self._columns_density = self._calc_lines_density(self._blocked.T, self._hits.T).T
+            return
+
+        # the row and the column are calculated together, as two lines
+        lines_density = self._calc_lines_density(np.stack((self._blocked[row], self._blocked[:, column])),
+                                                 np.stack((self._hits[row], self._hits[:, column])))
+
+        self._rows_density[row] = lines_density[0]
+        self._columns_density[:, column] = lines_density[1]
+
+    def _calc_lines_density(self, blocked: np.ndarray, hits: np.ndarray) -> np.ndarray:
+        """
+        Count the (weighted) legal placements along lines that cover every cell,
+        using sliding window sums of the lines
+
+        :param blocked: The blocked cells of the lines
+        :param hits: The unsunk hits of the lines
+        :return: The density of every cell of the lines
+        """
+
+        lines_count = blocked.shape[0]
+        zeros = np.zeros((lines_count, 1), dtype=np.int64)
+        blocked_sums = np.concatenate((zeros, np.cumsum(blocked, axis=1)), axis=1)
+        hits_sums = np.concatenate((zeros, np.cumsum(hits, axis=1)), axis=1)
+        density = np.zeros(blocked.shape)
+
+        for submarine_size, submarines_count in self._remaining_submarines.items():
+            if submarine_size > self._board_size:
+                continue
+
+            blocked_windows = blocked_sums[:, submarine_size:] - blocked_sums[:, :-submarine_size]
+            hits_windows = hits_sums[:, submarine_size:] - hits_sums[:, :-submarine_size]
+            weights = (blocked_windows == 0) * (1 + ProbabilityDensityStrategy.HIT_WEIGHT * hits_windows)
+
+            weights_sums = np.concatenate((zeros, np.cumsum(weights, axis=1)), axis=1)
+            starts, ends = self._coverage_ranges[submarine_size]
+            density += submarines_count * (weights_sums[:, ends] - weights_sums[:, starts])
+
+        return density
@@ -0,0 +1,186 @@
+"""
+The messages dispatch, an event driven alternative to receiving the messages one by one
+Handlers are registered per message type, every received message is passed to its type's handler,
+and the errors (error messages, unexpected or invalid messages) are passed as values to the error handler
+"""
+
+import logging
+from typing import Callable, Optional
+
+from submarines_client import messages, constants, exceptions
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import BaseMessagesCodec
+from submarines_client.server import BaseSessionHandler, GameSession
+
+# a handler is called with the session the message was received on (a client or a server's session) and the message
+MessageHandler = Callable[[object, messages.BaseSubmarinesMessage], None]
+
+# an error handler is called with the session the error occurred on and the error
+ErrorHandler = Callable[[object, exceptions.SubmarinesClientException], None]
+
+_MESSAGE_TYPES = frozenset(SubmarineMessageType)
+
+
+class MessageDispatcher:
+    """
+    Passes messages to the handlers of their types, through a table indexed by the message type byte
+    Note: a dispatcher holds no session state, so a single dispatcher may serve many sessions
+    """
+
+    def __init__(self, error_handler: ErrorHandler = None):
+        """
+        Initializing a dispatcher without handlers
+
+        :param error_handler: optional, the handler of the errors (they are logged by default)
+        """
+
+        self.error_handler = error_handler or self._log_error
+        self._handlers = [None] * 2 ** 8
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+        # error messages are passed to the error handler, unless a handler is registered for them
+        self._handlers[SubmarineMessageType.ERROR] = self._dispatch_error_message
+
+    def register(self, message_type: SubmarineMessageType, handler: MessageHandler):
+        """
+        Register the handler of a message type (replaces its previous handler)
+
+        :param message_type: The message type
+        :param handler: The handler of the type's messages
+        """
+
+        self._handlers[message_type] = handler
+
+    def unregister(self, message_type: SubmarineMessageType):
+        """
+        Remove the handler of a message type, its messages will be passed to the error handler as unexpected
+
+        :param message_type: The message type
+        """
+
+        self._handlers[message_type] = self._dispatch_error_message \
+            if message_type == SubmarineMessageType.ERROR else None
+
+    def get_handler(self, message_type: SubmarineMessageType) -> Optional[MessageHandler]:
+        """
+        Get the handler of a message type
+
+        :param message_type: The message type
+        :return: The type's handler (None if there is no handler)
+        """
+
+        return self._handlers[message_type]
+
+    def dispatch(self, session, message: messages.BaseSubmarinesMessage):
+        """
+        Pass a message to its type's handler
+
+        :param session: The session the message was received on
+        :param message: The received message
+        """
+
+        handler = self._handlers[message.get_message_type()]
+
+        if handler is None:
+            self.error_handler(session, self._unexpected_message_error(message.get_message_type()))
+            return
+
+        handler(session, message)
+
+    def dispatch_frame(self, session, frame, messages_codec: BaseMessagesCodec):
+        """
+        Pass an encoded message to its type's handler, a frame without a handler is not decoded
+
+        :param session: The session the frame was received on
+        :param frame: The encoded message (with headers)
+        :param messages_codec: The codec to decode the frame by
+        """
+
+        message_type = frame[constants.Protocol.MAGIC_SIZE]
+        handler = self._handlers[message_type]
+
+        if handler is None:
+            self.error_handler(session, self._unexpected_message_error(message_type))
+            return
+
+        try:
+            message = messages_codec.decode_message(frame)
+        except exceptions.ProtocolException as pe:
+            self.error_handler(session, pe)
+            return
+        except ValueError as ve:
+            # a body value out of the protocol's enums
+            self.error_handler(session, exceptions.ProtocolException(str(ve)))
+            return
+
+        handler(session, message)
+
+    def dispatch_error(self, session, error: exceptions.SubmarinesClientException):
+        """
+        Pass an error to the error handler
+
+        :param session: The session the error occurred on
+        :param error: The error
+        """
+
+        self.error_handler(session, error)
+
+    def _dispatch_error_message(self, session, message: messages.ErrorMessage):
+        """
+        Pass an error message to the error handler, as the error it stands for
+
+        :param session: The session the message was received on
+        :param message: The received error message
+        """
+
+        self.error_handler(session, message.exception())
+
+    @staticmethod
+    def _unexpected_message_error(message_type: int) -> exceptions.InvalidMessageTypeException:
+        """
+        Create the error of a message without a handler
+
+        :param message_type: The message's type byte
+        :return: The error
+        """
+
+        if message_type in _MESSAGE_TYPES:
+            return exceptions.InvalidMessageTypeException(
+                f'Unexpected message type received: {SubmarineMessageType(message_type).name}')
+
+        return exceptions.InvalidMessageTypeException('The message type provided is invalid')
+
+    def _log_error(self, session, error: exceptions.SubmarinesClientException):
+        """
+        The default error handler, logs the errors
+
+        :param session: The session the error occurred on
+        :param error: The error
+        """
+
+        self._logger.warning(f'Dispatch error: {error}')
+
+
+class DispatchSessionHandler(BaseSessionHandler):
+    """
+    A server session handler that passes the messages of all the server's sessions to a dispatcher
+    """
+
+    def __init__(self, dispatcher: MessageDispatcher):
+        """
+        Initializing a handler
+
+        :param dispatcher: The dispatcher of the sessions' messages
+        """
+
+        self.dispatcher = dispatcher
+
+    def on_message(self, session: GameSession, message: messages.BaseSubmarinesMessage):
+        """
+        Called for every message received on a session after its game started
+
+        :param session: The session the message was received on
+        :param message: The received message
+        """
+
+        self.dispatcher.dispatch(session, message)
@@ -45,6 +45,22 @@ class InvalidHeadersException(ProtocolException):
     pass
 
 
+class InvalidPlacementException(SubmarinesClientException):
+    """
+    Raised when a submarine can't be placed on the board
+    """
+
+    pass
+
+
+class ReplayMismatchException(SubmarinesClientException):
+    """
+    Raised when a replayed message is different from the message the board engine produces
+    """
+
+    pass
+
+
 class ErrorMessageException(SubmarinesClientException):
     """
     An error generated by an error message
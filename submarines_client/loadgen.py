@@ -0,0 +1,381 @@
+"""
+The load generator, plays many concurrent games against a game server to measure its capacity
+Every session invites the server to a game, plays random legal turns at a fixed rate,
+and starts a new game once a game ends (until the run's duration is over)
+
+Usage: python -m submarines_client.loadgen --sessions 1000 --duration 30 --turn-rate 10 --local-server 2
+"""
+
+import argparse
+import asyncio
+import collections
+from random import Random
+import time
+from typing import List, Sequence
+
+from submarines_client import messages, exceptions
+from submarines_client.async_client import AsyncTCPSubmarinesClient
+from submarines_client.board import Board
+from submarines_client.constants import Protocol, Game, Network
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
+from submarines_client.server import BaseSessionHandler, GameSession
+from submarines_client.strategy import RandomGuessStrategy
+from submarines_client.supervisor import ServerSupervisor
+
+LOCAL_HOST = '127.0.0.1'
+
+# the time a session waits before reconnecting after an error
+ERROR_BACKOFF = 0.1
+
+# the time the sessions are given to finish their last turn once the run's duration is over
+STOP_GRACE = 5.0
+
+
+class BoardSessionHandler(BaseSessionHandler):
+    """
+    A session handler that plays the invited side of every game - answers the guesses by a random board,
+    and guesses back at random once the opponent's turn is over
+    """
+
+    def __init__(self, fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET, board_size: int = Game.BOARD_SIZE):
+        """
+        Initializing a handler
+
+        :param fleet: The sizes of the boards' submarines
+        :param board_size: The number of rows (and columns) of the boards
+        """
+
+        self._fleet = fleet
+        self._board_size = board_size
+        self._random_generator = Random()
+
+    def on_game_started(self, session: GameSession):
+        """
+        Called once the game handshake of a session is done
+
+        :param session: The session in which the game started
+        """
+
+        session.context = (Board.random(self._fleet, self._board_size, self._random_generator),
+                           RandomGuessStrategy(self._board_size, self._random_generator))
+
+    def on_message(self, session: GameSession, message: messages.BaseSubmarinesMessage):
+        """
+        Called for every message received on a session after its game started
+
+        :param session: The session the message was received on
+        :param message: The received message
+        :raise InvalidMessageTypeException: if the message is not expected in a game
+        """
+
+        board, strategy = session.context
+        message_type = message.get_message_type()
+
+        if message_type == SubmarineMessageType.GUESS:
+            try:
+                result = board.attack(message)
+            except exceptions.ErrorMessageException as eme:
+                # the turn is passed
+                session.send_messages([messages.ErrorMessage(eme.error_code), strategy.next_guess()])
+                return
+
+            session.send_message(result)
+        elif message_type == SubmarineMessageType.ACKNOWLEDGE:
+            if not board.is_defeated:
+                session.send_message(strategy.next_guess())
+        elif message_type == SubmarineMessageType.RESULT:
+            session.send_message(messages.AcknowledgeMessage(message.result_code))
+        elif message_type not in (SubmarineMessageType.ORDER, SubmarineMessageType.ERROR):
+            raise exceptions.InvalidMessageTypeException(f'Unexpected {message_type.name} message in a game')
+
+
+class LoadStats:
+    """
+    The stats of a load run, updated by all of its sessions
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.declined_games = 0
+        self.games = 0
+        self.turns = 0
+
+        # in seconds
+        self.connect_latencies: List[float] = []
+        self.turn_latencies: List[float] = []
+
+        self.errors = collections.Counter()
+
+    def count_error(self, exception: BaseException):
+        """
+        Count an error by its exception class
+
+        :param exception: The raised exception
+        """
+
+        self.errors[type(exception).__name__] += 1
+
+
+def calc_percentile(sorted_values: Sequence[float], percentile: float) -> float:
+    """
+    Get a percentile of sorted values (by the nearest rank)
+
+    :param sorted_values: The values, sorted
+    :param percentile: The percentile (between 0 and 100)
+    :return: The percentile's value (0 if there are no values)
+    """
+
+    if not sorted_values:
+        return 0.0
+
+    rank = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def _play_game(client: AsyncTCPSubmarinesClient,
+                     stats: LoadStats,
+                     board: Board,
+                     strategy: RandomGuessStrategy,
+                     turn_interval: float,
+                     end_time: float) -> bool:
+    """
+    Play a game as the inviter (after the handshake), until it ends or until the run's duration is over
+    A turn's latency is the time between sending a guess and receiving its result
+
+    :param client: The client, in a game session
+    :param stats: The run's stats
+    :param board: The session's board
+    :param strategy: The session's guess strategy
+    :param turn_interval: The time (in seconds) between the session's guesses
+    :param end_time: The time (by the event loop's clock) the run's duration is over
+    :return: Whether the game ended (False if it was left since the run's duration is over)
+    :raise ProtocolException: if the server sent an unexpected message
+    """
+
+    loop = asyncio.get_running_loop()
+    next_turn_time = loop.time()
+
+    await client.send_message(messages.OrderMessage())
+
+    while loop.time() < end_time:
+        next_turn_time += turn_interval
+        delay = next_turn_time - loop.time()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # our turn
+        turn_start_time = time.perf_counter()
+        await client.send_message(strategy.next_guess())
+        result: messages.ResultMessage = await client.receive_message(SubmarineMessageType.RESULT)
+        stats.turn_latencies.append(time.perf_counter() - turn_start_time)
+        stats.turns += 1
+
+        await client.send_message(messages.AcknowledgeMessage(result.result_code))
+
+        if result.did_sink_last:
+            return True
+
+        # the server's turn
+        guess: messages.GuessMessage = await client.receive_message(SubmarineMessageType.GUESS)
+        result = board.attack(guess)
+        await client.send_message(result)
+        await client.receive_message(SubmarineMessageType.ACKNOWLEDGE)
+
+        if result.did_sink_last:
+            return True
+
+    return False
+
+
+async def run_session(host: str,
+                      port: int,
+                      messages_codec: BaseMessagesCodec,
+                      stats: LoadStats,
+                      turn_rate: float,
+                      end_time: float,
+                      random_generator: Random):
+    """
+    Play games against the server, one after the other, until the run's duration is over
+    Note: an error ends the current game, it is counted and a new game is started
+
+    :param host: The server's host
+    :param port: The server's port
+    :param messages_codec: The messages codec of the session
+    :param stats: The run's stats
+    :param turn_rate: The session's guesses per second (unlimited if 0)
+    :param end_time: The time (by the event loop's clock) the run's duration is over
+    :param random_generator: The random generator of the session's boards and guesses
+    """
+
+    loop = asyncio.get_running_loop()
+    turn_interval = 1 / turn_rate if turn_rate else 0.0
+
+    while loop.time() < end_time:
+        try:
+            async with AsyncTCPSubmarinesClient(messages_codec) as client:
+                connect_start_time = time.perf_counter()
+
+                if not await client.invite_player(host, port):
+                    stats.declined_games += 1
+                    await asyncio.sleep(ERROR_BACKOFF)
+                    continue
+
+                stats.connect_latencies.append(time.perf_counter() - connect_start_time)
+                stats.connections += 1
+
+                if await _play_game(client,
+                                    stats,
+                                    Board.random(random_generator=random_generator),
+                                    RandomGuessStrategy(random_generator=random_generator),
+                                    turn_interval,
+                                    end_time):
+                    stats.games += 1
+        except (exceptions.SubmarinesClientException, OSError, asyncio.IncompleteReadError) as e:
+            stats.count_error(e)
+            await asyncio.sleep(ERROR_BACKOFF)
+
+
+async def run_load(host: str,
+                   port: int,
+                   sessions_count: int,
+                   duration: float,
+                   turn_rate: float,
+                   ramp_up: float = 0.0,
+                   messages_codec: BaseMessagesCodec = MessagesCodec(),
+                   seed: int = None) -> LoadStats:
+    """
+    Run concurrent sessions against a server
+
+    :param host: The server's host
+    :param port: The server's port
+    :param sessions_count: The number of concurrent sessions
+    :param duration: The run's duration (in seconds)
+    :param turn_rate: The guesses per second of every session (unlimited if 0)
+    :param ramp_up: The time (in seconds) over which the sessions are started
+    :param messages_codec: The messages codec of the sessions
+    :param seed: optional, the seed of the sessions' random generators
+    :return: The run's stats
+    """
+
+    loop = asyncio.get_running_loop()
+    stats = LoadStats()
+    seeds = Random(seed)
+    end_time = loop.time() + duration
+
+    async def start_session(session_index: int):
+        await asyncio.sleep(ramp_up * session_index / sessions_count)
+        await run_session(host, port, messages_codec, stats, turn_rate, end_time, Random(seeds.random()))
+
+    sessions = [asyncio.ensure_future(start_session(session_index)) for session_index in range(sessions_count)]
+    _, unfinished_sessions = await asyncio.wait(sessions, timeout=duration + STOP_GRACE)
+
+    for session in unfinished_sessions:
+        session.cancel()
+
+    if unfinished_sessions:
+        await asyncio.wait(unfinished_sessions)
+
+    return stats
+
+
+def _raise_open_files_limit(required_files: int):
+    """
+    Raise the soft limit of open files (if needed), every session holds a socket
+
+    :param required_files: The number of files the run requires
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return
+
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    if soft_limit != resource.RLIM_INFINITY and soft_limit < required_files:
+        new_limit = required_files if hard_limit == resource.RLIM_INFINITY else min(required_files, hard_limit)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (new_limit, hard_limit))
+
+
+def format_report(stats: LoadStats, duration: float, sessions_count: int) -> str:
+    """
+    Format a load run's report
+
+    :param stats: The run's stats
+    :param duration: The run's wall time (in seconds)
+    :param sessions_count: The number of concurrent sessions
+    :return: The report's text
+    """
+
+    connect_latencies = sorted(stats.connect_latencies)
+    turn_latencies = sorted(stats.turn_latencies)
+    duration = max(duration, 1e-9)
+    errors = ', '.join(f'{name} {count}' for name, count in stats.errors.most_common()) or 'none'
+
+    return '\n'.join([
+        f'sessions:       {sessions_count} in {duration:.2f}s',
+        f'connections:    {stats.connections} ({stats.connections / duration:.1f}/s), '
+        f'handshake p50 {calc_percentile(connect_latencies, 50) * 1e3:.2f}ms, '
+        f'p99 {calc_percentile(connect_latencies, 99) * 1e3:.2f}ms',
+        f'games:          {stats.games} completed, {stats.declined_games} declined',
+        f'turns:          {stats.turns} ({stats.turns / duration:.0f}/s)',
+        f'turn latency:   p50 {calc_percentile(turn_latencies, 50) * 1e3:.3f}ms, '
+        f'p99 {calc_percentile(turn_latencies, 99) * 1e3:.3f}ms, '
+        f'p99.9 {calc_percentile(turn_latencies, 99.9) * 1e3:.3f}ms',
+        f'errors:         {errors}',
+    ])
+
+
+def main(arguments: Sequence[str] = None):
+    """
+    Run a load from the command line
+
+    :param arguments: optional, the command line arguments (sys.argv by default)
+    """
+
+    parser = argparse.ArgumentParser(description='Play concurrent games against a game server')
+    parser.add_argument('--host', default=LOCAL_HOST)
+    parser.add_argument('--port', type=int, default=Network.DEFAULT_PORT)
+    parser.add_argument('--sessions', type=int, default=100, help='the number of concurrent sessions')
+    parser.add_argument('--duration', type=float, default=10.0, help='the run\'s duration (in seconds)')
+    parser.add_argument('--turn-rate', type=float, default=10.0,
+                        help='the guesses per second of every session (0 for unlimited)')
+    parser.add_argument('--ramp-up', type=float, default=1.0,
+                        help='the time (in seconds) over which the sessions are started')
+    parser.add_argument('--local-server', type=int, default=0, metavar='WORKERS',
+                        help='host the games on a local server with this number of worker processes '
+                             '(the sessions connect to it on localhost)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(arguments)
+
+    _raise_open_files_limit(args.sessions * (2 if args.local_server else 1) + 64)
+
+    supervisor = None
+    host = args.host
+
+    if args.local_server:
+        host = LOCAL_HOST
+        supervisor = ServerSupervisor(BoardSessionHandler, workers_count=args.local_server, listening_port=args.port)
+        supervisor.start()
+
+    try:
+        start_time = time.perf_counter()
+        stats = asyncio.run(run_load(host=host,
+                                     port=args.port,
+                                     sessions_count=args.sessions,
+                                     duration=args.duration,
+                                     turn_rate=args.turn_rate,
+                                     ramp_up=args.ramp_up,
+                                     seed=args.seed))
+        duration = time.perf_counter() - start_time
+    finally:
+        if supervisor:
+            supervisor.stop()
+
+    print(format_report(stats, duration, args.sessions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+"""
+The matchmaking lobby, pairs waiting players by their rating and hands every pair off to a game session
+The lobby flow - a player registers by inviting the lobby (a game request and reply), then waits to be paired:
+the player that waited longer becomes the game's inviter and receives a game reply once the opponent accepts,
+the other player receives the game request of the inviter (and replies to it). From then on the lobby
+passes the messages between the paired players, as in a direct game (the inviter sends an order and guesses first)
+"""
+
+import collections
+from concurrent.futures import Future
+import logging
+import threading
+from typing import Callable, Deque, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from submarines_client import messages, constants, exceptions, protocol_utils, transports
+from submarines_client.client import BaseSubmarinesClient, TransportSubmarinesClient
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
+from submarines_client.server import BaseSessionHandler, GameSession
+
+DEFAULT_BUCKET_WIDTH = 100
+DEFAULT_MAX_BUCKET_DISTANCE = 2
+
+
+class _WaitingPlayer:
+    """
+    A player's entry in the pairing queue (a removed player's entry is skipped once reached)
+    """
+
+    __slots__ = ('player', 'rating', 'removed')
+
+    def __init__(self, player: Hashable, rating: int):
+        self.player = player
+        self.rating = rating
+        self.removed = False
+
+
+class PairingQueue:
+    """
+    The waiting players, indexed by rating buckets - a player is paired with the longest waiting player
+    of the nearest bucket (up to a maximal bucket distance), or waits in its own bucket
+    Note: the queue is not thread safe
+    """
+
+    def __init__(self,
+                 bucket_width: int = DEFAULT_BUCKET_WIDTH,
+                 max_bucket_distance: int = DEFAULT_MAX_BUCKET_DISTANCE):
+        """
+        Initializing an empty queue
+
+        :param bucket_width: The range of ratings in a bucket
+        :param max_bucket_distance: The maximal distance between the buckets of paired players
+        """
+
+        self.bucket_width = bucket_width
+        self.max_bucket_distance = max_bucket_distance
+
+        self._buckets: Dict[int, Deque[_WaitingPlayer]] = collections.defaultdict(collections.deque)
+        self._entries: Dict[Hashable, _WaitingPlayer] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of waiting players
+
+        :return: The number of waiting players
+        """
+
+        return len(self._entries)
+
+    def __contains__(self, player: Hashable) -> bool:
+        """
+        Check whether a player waits in the queue
+
+        :param player: The player
+        :return: Whether the player waits in the queue
+        """
+
+        return player in self._entries
+
+    def add(self, player: Hashable, rating: int = 0) -> Optional[Tuple[Hashable, Hashable]]:
+        """
+        Pair a player with a waiting player, or add it to the waiting players
+
+        :param player: The player
+        :param rating: The player's rating
+        :return: The pair (the waiting player first), or None if the player waits
+        :raise ValueError: if the player already waits in the queue
+        """
+
+        if player in self._entries:
+            raise ValueError('The player already waits in the queue')
+
+        bucket = rating // self.bucket_width
+
+        for distance in range(self.max_bucket_distance + 1):
+            opponent = self._pop_waiting(bucket - distance)
+
+            if opponent is None and distance:
+                opponent = self._pop_waiting(bucket + distance)
+
+            if opponent is not None:
+                return opponent, player
+
+        entry = _WaitingPlayer(player, rating)
+        self._entries[player] = entry
+        self._buckets[bucket].append(entry)
+
+        return None
+
+    def remove(self, player: Hashable) -> bool:
+        """
+        Remove a waiting player
+
+        :param player: The player
+        :return: Whether the player was waiting
+        """
+
+        entry = self._entries.pop(player, None)
+
+        if entry is None:
+            return False
+
+        entry.removed = True
+        return True
+
+    def _pop_waiting(self, bucket: int) -> Optional[Hashable]:
+        """
+        Take the longest waiting player of a bucket
+
+        :param bucket: The bucket
+        :return: The player, or None if no player waits in the bucket
+        """
+
+        waiting_players = self._buckets.get(bucket)
+
+        while waiting_players:
+            entry = waiting_players.popleft()
+
+            if not entry.removed:
+                del self._entries[entry.player]
+                return entry.player
+
+        if waiting_players is not None:
+            del self._buckets[bucket]
+
+        return None
+
+
+class _LobbyPlayer:
+    """
+    The lobby state of a registered player (a server session's context)
+    """
+
+    __slots__ = ('rating', 'opponent', 'is_inviter', 'is_bridged')
+
+    def __init__(self, rating: int):
+        self.rating = rating
+        self.opponent: Optional[GameSession] = None
+        self.is_inviter = False
+        self.is_bridged = False
+
+
+class LobbySessionHandler(BaseSessionHandler):
+    """
+    A server session handler that runs a lobby - every session is a registered player,
+    the sessions are paired and then bridged to each other
+    """
+
+    def __init__(self,
+                 rating_provider: Callable[[GameSession], int] = None,
+                 bucket_width: int = DEFAULT_BUCKET_WIDTH,
+                 max_bucket_distance: int = DEFAULT_MAX_BUCKET_DISTANCE):
+        """
+        Initializing a lobby
+
+        :param rating_provider: optional, gets the rating of a registered player (all the ratings are 0 by default)
+        :param bucket_width: The range of ratings in a bucket
+        :param max_bucket_distance: The maximal distance between the buckets of paired players
+        """
+
+        self.pairing_queue = PairingQueue(bucket_width, max_bucket_distance)
+        self._rating_provider = rating_provider
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+    def on_game_started(self, session: GameSession):
+        """
+        Called once a player registered (its game request was replied), pairs it or queues it
+
+        :param session: The player's session
+        """
+
+        session.context = _LobbyPlayer(self._rating_provider(session) if self._rating_provider else 0)
+        self._pair(session)
+
+    def on_message(self, session: GameSession, message: messages.BaseSubmarinesMessage):
+        """
+        Called for every message received from a registered player
+
+        :param session: The player's session
+        :param message: The received message
+        :raise InvalidMessageTypeException: if a player sent a message before its game started
+        """
+
+        player: _LobbyPlayer = session.context
+
+        if player.is_bridged:
+            player.opponent.send_message(message)
+            return
+
+        if player.opponent is None or player.is_inviter:
+            raise exceptions.InvalidMessageTypeException(
+                f'Unexpected message type received: {message.get_message_type().name} (the game did not start)')
+
+        # the invited player replied to the inviter's game request
+        protocol_utils.insure_message_type(message, SubmarineMessageType.GAME_REPLY)
+        inviter = player.opponent
+
+        if not message.response:
+            # the invited player declined, the inviter waits for another opponent
+            player.opponent = None
+            session.close()
+            self._requeue(inviter)
+            return
+
+        player.is_bridged = inviter.context.is_bridged = True
+        inviter.send_message(messages.GameReplyMessage())
+        self._logger.info(f'Lobby game starts: {inviter.address} invites {session.address}')
+
+    def on_session_closed(self, session: GameSession):
+        """
+        Called once a player's session is closed, the player leaves the queue (or its game)
+
+        :param session: The player's session
+        """
+
+        player: _LobbyPlayer = session.context
+
+        if player is None:
+            return
+
+        self.pairing_queue.remove(session)
+        opponent = player.opponent
+
+        if opponent is None or opponent.context.opponent is not session:
+            return
+
+        if player.is_bridged or player.is_inviter:
+            opponent.context.opponent = None
+            opponent.close()
+        else:
+            # the invited player left before it replied, the inviter waits for another opponent
+            self._requeue(opponent)
+
+    def _requeue(self, session: GameSession):
+        """
+        Return a paired player whose opponent left (before the game started) to the queue
+
+        :param session: The player's session
+        """
+
+        session.context.opponent = None
+        session.context.is_inviter = False
+        self._pair(session)
+
+    def _pair(self, session: GameSession):
+        """
+        Pair a registered player, or queue it until an opponent registers
+
+        :param session: The player's session
+        """
+
+        pair = self.pairing_queue.add(session, session.context.rating)
+
+        if pair is None:
+            return
+
+        inviter, invited = pair
+        inviter.context.opponent = invited
+        inviter.context.is_inviter = True
+        invited.context.opponent = inviter
+        invited.context.is_inviter = False
+        invited.send_message(messages.GameRequestMessage())
+
+
+def join_lobby(client: BaseSubmarinesClient,
+               lobby_host: str,
+               lobby_port: int = constants.Network.DEFAULT_PORT) -> bool:
+    """
+    Register in a lobby and wait to be paired
+    Note: this is a blocking method, it will exit only when the game starts or an error is raised
+
+    :param client: The player's client
+    :param lobby_host: The lobby's host
+    :param lobby_port: The lobby's port
+    :return: Whether the player is the game's inviter (sends the order and guesses first)
+    :raise ProtocolException: if the lobby declined the registration or sent an unexpected message
+    """
+
+    if not client.invite_player(lobby_host, lobby_port):
+        raise exceptions.ProtocolException('The lobby declined the registration')
+
+    message = client.receive_message()
+
+    if message.get_message_type() == SubmarineMessageType.GAME_REPLY:
+        return True
+
+    if message.get_message_type() != SubmarineMessageType.GAME_REQUEST:
+        raise exceptions.InvalidMessageTypeException(
+            f'Unexpected message type received: {message.get_message_type().name}')
+
+    client.send_message(messages.GameReplyMessage())
+    client.flush()
+
+    return False
+
+
+class LobbyMatch(NamedTuple):
+    """
+    A paired player of a local lobby
+    """
+
+    client: TransportSubmarinesClient
+    is_inviter: bool
+
+
+class LocalLobby:
+    """
+    An in-process lobby (for tests and simulations), a paired player gets a client
+    that is connected to its opponent's client over in-memory transports
+    """
+
+    def __init__(self,
+                 messages_codec: BaseMessagesCodec = MessagesCodec(),
+                 bucket_width: int = DEFAULT_BUCKET_WIDTH,
+                 max_bucket_distance: int = DEFAULT_MAX_BUCKET_DISTANCE):
+        """
+        Initializing an empty lobby
+
+        :param messages_codec: The messages codec of the players' clients
+        :param bucket_width: The range of ratings in a bucket
+        :param max_bucket_distance: The maximal distance between the buckets of paired players
+        """
+
+        self.pairing_queue = PairingQueue(bucket_width, max_bucket_distance)
+        self._messages_codec = messages_codec
+        self._lock = threading.Lock()
+
+    def join(self, rating: int = 0) -> 'Future[LobbyMatch]':
+        """
+        Register a player
+
+        :param rating: The player's rating
+        :return: A future of the player's match, done once the player is paired
+        (cancel it to leave the lobby)
+        """
+
+        match_future = Future()
+
+        with self._lock:
+            pair = self.pairing_queue.add(match_future, rating)
+
+            # a waiting player may leave (cancel its future) right before it is paired
+            while pair is not None and not pair[0].set_running_or_notify_cancel():
+                pair = self.pairing_queue.add(match_future, rating)
+
+        if pair is None:
+            match_future.add_done_callback(self._leave)
+            return match_future
+
+        inviter_future, invited_future = pair
+        inviter_transport, invited_transport = transports.memory_pair()
+
+        invited_future.set_running_or_notify_cancel()
+        inviter_future.set_result(LobbyMatch(self._create_client(inviter_transport), True))
+        invited_future.set_result(LobbyMatch(self._create_client(invited_transport), False))
+
+        return invited_future
+
+    def _create_client(self, game_transport: transports.BaseTransport) -> TransportSubmarinesClient:
+        """
+        Create a paired player's client
+
+        :param game_transport: The transport to the opponent
+        :return: The client, in a game session
+        """
+
+        return TransportSubmarinesClient(messages_codec=self._messages_codec,
+                                         transport_factory=None,
+                                         game_transport=game_transport)
+
+    def _leave(self, match_future: Future):
+        """
+        Remove a player whose future was cancelled from the queue
+
+        :param match_future: The player's match future
+        """
+
+        if match_future.cancelled():
+            with self._lock:
+                self.pairing_queue.remove(match_future)
@@ -0,0 +1,202 @@
+"""
+This module has compact (tuple backed) records of the protocol's messages,
+a record holds only the values of a message, and can be converted back to a message instance
+"""
+
+from typing import NamedTuple, Union
+
+from submarines_client import messages
+from submarines_client.constants import Protocol
+from submarines_client.messages import SubmarineMessageType
+
+
+class GameRequestRecord(NamedTuple):
+    """
+    The initial game request message's record
+    """
+
+    MESSAGE_TYPE = SubmarineMessageType.GAME_REQUEST
+
+    def to_message(self) -> messages.GameRequestMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.GameRequestMessage()
+
+
+class GameReplyRecord(NamedTuple):
+    """
+    The initial game request message's reply record
+    """
+
+    response: bool = True
+
+    MESSAGE_TYPE = SubmarineMessageType.GAME_REPLY
+
+    def to_message(self) -> messages.GameReplyMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.GameReplyMessage(response=self.response)
+
+
+class OrderRecord(NamedTuple):
+    """
+    The order inform message's record
+    """
+
+    MESSAGE_TYPE = SubmarineMessageType.ORDER
+
+    def to_message(self) -> messages.OrderMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.OrderMessage()
+
+
+class GuessRecord(NamedTuple):
+    """
+    The player's guess message's record
+    """
+
+    row: int
+    column: int
+
+    MESSAGE_TYPE = SubmarineMessageType.GUESS
+
+    def to_message(self) -> messages.GuessMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.GuessMessage(row=self.row, column=self.column)
+
+
+class ResultRecord(NamedTuple):
+    """
+    The player's guess message's result record
+    """
+
+    submarine_size: Protocol.SubmarineSize = Protocol.SubmarineSize.NO_SUBMARINE
+    did_sink: bool = False
+    did_sink_last: bool = False
+
+    MESSAGE_TYPE = SubmarineMessageType.RESULT
+
+    def to_message(self) -> messages.ResultMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.ResultMessage(submarine_size=self.submarine_size,
+                                      did_sink=self.did_sink,
+                                      did_sink_last=self.did_sink_last)
+
+    @property
+    def result_code(self) -> int:
+        """
+        Get the result code of the record
+
+        :return: the result code of the record
+        """
+
+        return bool(self.submarine_size) + self.did_sink + self.did_sink_last
+
+
+class AcknowledgeRecord(NamedTuple):
+    """
+    The result's ack message's record
+    """
+
+    result_code: int
+
+    MESSAGE_TYPE = SubmarineMessageType.ACKNOWLEDGE
+
+    def to_message(self) -> messages.AcknowledgeMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.AcknowledgeMessage(result_code=self.result_code)
+
+
+class ErrorRecord(NamedTuple):
+    """
+    The error message's record
+    """
+
+    error_code: Protocol.ErrorCode
+
+    MESSAGE_TYPE = SubmarineMessageType.ERROR
+
+    def to_message(self) -> messages.ErrorMessage:
+        """
+        Convert the record to a message instance
+
+        :return: The message instance
+        """
+
+        return messages.ErrorMessage(error_code=self.error_code)
+
+
+MessageRecord = Union[GameRequestRecord, GameReplyRecord, OrderRecord, GuessRecord,
+                      ResultRecord, AcknowledgeRecord, ErrorRecord]
+
+RECORDS_TYPES = {
+    GameRequestRecord.MESSAGE_TYPE: GameRequestRecord,
+    GameReplyRecord.MESSAGE_TYPE: GameReplyRecord,
+    OrderRecord.MESSAGE_TYPE: OrderRecord,
+    GuessRecord.MESSAGE_TYPE: GuessRecord,
+    ResultRecord.MESSAGE_TYPE: ResultRecord,
+    AcknowledgeRecord.MESSAGE_TYPE: AcknowledgeRecord,
+    ErrorRecord.MESSAGE_TYPE: ErrorRecord,
+}
+
+MESSAGES_TO_RECORDS = {
+    SubmarineMessageType.GAME_REQUEST: lambda message: GameRequestRecord(),
+    SubmarineMessageType.GAME_REPLY: lambda message: GameReplyRecord(message.response),
+    SubmarineMessageType.ORDER: lambda message: OrderRecord(),
+    SubmarineMessageType.GUESS: lambda message: GuessRecord(message.row, message.column),
+    SubmarineMessageType.RESULT: lambda message: ResultRecord(message.submarine_size,
+                                                              message.did_sink,
+                                                              message.did_sink_last),
+    SubmarineMessageType.ACKNOWLEDGE: lambda message: AcknowledgeRecord(message.result_code),
+    SubmarineMessageType.ERROR: lambda message: ErrorRecord(message.error_code),
+}
+
+
+def to_record(message: messages.BaseSubmarinesMessage) -> MessageRecord:
+    """
+    Convert a message instance to its compact record
+
+    :param message: The message you wish to convert
+    :return: The message's record
+    """
+
+    return MESSAGES_TO_RECORDS[message.get_message_type()](message)
+
+
+def to_message(record: MessageRecord) -> messages.BaseSubmarinesMessage:
+    """
+    Convert a compact record back to a message instance
+
+    :param record: The record you wish to convert
+    :return: The message instance
+    """
+
+    return record.to_message()
@@ -5,6 +5,7 @@ This module has all the protocol's message types
 from abc import ABCMeta, abstractmethod
 import enum
 import struct
+from typing import Dict, Iterator
 
 from submarines_client import exceptions
 from submarines_client.constants import Protocol
@@ -26,6 +27,8 @@ class BaseSubmarinesMessage(metaclass=ABCMeta):
     The base class for all messages
     """
 
+    __slots__ = ()
+
     @staticmethod
     @abstractmethod
     def get_message_type() -> SubmarineMessageType:
@@ -65,6 +68,8 @@ class GameRequestMessage(BaseSubmarinesMessage):
     The initial game request message
     """
 
+    __slots__ = ()
+
     MESSAGE_TYPE = SubmarineMessageType.GAME_REQUEST
 
     def __init__(self):
@@ -106,6 +111,8 @@ class GameReplyMessage(BaseSubmarinesMessage):
     The initial game request message's reply
     """
 
+    __slots__ = ('response',)
+
     MESSAGE_TYPE = SubmarineMessageType.GAME_REPLY
 
     def __init__(self, response: bool = True):
@@ -149,6 +156,8 @@ class OrderMessage(BaseSubmarinesMessage):
     The order inform message
     """
 
+    __slots__ = ()
+
     MESSAGE_TYPE = SubmarineMessageType.ORDER
 
     def __init__(self):
@@ -190,6 +199,8 @@ class GuessMessage(BaseSubmarinesMessage):
     The player's guess message
     """
 
+    __slots__ = ('row', 'column')
+
     MESSAGE_TYPE = SubmarineMessageType.GUESS
 
     def __init__(self, row: int, column: int):
@@ -240,6 +251,8 @@ class ResultMessage(BaseSubmarinesMessage):
     The player's guess message's result
     """
 
+    __slots__ = ('submarine_size', 'did_sink', 'did_sink_last')
+
     MESSAGE_TYPE = SubmarineMessageType.RESULT
 
     def __init__(self, submarine_size: Protocol.SubmarineSize = Protocol.SubmarineSize.NO_SUBMARINE,
@@ -314,6 +327,8 @@ class AcknowledgeMessage(BaseSubmarinesMessage):
     The result's ack message
     """
 
+    __slots__ = ('result_code',)
+
     MESSAGE_TYPE = SubmarineMessageType.ACKNOWLEDGE
 
     def __init__(self, result_code: int):
@@ -357,6 +372,8 @@ class ErrorMessage(BaseSubmarinesMessage):
     The error message
     """
 
+    __slots__ = ('error_code',)
+
     MESSAGE_TYPE = SubmarineMessageType.ERROR
 
     ERROR_CODES_TO_EXCEPTIONS = {
@@ -412,3 +429,88 @@ class ErrorMessage(BaseSubmarinesMessage):
             self.error_code,
             exceptions.GenericException
         )
+
+
+class FrozenMessageMixin:
+    """
+    A mixin that makes message instances immutable,
+    used for message instances that are shared between their users
+    Note: a frozen message is pickled as a (mutable) instance of its message class,
+    since the frozen classes are created at runtime
+    """
+
+    __slots__ = ()
+
+    # the message class the frozen class was created for
+    MESSAGE_CLASS = None
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} instances are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} instances are immutable')
+
+    def __reduce__(self):
+        """
+        Get the pickling recipe of the message, rebuilds an instance of the message class
+
+        :return: The function that rebuilds the message, and its arguments
+        """
+
+        return _restore_message, (self.MESSAGE_CLASS, {name: getattr(self, name)
+                                                       for name in _slots_names(self.MESSAGE_CLASS)})
+
+
+_FROZEN_MESSAGES_CLASSES = {}
+
+
+def _slots_names(message_class: type) -> Iterator[str]:
+    """
+    Get the names of a message class' slots (including its base classes' slots)
+
+    :param message_class: The message class
+    :return: An iterator of the slots' names
+    """
+
+    for slotted_class in message_class.__mro__:
+        yield from getattr(slotted_class, '__slots__', ())
+
+
+def _restore_message(message_class: type, slots_values: Dict[str, object]) -> BaseSubmarinesMessage:
+    """
+    Rebuild a pickled message
+
+    :param message_class: The message's class
+    :param slots_values: The values of the message's slots, by the slot's name
+    :return: The message
+    """
+
+    message = object.__new__(message_class)
+
+    for name, value in slots_values.items():
+        object.__setattr__(message, name, value)
+
+    return message
+
+
+def freeze_message(message: BaseSubmarinesMessage) -> BaseSubmarinesMessage:
+    """
+    Get an immutable copy of a message
+
+    :param message: The message you wish to freeze
+    :return: An immutable message instance (of a subclass of the message's class)
+    """
+
+    message_class = type(message)
+
+    if message_class not in _FROZEN_MESSAGES_CLASSES:
+        _FROZEN_MESSAGES_CLASSES[message_class] = type(f'Frozen{message_class.__name__}',
+                                                       (FrozenMessageMixin, message_class),
+                                                       {'__slots__': (), 'MESSAGE_CLASS': message_class})
+
+    frozen_message = object.__new__(_FROZEN_MESSAGES_CLASSES[message_class])
+
+    for name in _slots_names(message_class):
+        object.__setattr__(frozen_message, name, getattr(message, name))
+
+    return frozen_message
@@ -3,10 +3,14 @@ The messages codec is responsible for encoding and decoding messages
 """
 
 from abc import ABCMeta, abstractmethod
+import functools
+import struct
+from typing import Iterator, Sequence
 
 from submarines_client import protocol_utils, exceptions
-from submarines_client import messages
-from submarines_client.constants import Protocol
+from submarines_client import messages, message_records
+from submarines_client.constants import Protocol, Network
+from submarines_client.messages import SubmarineMessageType
 
 
 class BaseMessagesCodec(metaclass=ABCMeta):
@@ -37,6 +41,26 @@ class BaseMessagesCodec(metaclass=ABCMeta):
 
         raise NotImplementedError()
 
+    def decode_record(self, message: bytes) -> message_records.MessageRecord:
+        """
+        decodes a single message (with headers) into a compact record
+
+        :param message: The message you wish to decode
+        :return: The decoded message record
+        """
+
+        return message_records.to_record(self.decode_message(message))
+
+    def encode_many(self, messages_to_encode: Sequence[messages.BaseSubmarinesMessage]) -> bytes:
+        """
+        encodes a sequence of messages (with headers) into a single buffer
+
+        :param messages_to_encode: The messages you wish to encode
+        :return: The encoded messages as bytes
+        """
+
+        return bytes().join([self.encode_message(message) for message in messages_to_encode])
+
 
 class MessagesCodec(BaseMessagesCodec):
     """
@@ -98,3 +122,557 @@ class MessagesCodec(BaseMessagesCodec):
             return decoded_message
         except exceptions.ProtocolException:
             raise
+
+
+class StructMessagesCodec(BaseMessagesCodec):
+    """
+    A messages codec that uses precompiled structs (a struct per headers and body layout),
+    and dispatches decoding by the raw message type byte
+    """
+
+    MESSAGE_TYPES_COUNT = 2 ** (8 * struct.calcsize(Protocol.Formats.MESSAGE_TYPE_FORMAT))
+
+    def __init__(self, version_magic: Protocol.Magic = Protocol.Magic.VERSION_ONE_MAGIC):
+        self._version_magic = version_magic
+        self._encoded_magic = version_magic.value.encode()
+
+        headers_format = f'{Protocol.Formats.MAGIC_FORMAT}{Protocol.Formats.MESSAGE_TYPE_FORMAT}'
+        self._headers_size = struct.calcsize(headers_format)
+
+        self._empty_struct = struct.Struct(headers_format)
+        self._response_struct = struct.Struct(f'{headers_format}{Protocol.Formats.RESPONSE_FORMAT}')
+        self._coordinate_struct = struct.Struct(f'{headers_format}{Protocol.Formats.COORDINATE_FORMAT}')
+        self._result_code_struct = struct.Struct(f'{headers_format}{Protocol.Formats.RESULT_CODE_FORMAT}')
+        self._result_struct = struct.Struct(f'{headers_format}{Protocol.Formats.RESULT_CODE_FORMAT}'
+                                            f'{Protocol.Formats.SUBMARINE_SIZE_FORMAT}')
+        self._error_code_struct = struct.Struct(f'{headers_format}{Protocol.Formats.ERROR_CODE_FORMAT}')
+
+        self._submarine_sizes = {submarine_size.value: submarine_size for submarine_size in Protocol.SubmarineSize}
+        self._coordinate_mask = 2 ** Protocol.Formats.COORDINATE_DELIMITER - 1
+
+        self._encoders = {
+            SubmarineMessageType.GAME_REQUEST: self._encode_empty,
+            SubmarineMessageType.GAME_REPLY: self._encode_game_reply,
+            SubmarineMessageType.ORDER: self._encode_empty,
+            SubmarineMessageType.GUESS: self._encode_guess,
+            SubmarineMessageType.RESULT: self._encode_result,
+            SubmarineMessageType.ACKNOWLEDGE: self._encode_acknowledge,
+            SubmarineMessageType.ERROR: self._encode_error,
+        }
+
+        self._decoders = [None] * StructMessagesCodec.MESSAGE_TYPES_COUNT
+        self._decoders[SubmarineMessageType.GAME_REQUEST] = self._decode_game_request
+        self._decoders[SubmarineMessageType.GAME_REPLY] = self._decode_game_reply
+        self._decoders[SubmarineMessageType.ORDER] = self._decode_order
+        self._decoders[SubmarineMessageType.GUESS] = self._decode_guess
+        self._decoders[SubmarineMessageType.RESULT] = self._decode_result
+        self._decoders[SubmarineMessageType.ACKNOWLEDGE] = self._decode_acknowledge
+        self._decoders[SubmarineMessageType.ERROR] = self._decode_error
+
+        self._records_decoders = [None] * StructMessagesCodec.MESSAGE_TYPES_COUNT
+
+        for message_type, record_class in message_records.RECORDS_TYPES.items():
+            self._records_decoders[message_type] = functools.partial(self._decoders[message_type],
+                                                                     message_class=record_class)
+
+        self._interned_records = [{} for _ in range(StructMessagesCodec.MESSAGE_TYPES_COUNT)]
+
+    def encode_message(self, message: messages.BaseSubmarinesMessage) -> bytes:
+        """
+        encodes a single message (with headers)
+
+        :param message: The message you wish to encode
+        :return: The encoded message as bytes
+        """
+
+        message_struct, values = self._encoders[message.MESSAGE_TYPE](message)
+        return message_struct.pack(self._encoded_magic, message.MESSAGE_TYPE, *values)
+
+    def encode_message_into(self, message: messages.BaseSubmarinesMessage, buffer, offset: int = 0) -> int:
+        """
+        encodes a single message (with headers) into a writable buffer
+
+        :param message: The message you wish to encode
+        :param buffer: The buffer you wish to encode into
+        :param offset: The offset in the buffer to encode at
+        :return: The offset right after the encoded message
+        """
+
+        message_struct, values = self._encoders[message.MESSAGE_TYPE](message)
+        message_struct.pack_into(buffer, offset, self._encoded_magic, message.MESSAGE_TYPE, *values)
+
+        return offset + message_struct.size
+
+    def encode_many(self, messages_to_encode: Sequence[messages.BaseSubmarinesMessage]) -> bytes:
+        """
+        encodes a sequence of messages (with headers) into a single preallocated buffer
+
+        :param messages_to_encode: The messages you wish to encode
+        :return: The encoded messages as bytes
+        """
+
+        layouts = [self._encoders[message.MESSAGE_TYPE](message) for message in messages_to_encode]
+        encoded_messages = bytearray(sum(message_struct.size for message_struct, _ in layouts))
+        offset = 0
+
+        for message, (message_struct, values) in zip(messages_to_encode, layouts):
+            message_struct.pack_into(encoded_messages, offset, self._encoded_magic, message.MESSAGE_TYPE, *values)
+            offset += message_struct.size
+
+        return bytes(encoded_messages)
+
+    def decode_message(self, message: bytes) -> messages.BaseSubmarinesMessage:
+        """
+        decodes a single message (with headers)
+
+        :param message: The message you wish to decode
+        :return: The decoded message instance
+        :raise InvalidMessageTypeException: if the message type is invalid
+        :raise InvalidMagicException: if the magic is not matching the current magic
+        :raise InvalidHeadersException: if the headers are not provided in the message
+        """
+
+        if len(message) < self._headers_size:
+            raise exceptions.InvalidHeadersException('The message\'s headers are not provided')
+
+        decoder = self._decoders[message[Protocol.MAGIC_SIZE]]
+
+        if decoder is None:
+            raise exceptions.InvalidMessageTypeException('The message type provided is invalid')
+
+        if message[:Protocol.MAGIC_SIZE] != self._encoded_magic:
+            raise exceptions.InvalidMagicException('The given version magic is different from the current one')
+
+        return decoder(message)
+
+    def decode_record(self, message: bytes) -> message_records.MessageRecord:
+        """
+        decodes a single message (with headers) straight into a compact record
+
+        :param message: The message you wish to decode
+        :return: The decoded message record (records are interned, so equal records are shared)
+        :raise InvalidMessageTypeException: if the message type is invalid
+        :raise InvalidMagicException: if the magic is not matching the current magic
+        :raise InvalidHeadersException: if the headers are not provided in the message
+        """
+
+        if len(message) < self._headers_size:
+            raise exceptions.InvalidHeadersException('The message\'s headers are not provided')
+
+        message_type = message[Protocol.MAGIC_SIZE]
+        decoder = self._records_decoders[message_type]
+
+        if decoder is None:
+            raise exceptions.InvalidMessageTypeException('The message type provided is invalid')
+
+        if message[:Protocol.MAGIC_SIZE] != self._encoded_magic:
+            raise exceptions.InvalidMagicException('The given version magic is different from the current one')
+
+        record = decoder(message)
+        return self._interned_records[message_type].setdefault(record, record)
+
+    def _encode_empty(self, message: messages.BaseSubmarinesMessage):
+        """
+        Get the struct and the body values of a message without a body
+        """
+
+        return self._empty_struct, ()
+
+    def _encode_game_reply(self, message: messages.GameReplyMessage):
+        """
+        Get the struct and the body values of a game reply message
+        """
+
+        return self._response_struct, (message.response,)
+
+    def _encode_guess(self, message: messages.GuessMessage):
+        """
+        Get the struct and the body values of a guess message
+        """
+
+        coordinate = message.column % (2 ** Protocol.Formats.COORDINATE_DELIMITER)
+        coordinate += (message.row << Protocol.Formats.COORDINATE_DELIMITER)
+
+        return self._coordinate_struct, (coordinate,)
+
+    def _encode_result(self, message: messages.ResultMessage):
+        """
+        Get the struct and the body values of a result message
+        """
+
+        if message.submarine_size:
+            return self._result_struct, (message.result_code, message.submarine_size)
+
+        return self._result_code_struct, (message.result_code,)
+
+    def _encode_acknowledge(self, message: messages.AcknowledgeMessage):
+        """
+        Get the struct and the body values of an acknowledge message
+        """
+
+        return self._result_code_struct, (message.result_code,)
+
+    def _encode_error(self, message: messages.ErrorMessage):
+        """
+        Get the struct and the body values of an error message
+        """
+
+        return self._error_code_struct, (message.error_code,)
+
+    def _decode_game_request(self, message: bytes, message_class=messages.GameRequestMessage):
+        """
+        Decode a game request message (with headers) into an instance of the given message class
+        """
+
+        return message_class()
+
+    def _decode_game_reply(self, message: bytes, message_class=messages.GameReplyMessage):
+        """
+        Decode a game reply message (with headers) into an instance of the given message class
+        """
+
+        _, _, response = self._response_struct.unpack_from(message)
+        return message_class(response=response)
+
+    def _decode_order(self, message: bytes, message_class=messages.OrderMessage):
+        """
+        Decode an order message (with headers) into an instance of the given message class
+        """
+
+        return message_class()
+
+    def _decode_guess(self, message: bytes, message_class=messages.GuessMessage):
+        """
+        Decode a guess message (with headers) into an instance of the given message class
+        """
+
+        _, _, coordinate = self._coordinate_struct.unpack_from(message)
+        return message_class(row=coordinate >> Protocol.Formats.COORDINATE_DELIMITER,
+                             column=coordinate & self._coordinate_mask)
+
+    def _decode_result(self, message: bytes, message_class=messages.ResultMessage):
+        """
+        Decode a result message (with headers) into an instance of the given message class
+        """
+
+        _, _, result_code = self._result_code_struct.unpack_from(message)
+
+        if not result_code:
+            return message_class()
+
+        _, _, _, submarine_size_value = self._result_struct.unpack_from(message)
+
+        if submarine_size_value not in self._submarine_sizes:
+            raise ValueError(f'{submarine_size_value} is not a valid {Protocol.SubmarineSize.__name__}')
+
+        return message_class(submarine_size=self._submarine_sizes[submarine_size_value],
+                             did_sink=result_code > 1,
+                             did_sink_last=result_code > 2)
+
+    def _decode_acknowledge(self, message: bytes, message_class=messages.AcknowledgeMessage):
+        """
+        Decode an acknowledge message (with headers) into an instance of the given message class
+        """
+
+        _, _, result_code = self._result_code_struct.unpack_from(message)
+        return message_class(result_code=result_code)
+
+    def _decode_error(self, message: bytes, message_class=messages.ErrorMessage):
+        """
+        Decode an error message (with headers) into an instance of the given message class
+        """
+
+        _, _, error_code = self._error_code_struct.unpack_from(message)
+        return message_class(error_code=error_code)
+
+
+class CachedMessagesCodec(BaseMessagesCodec):
+    """
+    A messages codec that precomputes every valid message of the protocol once per version magic,
+    encoding is a lookup of a shared encoded message,
+    and decoding is a lookup of a shared immutable message instance
+    Note: messages out of the protocol's valid values are handled by a struct messages codec
+    """
+
+    CACHE_KEYS = {
+        SubmarineMessageType.GAME_REQUEST: lambda message: (SubmarineMessageType.GAME_REQUEST,),
+        SubmarineMessageType.GAME_REPLY: lambda message: (SubmarineMessageType.GAME_REPLY, message.response),
+        SubmarineMessageType.ORDER: lambda message: (SubmarineMessageType.ORDER,),
+        SubmarineMessageType.GUESS: lambda message: (SubmarineMessageType.GUESS, message.row, message.column),
+        SubmarineMessageType.RESULT: lambda message: (SubmarineMessageType.RESULT,
+                                                      message.submarine_size,
+                                                      message.did_sink,
+                                                      message.did_sink_last),
+        SubmarineMessageType.ACKNOWLEDGE: lambda message: (SubmarineMessageType.ACKNOWLEDGE, message.result_code),
+        SubmarineMessageType.ERROR: lambda message: (SubmarineMessageType.ERROR, message.error_code),
+    }
+
+    _FRAMES_CACHES = {}
+
+    def __init__(self, version_magic: Protocol.Magic = Protocol.Magic.VERSION_ONE_MAGIC):
+        self._version_magic = version_magic
+        self._struct_codec = StructMessagesCodec(version_magic)
+
+        if version_magic not in CachedMessagesCodec._FRAMES_CACHES:
+            CachedMessagesCodec._FRAMES_CACHES[version_magic] = self._build_frames_cache()
+
+        self._encoded_messages, self._decoded_messages, self._decoded_records = \
+            CachedMessagesCodec._FRAMES_CACHES[version_magic]
+        self._cache_keys = CachedMessagesCodec.CACHE_KEYS
+
+    @staticmethod
+    def iter_valid_messages() -> Iterator[messages.BaseSubmarinesMessage]:
+        """
+        Get all the valid messages of the protocol
+
+        :return: An iterator of all the valid messages
+        """
+
+        yield messages.GameRequestMessage()
+        yield messages.GameReplyMessage(response=True)
+        yield messages.GameReplyMessage(response=False)
+        yield messages.OrderMessage()
+
+        coordinates_range = range(2 ** Protocol.Formats.COORDINATE_DELIMITER)
+
+        for row in coordinates_range:
+            for column in coordinates_range:
+                yield messages.GuessMessage(row=row, column=column)
+
+        yield messages.ResultMessage()
+
+        for submarine_size in Protocol.SubmarineSize:
+            if submarine_size:
+                yield messages.ResultMessage(submarine_size=submarine_size)
+                yield messages.ResultMessage(submarine_size=submarine_size, did_sink=True)
+                yield messages.ResultMessage(submarine_size=submarine_size, did_sink=True, did_sink_last=True)
+
+        sink_last_result = messages.ResultMessage(Protocol.SubmarineSize.SUBMARINE_TWO, did_sink=True, did_sink_last=True)
+
+        for result_code in range(sink_last_result.result_code + 1):
+            yield messages.AcknowledgeMessage(result_code=result_code)
+
+        for error_code in Protocol.ErrorCode:
+            yield messages.ErrorMessage(error_code=error_code)
+
+    def _build_frames_cache(self):
+        """
+        Encode and decode all the valid messages of the protocol
+
+        :return: The encoded messages by their cache keys,
+        and the decoded messages and records by their encoded messages
+        """
+
+        encoded_messages = {}
+        decoded_messages = {}
+        decoded_records = {}
+
+        for message in CachedMessagesCodec.iter_valid_messages():
+            encoded_message = self._struct_codec.encode_message(message)
+            decoded_message = messages.freeze_message(self._struct_codec.decode_message(encoded_message))
+
+            encoded_messages[CachedMessagesCodec.CACHE_KEYS[message.MESSAGE_TYPE](message)] = encoded_message
+            decoded_messages[encoded_message] = decoded_message
+            decoded_records[encoded_message] = self._struct_codec.decode_record(encoded_message)
+
+        return encoded_messages, decoded_messages, decoded_records
+
+    def encode_message(self, message: messages.BaseSubmarinesMessage) -> bytes:
+        """
+        encodes a single message (with headers)
+
+        :param message: The message you wish to encode
+        :return: The encoded message as bytes (shared between all the encodings of an equal message)
+        """
+
+        encoded_message = self._encoded_messages.get(self._cache_keys[message.MESSAGE_TYPE](message))
+
+        if encoded_message is None:
+            return self._struct_codec.encode_message(message)
+
+        return encoded_message
+
+    def decode_message(self, message: bytes) -> messages.BaseSubmarinesMessage:
+        """
+        decodes a single message (with headers)
+
+        :param message: The message you wish to decode
+        :return: The decoded message instance (immutable, and shared between all the decodings of the message)
+        :raise InvalidMessageTypeException: if the message type is invalid
+        :raise InvalidMagicException: if the magic is not matching the current magic
+        :raise InvalidHeadersException: if the headers are not provided in the message
+        """
+
+        if type(message) is not bytes:
+            message = bytes(message)
+
+        decoded_message = self._decoded_messages.get(message)
+
+        if decoded_message is None:
+            return self._struct_codec.decode_message(message)
+
+        return decoded_message
+
+    def decode_record(self, message: bytes) -> message_records.MessageRecord:
+        """
+        decodes a single message (with headers) into a compact record
+
+        :param message: The message you wish to decode
+        :return: The decoded message record (shared between all the decodings of the message)
+        :raise InvalidMessageTypeException: if the message type is invalid
+        :raise InvalidMagicException: if the magic is not matching the current magic
+        :raise InvalidHeadersException: if the headers are not provided in the message
+        """
+
+        if type(message) is not bytes:
+            message = bytes(message)
+
+        decoded_record = self._decoded_records.get(message)
+
+        if decoded_record is None:
+            return self._struct_codec.decode_record(message)
+
+        return decoded_record
+
+
+# the encoded magics of all the protocol versions (a tuple, so a buffer is matched in place by startswith)
+_ENCODED_MAGICS = tuple(magic.value.encode() for magic in Protocol.Magic)
+
+
+class MessagesStreamDecoder:
+    """
+    A stateful decoder of a messages stream,
+    splits the stream into messages by their types and decodes them
+    """
+
+    def __init__(self, messages_codec: BaseMessagesCodec, buffer_size: int = Network.BUFFER_SIZE):
+        """
+        Initializing a stream decoder
+
+        :param messages_codec: The messages codec used to decode the split messages
+        :param buffer_size: The initial size of the receive buffer
+        """
+
+        self._messages_codec = messages_codec
+        self._buffer = bytearray(buffer_size)
+        self._start = 0
+        self._end = 0
+
+    def receive_into(self, source) -> int:
+        """
+        Receive data from a source (a socket for example) straight into the decoder's buffer,
+        using a single recv_into call
+
+        :param source: The source you wish to receive from
+        :return: The number of received bytes (0 means the source is closed)
+        """
+
+        self._make_room(1)
+
+        received_size = source.recv_into(memoryview(self._buffer)[self._end:])
+        self._end += received_size
+
+        return received_size
+
+    def feed(self, data: bytes):
+        """
+        Add data to the decoder's buffer
+
+        :param data: The data you wish to add
+        """
+
+        self._make_room(len(data))
+
+        self._buffer[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    def iter_frames(self) -> Iterator[memoryview]:
+        """
+        Split all the complete messages out of the buffer
+        Note: a frame is a view of the decoder's buffer, it is valid only until more data is received,
+        and the stream can't be split past an invalid message, so the buffered data is dropped before raising
+
+        :return: An iterator of the encoded messages (with headers)
+        :raise InvalidMagicException: if a message magic is invalid
+        :raise InvalidMessageTypeException: if a message type is invalid
+        """
+
+        headers_size = protocol_utils.calc_headers_size()
+        buffer_view = memoryview(self._buffer)
+
+        while self._end - self._start >= headers_size:
+            body_start = self._start + headers_size
+
+            if not self._buffer.startswith(_ENCODED_MAGICS, self._start):
+                self.clear()
+                raise exceptions.InvalidMagicException('The message magic is invalid')
+
+            message_type = self._buffer[body_start - 1]
+
+            try:
+                body_size = protocol_utils.calc_body_size(message_type, buffer_view[body_start:self._end])
+            except exceptions.InvalidMessageTypeException:
+                self.clear()
+                raise
+
+            message_end = body_start + body_size
+
+            if message_end > self._end:
+                break
+
+            frame = buffer_view[self._start:message_end]
+            self._start = message_end
+
+            yield frame
+
+    def decode_messages(self) -> Iterator[messages.BaseSubmarinesMessage]:
+        """
+        Decode all the complete messages in the buffer
+
+        :return: An iterator of the decoded messages
+        :raise ProtocolException: if a message is invalid
+        """
+
+        for frame in self.iter_frames():
+            yield self._messages_codec.decode_message(frame)
+
+    def decode_records(self) -> Iterator[message_records.MessageRecord]:
+        """
+        Decode all the complete messages in the buffer into compact records
+
+        :return: An iterator of the decoded message records
+        :raise ProtocolException: if a message is invalid
+        """
+
+        for frame in self.iter_frames():
+            yield self._messages_codec.decode_record(frame)
+
+    def clear(self):
+        """
+        Drop all the buffered data (used when the stream is replaced)
+        """
+
+        self._start = 0
+        self._end = 0
+
+    def _make_room(self, size: int):
+        """
+        Make sure the buffer has room for more data, reusing the buffer when possible
+
+        :param size: The size of the data that should fit in the buffer
+        """
+
+        pending_size = self._end - self._start
+
+        if len(self._buffer) - self._end >= size and pending_size:
+            return
+
+        if pending_size + size <= len(self._buffer):
+            self._buffer[:pending_size] = self._buffer[self._start:self._end]
+        else:
+            new_buffer = bytearray(max(2 * len(self._buffer), pending_size + size))
+            new_buffer[:pending_size] = self._buffer[self._start:self._end]
+            self._buffer = new_buffer
+
+        self._start = 0
+        self._end = pending_size
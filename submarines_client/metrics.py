@@ -0,0 +1,224 @@
+"""
+The client metrics - messages and bytes counters, transport calls, codec timings and error counts,
+read through a pull api (snapshot) or rendered in the prometheus text format
+"""
+
+from bisect import bisect_left
+import collections
+from typing import Dict, Sequence
+
+from submarines_client.messages import SubmarineMessageType
+
+# the upper bounds (in seconds) of the codec timing histograms buckets
+DEFAULT_TIME_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+
+DEFAULT_PROMETHEUS_PREFIX = 'submarines_client'
+
+
+class Histogram:
+    """
+    A histogram of observed values, in buckets of fixed upper bounds (the last bucket is unbounded)
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_TIME_BUCKETS):
+        """
+        Initializing an empty histogram
+
+        :param buckets: The sorted upper bounds of the buckets
+        """
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """
+        Count a value in its bucket
+
+        :param value: The observed value
+        """
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        """
+        Add the observations of another histogram (with the same buckets) to this histogram
+
+        :param other: The other histogram
+        """
+
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def snapshot(self) -> Dict:
+        """
+        Get the histogram's current state
+
+        :return: The buckets' upper bounds and counts, and the values' sum and count
+        """
+
+        return {'buckets': self.buckets, 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+
+class ClientMetrics:
+    """
+    The metrics of a client, the client updates them only when they are given to it,
+    so a client without metrics pays for a single check per message
+    """
+
+    def __init__(self, time_buckets: Sequence[float] = DEFAULT_TIME_BUCKETS):
+        """
+        Initializing empty metrics
+
+        :param time_buckets: The upper bounds (in seconds) of the codec timing histograms buckets
+        """
+
+        # the counters of messages are indexed by the message type byte
+        self.messages_sent = [0] * 2 ** 8
+        self.bytes_sent = [0] * 2 ** 8
+        self.messages_received = [0] * 2 ** 8
+        self.bytes_received = [0] * 2 ** 8
+
+        self.send_calls = 0
+        self.recv_calls = 0
+
+        self.encode_seconds = Histogram(time_buckets)
+        self.decode_seconds = Histogram(time_buckets)
+
+        self.errors = collections.Counter()
+
+    def count_sent(self, message_type: int, frame_size: int):
+        """
+        Count a sent message
+
+        :param message_type: The message's type
+        :param frame_size: The size of the encoded message (with headers)
+        """
+
+        self.messages_sent[message_type] += 1
+        self.bytes_sent[message_type] += frame_size
+
+    def count_received(self, message_type: int, frame_size: int):
+        """
+        Count a received message
+
+        :param message_type: The message's type
+        :param frame_size: The size of the encoded message (with headers)
+        """
+
+        self.messages_received[message_type] += 1
+        self.bytes_received[message_type] += frame_size
+
+    def count_error(self, exception: Exception):
+        """
+        Count an error by its exception class
+
+        :param exception: The raised exception
+        """
+
+        self.errors[type(exception).__name__] += 1
+
+    def merge(self, other):
+        """
+        Add the metrics of another client (or process) to these metrics
+
+        :param other: The other metrics
+        """
+
+        for counters, other_counters in ((self.messages_sent, other.messages_sent),
+                                         (self.bytes_sent, other.bytes_sent),
+                                         (self.messages_received, other.messages_received),
+                                         (self.bytes_received, other.bytes_received)):
+            for message_type, count in enumerate(other_counters):
+                counters[message_type] += count
+
+        self.send_calls += other.send_calls
+        self.recv_calls += other.recv_calls
+        self.encode_seconds.merge(other.encode_seconds)
+        self.decode_seconds.merge(other.decode_seconds)
+        self.errors.update(other.errors)
+
+    def snapshot(self) -> Dict:
+        """
+        Get the current metrics (the pull api)
+
+        :return: The metrics, the messages counters are keyed by the message type names
+        """
+
+        return {
+            'messages_sent': self._by_message_type(self.messages_sent),
+            'bytes_sent': self._by_message_type(self.bytes_sent),
+            'messages_received': self._by_message_type(self.messages_received),
+            'bytes_received': self._by_message_type(self.bytes_received),
+            'send_calls': self.send_calls,
+            'recv_calls': self.recv_calls,
+            'encode_seconds': self.encode_seconds.snapshot(),
+            'decode_seconds': self.decode_seconds.snapshot(),
+            'errors': dict(self.errors),
+        }
+
+    def render_prometheus(self, prefix: str = DEFAULT_PROMETHEUS_PREFIX) -> str:
+        """
+        Render the metrics in the prometheus text format
+
+        :param prefix: The prefix of the metrics names
+        :return: The rendered metrics
+        """
+
+        lines = []
+
+        for name, description, counters in (
+                ('messages_sent_total', 'The number of sent messages', self.messages_sent),
+                ('bytes_sent_total', 'The number of sent bytes', self.bytes_sent),
+                ('messages_received_total', 'The number of received messages', self.messages_received),
+                ('bytes_received_total', 'The number of received bytes', self.bytes_received)):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            lines.extend(f'{prefix}_{name}{{message_type="{message_type}"}} {count}'
+                         for message_type, count in self._by_message_type(counters).items())
+
+        for name, description, count in (
+                ('send_calls_total', 'The number of transport send calls', self.send_calls),
+                ('recv_calls_total', 'The number of transport receive calls', self.recv_calls)):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            lines.append(f'{prefix}_{name} {count}')
+
+        for name, description, histogram in (
+                ('encode_seconds', 'The time of encoding messages', self.encode_seconds),
+                ('decode_seconds', 'The time of decoding messages', self.decode_seconds)):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            accumulated_count = 0
+
+            for upper_bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                accumulated_count += count
+                bound = '+Inf' if upper_bound == float('inf') else repr(upper_bound)
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {accumulated_count}')
+
+            lines.append(f'{prefix}_{name}_sum {histogram.sum!r}')
+            lines.append(f'{prefix}_{name}_count {histogram.count}')
+
+        lines.append(f'# HELP {prefix}_errors_total The number of errors, by exception class')
+        lines.append(f'# TYPE {prefix}_errors_total counter')
+        lines.extend(f'{prefix}_errors_total{{exception="{exception_name}"}} {count}'
+                     for exception_name, count in sorted(self.errors.items()))
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _by_message_type(counters: Sequence[int]) -> Dict[str, int]:
+        """
+        Key the counters of the known message types by their names
+
+        :param counters: The counters, indexed by the message type byte
+        :return: The counters of the known message types
+        """
+
+        return {message_type.name.lower(): counters[message_type] for message_type in SubmarineMessageType}
@@ -9,6 +9,16 @@ from submarines_client import exceptions, constants
 from submarines_client.messages import SubmarineMessageType, BaseSubmarinesMessage
 from submarines_client.constants import Protocol
 
+MESSAGE_BODY_FORMATS = {
+    SubmarineMessageType.GAME_REQUEST: '',
+    SubmarineMessageType.GAME_REPLY: Protocol.Formats.RESPONSE_FORMAT,
+    SubmarineMessageType.ORDER: '',
+    SubmarineMessageType.GUESS: Protocol.Formats.COORDINATE_FORMAT,
+    SubmarineMessageType.RESULT: Protocol.Formats.RESULT_CODE_FORMAT,
+    SubmarineMessageType.ACKNOWLEDGE: Protocol.Formats.RESULT_CODE_FORMAT,
+    SubmarineMessageType.ERROR: Protocol.Formats.ERROR_CODE_FORMAT,
+}
+
 
 def calc_headers_size() -> int:
     """
@@ -25,6 +35,29 @@ def calc_headers_size() -> int:
     return headers_size
 
 
+def calc_body_size(message_type: int, body_prefix: bytes = b'') -> int:
+    """
+    Get the body size of a message (not including headers)
+    Note: a result message carries a submarine size only when its result code is positive,
+    so until its first body byte is known the minimal body size is returned
+
+    :param message_type: The message's type
+    :param body_prefix: The part of the message's body that is already known
+    :return: The size of the message's body
+    :raise InvalidMessageTypeException: if the message type is invalid
+    """
+
+    if message_type not in MESSAGE_BODY_FORMATS:
+        raise exceptions.InvalidMessageTypeException('The message type provided is invalid')
+
+    body_size = struct.calcsize(MESSAGE_BODY_FORMATS[message_type])
+
+    if message_type == SubmarineMessageType.RESULT and body_prefix and body_prefix[0] > 0:
+        body_size += struct.calcsize(Protocol.Formats.SUBMARINE_SIZE_FORMAT)
+
+    return body_size
+
+
 def encode_headers(message_type: SubmarineMessageType, version_magic: Protocol.Magic) -> bytes:
     """
     Encode the headers of the message
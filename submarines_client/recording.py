@@ -0,0 +1,399 @@
+"""
+The games recording - an append-only log of the raw message frames of games, with an index of the games' offsets
+The log file - a magic, then a record per message: a varint of the time delta (in microseconds, since the
+previous message of the game) shifted left with the message direction in the lowest bit, followed by the raw frame
+The index file - a magic, then an entry per game: the game's offset in the log and its start time (in microseconds)
+"""
+
+from abc import ABCMeta, abstractmethod
+import enum
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, NamedTuple, Tuple
+
+from submarines_client import exceptions, protocol_utils
+from submarines_client.constants import Protocol
+from submarines_client.messages import SubmarineMessageType
+
+LOG_MAGIC = b'SBL1'
+INDEX_MAGIC = b'SBI1'
+INDEX_ENTRY_FORMAT = '<QQ'
+INDEX_SUFFIX = '.idx'
+
+
+class Direction(enum.IntEnum):
+    SENT = 0
+    RECEIVED = 1
+
+
+class RecordedMessage(NamedTuple):
+    """
+    A recorded message frame
+    """
+
+    direction: Direction
+    time_delta: int
+    frame: memoryview
+
+
+class BaseRecorder(metaclass=ABCMeta):
+    """
+    The base class for all recorders, a recorder is the hook a client reports its messages frames to
+    """
+
+    @abstractmethod
+    def start_game(self):
+        """
+        Start recording a new game (the following frames belong to it)
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def record(self, direction: Direction, frame: bytes):
+        """
+        Record a message frame
+
+        :param direction: Whether the frame was sent or received
+        :param frame: The encoded message (with headers)
+        """
+
+        raise NotImplementedError()
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encode a non negative integer as a varint (7 bits in every byte, the high bit marks that more bytes follow)
+
+    :param value: The integer you wish to encode
+    :return: The encoded varint
+    """
+
+    encoded_varint = bytearray()
+
+    while value > 0x7f:
+        encoded_varint.append(value & 0x7f | 0x80)
+        value >>= 7
+
+    encoded_varint.append(value)
+
+    return bytes(encoded_varint)
+
+
+def decode_varint(buffer, offset: int = 0) -> Tuple[int, int]:
+    """
+    Decode a varint
+
+    :param buffer: The buffer that holds the varint
+    :param offset: The varint's offset in the buffer
+    :return: The decoded integer, and the offset that follows the varint
+    :raise InvalidHeadersException: if the buffer ends in the middle of the varint
+    """
+
+    value = 0
+    shift = 0
+
+    while True:
+        if offset >= len(buffer):
+            raise exceptions.InvalidHeadersException('The recording ends in the middle of a record')
+
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+
+        if byte < 0x80:
+            return value, offset
+
+        shift += 7
+
+
+class GamesRecorder(BaseRecorder):
+    """
+    Appends the games of a client to a recording log and its index
+    Note: the records are buffered by the files, they are written on flush or close
+    """
+
+    def __init__(self, log_path: str, index_path: str = None):
+        """
+        Open a recording for appending (created if it doesn't exist)
+
+        :param log_path: The log file's path
+        :param index_path: optional, the index file's path (the log path with an index suffix by default)
+        """
+
+        self._log_file = open(log_path, 'ab')
+        self._index_file = open(index_path or log_path + INDEX_SUFFIX, 'ab')
+        self._index_entry_struct = struct.Struct(INDEX_ENTRY_FORMAT)
+        self._last_record_time = None
+
+        if not self._log_file.tell():
+            self._log_file.write(LOG_MAGIC)
+
+        if not self._index_file.tell():
+            self._index_file.write(INDEX_MAGIC)
+
+    def start_game(self):
+        """
+        Start recording a new game (the following frames belong to it)
+        """
+
+        self._index_file.write(self._index_entry_struct.pack(self._log_file.tell(), time.time_ns() // 1000))
+        self._last_record_time = time.perf_counter_ns()
+
+    def record(self, direction: Direction, frame: bytes):
+        """
+        Record a message frame
+
+        :param direction: Whether the frame was sent or received
+        :param frame: The encoded message (with headers)
+        """
+
+        if self._last_record_time is None:
+            self.start_game()
+
+        now = time.perf_counter_ns()
+        time_delta = (now - self._last_record_time) // 1000
+        self._last_record_time = now
+
+        self._log_file.write(encode_varint(time_delta << 1 | direction))
+        self._log_file.write(frame)
+
+    def flush(self):
+        """
+        Write the buffered records to the files
+        """
+
+        self._log_file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        """
+        Close the recording's files
+        """
+
+        self._log_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        """
+        The recorder's entering point
+
+        :return: The recorder
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        The recorder's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self.close()
+        return False
+
+
+class GamesRecordingReader:
+    """
+    Reads a recording through memory maps of its files, so only the read games are loaded into memory
+    Note: the read frames are views of the mapped log, they have to be released before the reader is closed
+    """
+
+    def __init__(self, log_path: str, index_path: str = None):
+        """
+        Open a recording for reading
+
+        :param log_path: The log file's path
+        :param index_path: optional, the index file's path (the log path with an index suffix by default)
+        :raise InvalidMagicException: if a file is not a recording file
+        Note: empty files (of a recorder that didn't write yet) are an empty recording
+        """
+
+        with open(log_path, 'rb') as log_file, open(index_path or log_path + INDEX_SUFFIX, 'rb') as index_file:
+            self._log_map = self._map_file(log_file)
+            self._index_map = self._map_file(index_file)
+
+        self._log_view = memoryview(self._log_map)
+
+        if (self._log_map and self._log_map[:len(LOG_MAGIC)] != LOG_MAGIC) or \
+                (self._index_map and self._index_map[:len(INDEX_MAGIC)] != INDEX_MAGIC):
+            self.close()
+            raise exceptions.InvalidMagicException('The given files are not a games recording')
+
+        # the body size of every message type byte (-1 for invalid message types)
+        self._body_sizes = [-1] * 2 ** 8
+
+        for message_type in protocol_utils.MESSAGE_BODY_FORMATS:
+            self._body_sizes[message_type] = protocol_utils.calc_body_size(message_type)
+
+        self._index_entry_struct = struct.Struct(INDEX_ENTRY_FORMAT)
+        self._games_count = max(0, len(self._index_map) - len(INDEX_MAGIC)) // self._index_entry_struct.size
+
+    @staticmethod
+    def _map_file(recording_file):
+        """
+        Map a recording file to memory (an empty file can't be mapped, so it is read as empty bytes)
+
+        :param recording_file: The opened file
+        :return: The file's memory map
+        """
+
+        if not os.fstat(recording_file.fileno()).st_size:
+            return b''
+
+        return mmap.mmap(recording_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """
+        Get the number of recorded games
+
+        :return: The number of recorded games
+        """
+
+        return self._games_count
+
+    def get_game_start_time(self, game_index: int) -> int:
+        """
+        Get the time a game started
+
+        :param game_index: The game's index in the recording
+        :return: The game's start time, in microseconds since the epoch
+        """
+
+        return self._read_index_entry(game_index)[1]
+
+    def get_game_range(self, game_index: int) -> Tuple[int, int]:
+        """
+        Get the offsets of a game's records in the log
+
+        :param game_index: The game's index in the recording
+        :return: The offset of the game's first record, and the offset that follows its last record
+        """
+
+        start = self._read_index_entry(game_index)[0]
+        end = self._read_index_entry(game_index + 1)[0] if game_index + 1 < self._games_count else len(self._log_map)
+
+        # a game that is still being recorded may be only partly written to the log
+        return min(start, len(self._log_map)), min(end, len(self._log_map))
+
+    def iter_game(self, game_index: int) -> Iterator[RecordedMessage]:
+        """
+        Iterate a game's recorded messages
+
+        :param game_index: The game's index in the recording
+        :return: An iterator of the game's recorded messages
+        :raise InvalidHeadersException: if the recording ends in the middle of a record
+        """
+
+        return self.iter_range(*self.get_game_range(game_index))
+
+    def iter_games(self) -> Iterator[Iterator[RecordedMessage]]:
+        """
+        Iterate all the recorded games
+
+        :return: An iterator of the games (every game is an iterator of its recorded messages)
+        """
+
+        for game_index in range(self._games_count):
+            yield self.iter_game(game_index)
+
+    def iter_range(self, start: int, end: int) -> Iterator[RecordedMessage]:
+        """
+        Iterate the recorded messages in a range of the log
+
+        :param start: The offset of the first record
+        :param end: The offset that follows the last record
+        :return: An iterator of the recorded messages
+        :raise InvalidHeadersException: if the recording ends in the middle of a record
+        """
+
+        log_view = self._log_view
+        body_sizes = self._body_sizes
+        headers_size = protocol_utils.calc_headers_size()
+        directions = tuple(Direction)
+        offset = start
+
+        while offset < end:
+            # most time deltas fit a single byte varint
+            header = log_view[offset]
+
+            if header < 0x80:
+                frame_start = offset + 1
+            else:
+                header, frame_start = decode_varint(log_view, offset)
+
+            body_start = frame_start + headers_size
+
+            if body_start > end:
+                raise exceptions.InvalidHeadersException('The recording ends in the middle of a record')
+
+            message_type = log_view[body_start - 1]
+            body_size = body_sizes[message_type]
+
+            if body_size < 0:
+                raise exceptions.InvalidMessageTypeException('The message type provided is invalid')
+
+            if message_type == SubmarineMessageType.RESULT and body_start < end and log_view[body_start] > 0:
+                body_size += struct.calcsize(Protocol.Formats.SUBMARINE_SIZE_FORMAT)
+
+            offset = body_start + body_size
+
+            if offset > end:
+                raise exceptions.InvalidHeadersException('The recording ends in the middle of a record')
+
+            yield RecordedMessage(directions[header & 1], header >> 1, log_view[frame_start:offset])
+
+    def close(self):
+        """
+        Close the memory maps of the recording
+
+        :raise BufferError: if read frames (views of the log) are not released yet
+        """
+
+        if self._log_view is not None:
+            self._log_view.release()
+            self._log_view = None
+
+        for recording_map in (self._log_map, self._index_map):
+            if isinstance(recording_map, mmap.mmap) and not recording_map.closed:
+                try:
+                    recording_map.close()
+                except BufferError:
+                    raise BufferError('The read frames have to be released before the recording is closed')
+
+    def _read_index_entry(self, game_index: int) -> Tuple[int, int]:
+        """
+        Read a game's index entry
+
+        :param game_index: The game's index in the recording
+        :return: The game's offset in the log and its start time
+        :raise IndexError: if there is no such game
+        """
+
+        if not 0 <= game_index < self._games_count:
+            raise IndexError('The game index is out of the recording')
+
+        return self._index_entry_struct.unpack_from(self._index_map,
+                                                    len(INDEX_MAGIC) + game_index * self._index_entry_struct.size)
+
+    def __enter__(self):
+        """
+        The reader's entering point
+
+        :return: The reader
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        The reader's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self.close()
+        return False
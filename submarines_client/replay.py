@@ -0,0 +1,181 @@
+"""
+The replay engine, replays recorded games - decoding them (straight from the memory mapped recording),
+verifying the recorded results against a board engine, or re-sending them to a live player with the original pacing
+"""
+
+import time
+from typing import Callable, Iterator, Tuple
+
+from submarines_client import messages, exceptions
+from submarines_client.board import Board
+from submarines_client.client import BaseSubmarinesClient
+from submarines_client.constants import Protocol
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
+from submarines_client.recording import Direction, GamesRecordingReader, RecordedMessage
+
+HANDSHAKE_MESSAGE_TYPES = (SubmarineMessageType.GAME_REQUEST, SubmarineMessageType.GAME_REPLY)
+
+
+class ReplayEngine:
+    """
+    Replays the games of a recording
+    Note: the frames are decoded straight from the memory mapped log, no frame is copied before its decoding
+    """
+
+    def __init__(self, reader: GamesRecordingReader, messages_codec: BaseMessagesCodec = MessagesCodec()):
+        """
+        Initializing a replay engine
+
+        :param reader: The reader of the recording to replay
+        :param messages_codec: The messages codec used to decode (and encode) the replayed messages
+        """
+
+        self._reader = reader
+        self._messages_codec = messages_codec
+
+    def iter_messages(self, game_index: int = None) -> Iterator[Tuple[Direction, int, messages.BaseSubmarinesMessage]]:
+        """
+        Decode the recorded messages of a game (or of all the games)
+
+        :param game_index: optional, the game's index in the recording (all the games by default)
+        :return: An iterator of the messages directions, time deltas (in microseconds) and decoded messages
+        :raise ProtocolException: if a recorded message is invalid
+        """
+
+        decode_message = self._messages_codec.decode_message
+
+        for direction, time_delta, frame in self._iter_recorded_messages(game_index):
+            yield direction, time_delta, decode_message(frame)
+
+    def iter_records(self, game_index: int = None) -> Iterator[Tuple[Direction, int, object]]:
+        """
+        Decode the recorded messages of a game (or of all the games) into compact records
+
+        :param game_index: optional, the game's index in the recording (all the games by default)
+        :return: An iterator of the messages directions, time deltas (in microseconds) and message records
+        :raise ProtocolException: if a recorded message is invalid
+        """
+
+        decode_record = self._messages_codec.decode_record
+
+        for direction, time_delta, frame in self._iter_recorded_messages(game_index):
+            yield direction, time_delta, decode_record(frame)
+
+    def verify_game(self, game_index: int, board: Board) -> int:
+        """
+        Verify the results the recording player sent, by attacking its board with the guesses it received
+
+        :param game_index: The game's index in the recording
+        :param board: The recording player's board, as it was at the start of the game
+        :return: The number of verified results
+        :raise ReplayMismatchException: if a recorded result is different from the board's result
+        """
+
+        expected_frame = None
+        verified_results = 0
+
+        for message_index, (direction, _, frame) in enumerate(self._reader.iter_game(game_index)):
+            message_type = frame[Protocol.MAGIC_SIZE]
+
+            if direction == Direction.RECEIVED and message_type == SubmarineMessageType.GUESS:
+                guess = self._messages_codec.decode_message(frame)
+
+                try:
+                    expected_message = board.attack(guess)
+                except exceptions.ErrorMessageException as eme:
+                    expected_message = messages.ErrorMessage(eme.error_code)
+
+                expected_frame = self._messages_codec.encode_message(expected_message)
+
+            elif direction == Direction.SENT and message_type in (SubmarineMessageType.RESULT,
+                                                                  SubmarineMessageType.ERROR):
+                if expected_frame is None:
+                    raise exceptions.ReplayMismatchException(
+                        f'Game {game_index}, message {message_index}: a result was sent without a guess')
+
+                if frame != expected_frame:
+                    raise exceptions.ReplayMismatchException(
+                        f'Game {game_index}, message {message_index}: '
+                        f'the recorded result is {bytes(frame).hex()}, the board\'s result is {expected_frame.hex()}')
+
+                expected_frame = None
+                verified_results += 1
+
+        return verified_results
+
+    def verify(self, board_factory: Callable[[int], Board]) -> int:
+        """
+        Verify the results of all the recorded games
+
+        :param board_factory: Creates the recording player's board of a game, by the game's index
+        :return: The number of verified results
+        :raise ReplayMismatchException: if a recorded result is different from the board's result
+        """
+
+        return sum(self.verify_game(game_index, board_factory(game_index)) for game_index in range(len(self._reader)))
+
+    def replay_timed(self,
+                     game_index: int,
+                     client: BaseSubmarinesClient,
+                     speed: float = 1.0,
+                     replayed_direction: Direction = Direction.SENT) -> int:
+        """
+        Replay a game's messages of one direction to a live player, with the recorded pacing,
+        the messages of the other direction are received from the live player
+        Note: the client has to be in a game already, the recorded handshake is skipped
+
+        :param game_index: The game's index in the recording
+        :param client: A client connected to the live player
+        :param speed: The replay speed (2 replays twice as fast as recorded)
+        :param replayed_direction: The direction of the messages to send (the recording player's sent messages)
+        :return: The number of sent messages
+        :raise ProtocolException: if the live player sent an invalid message
+        """
+
+        sent_messages = 0
+        send_time = time.perf_counter()
+
+        for direction, time_delta, frame in self._reader.iter_game(game_index):
+            if frame[Protocol.MAGIC_SIZE] in HANDSHAKE_MESSAGE_TYPES:
+                continue
+
+            send_time += time_delta / 1e6 / speed
+
+            if direction != replayed_direction:
+                try:
+                    client.receive_message()
+                except exceptions.ErrorMessageException:
+                    pass
+
+                # the pacing is kept relative to the live player's messages
+                send_time = max(send_time, time.perf_counter())
+                continue
+
+            delay = send_time - time.perf_counter()
+
+            if delay > 0:
+                time.sleep(delay)
+
+            client.send_message(self._messages_codec.decode_message(frame))
+            sent_messages += 1
+
+        client.flush()
+        return sent_messages
+
+    def _iter_recorded_messages(self, game_index: int = None) -> Iterator[RecordedMessage]:
+        """
+        Iterate the recorded messages of a game (or of all the games, in a single pass over the log)
+
+        :param game_index: optional, the game's index in the recording (all the games by default)
+        :return: An iterator of the recorded messages
+        """
+
+        if game_index is not None:
+            return self._reader.iter_game(game_index)
+
+        if not len(self._reader):
+            return iter(())
+
+        return self._reader.iter_range(self._reader.get_game_range(0)[0],
+                                       self._reader.get_game_range(len(self._reader) - 1)[1])
@@ -0,0 +1,516 @@
+"""
+The game server, accepts and drives many concurrent game sessions
+"""
+
+
+import enum
+import logging
+import selectors
+import socket
+import time
+from typing import Sequence
+
+from submarines_client import messages, constants, exceptions, protocol_utils
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec, MessagesStreamDecoder
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.metrics import ClientMetrics
+
+
+@enum.unique
+class SessionState(enum.Enum):
+    HANDSHAKE = 0
+    IN_GAME = 1
+    CLOSED = 2
+
+
+class GameSession:
+    """
+    The state of a single game session on the server
+    """
+
+    def __init__(self, server, game_socket: socket.socket, address):
+        """
+        Initializing a session
+
+        :param server: The server that drives the session
+        :param game_socket: The session's (non blocking) socket
+        :param address: The address of the connected player
+        """
+
+        self.address = address
+        self.state = SessionState.HANDSHAKE
+        self.context = None
+
+        self._server = server
+        self._game_socket = game_socket
+        self._messages_decoder = MessagesStreamDecoder(server.messages_codec)
+        self._send_buffer = bytearray()
+        self._waits_for_write = False
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+    @property
+    def game_socket(self) -> socket.socket:
+        """
+        Get the session's socket
+
+        :return: The session's (non blocking) socket
+        """
+
+        return self._game_socket
+
+    @property
+    def messages_decoder(self) -> MessagesStreamDecoder:
+        """
+        Get the decoder of the session's incoming stream
+
+        :return: The session's stream decoder
+        """
+
+        return self._messages_decoder
+
+    def send_message(self, message: messages.BaseSubmarinesMessage):
+        """
+        send a message to the session's player
+        Note: data the socket can't take right away is sent once it is writable
+
+        :param message: The message you wish to send
+        """
+
+        self._send_buffer += self._server._encode_message(message)
+        self.flush()
+
+    def send_messages(self, messages_to_send: Sequence[messages.BaseSubmarinesMessage]):
+        """
+        send a sequence of messages to the session's player, using a single write
+
+        :param messages_to_send: The messages you wish to send
+        """
+
+        if self._server.metrics:
+            self._send_buffer += b''.join(map(self._server._encode_message, messages_to_send))
+        else:
+            self._send_buffer += self._server.messages_codec.encode_many(messages_to_send)
+
+        self.flush()
+
+    def flush(self):
+        """
+        Send as much of the session's pending data as its socket takes
+        Note: the session waits for its socket to be writable while data is pending
+        """
+
+        if self.state == SessionState.CLOSED:
+            return
+
+        if self._server.metrics:
+            self._server.metrics.send_calls += 1
+
+        try:
+            sent_size = self._game_socket.send(self._send_buffer)
+            del self._send_buffer[:sent_size]
+        except BlockingIOError:
+            pass
+        except socket.error as se:
+            self._logger.warning(f'Network error: {se}')
+            self.close()
+            return
+
+        if bool(self._send_buffer) != self._waits_for_write:
+            self._waits_for_write = bool(self._send_buffer)
+            self._server._watch_session(self, self._waits_for_write)
+
+    def close(self):
+        """
+        Close the session
+        """
+
+        self._server._close_session(self)
+
+    def fileno(self) -> int:
+        """
+        Get the file descriptor of the session's socket
+
+        :return: The file descriptor of the session's socket
+        """
+
+        return self._game_socket.fileno()
+
+
+class BaseSessionHandler:
+    """
+    The base class for all session handlers,
+    a session handler is notified about the events of all the server's sessions
+    """
+
+    def on_game_started(self, session: GameSession):
+        """
+        Called once the game handshake of a session is done
+
+        :param session: The session in which the game started
+        """
+
+        pass
+
+    def on_message(self, session: GameSession, message: messages.BaseSubmarinesMessage):
+        """
+        Called for every message received on a session after its game started
+
+        :param session: The session the message was received on
+        :param message: The received message
+        """
+
+        pass
+
+    def on_session_closed(self, session: GameSession):
+        """
+        Called once a session is closed
+
+        :param session: The closed session
+        """
+
+        pass
+
+
+class TCPSubmarinesServer:
+    """
+    The game server, accepts and drives many concurrent game sessions,
+    using a selectors readiness loop
+    """
+
+    def __init__(self,
+                 session_handler: BaseSessionHandler,
+                 listening_socket: socket.socket,
+                 messages_codec: BaseMessagesCodec = MessagesCodec(),
+                 max_accepts_per_second: float = None,
+                 metrics: ClientMetrics = None):
+        """
+        Initializing a server
+
+        :param session_handler: The handler of the server's sessions
+        :param listening_socket: The socket in which you listen to incoming requests
+        :param messages_codec: The messages codec of the server
+        :param max_accepts_per_second: optional, the maximal rate of accepted connections
+        :param metrics: optional, metrics to update with the sessions' messages, calls and errors
+        """
+
+        self.messages_codec = messages_codec
+        self.sessions = set()
+        self.metrics = metrics
+
+        self._session_handler = session_handler
+        self._listening_socket = listening_socket
+        self._listening_socket.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listening_socket, selectors.EVENT_READ)
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+        self._max_accepts_per_second = max_accepts_per_second
+        self._accept_tokens = max(1.0, max_accepts_per_second or 0)
+        self._last_tokens_update = time.monotonic()
+        self._accepts_resume_time = None
+
+    @classmethod
+    def listen(cls,
+               session_handler: BaseSessionHandler,
+               listening_port: int = constants.Network.DEFAULT_PORT,
+               messages_codec: BaseMessagesCodec = MessagesCodec(),
+               backlog: int = constants.Network.DEFAULT_BACKLOG,
+               max_accepts_per_second: float = None,
+               reuse_port: bool = False,
+               metrics: ClientMetrics = None):
+        """
+        Start listen to incoming tcp connections
+
+        :param session_handler: The handler of the server's sessions
+        :param listening_port: The listening port to use
+        :param messages_codec: The messages codec for the server
+        :param backlog: The listening socket's backlog
+        :param max_accepts_per_second: optional, the maximal rate of accepted connections
+        :param reuse_port: Whether other servers may listen on the same port (SO_REUSEPORT),
+        the kernel balances the incoming connections between them
+        :param metrics: optional, metrics to update with the sessions' messages, calls and errors
+        :return: A server instance (on listen mode)
+        """
+
+        listening_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        if reuse_port:
+            listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        listening_socket.bind((constants.Network.PUBLIC_IP, listening_port))
+        listening_socket.listen(backlog)
+
+        return cls(session_handler=session_handler,
+                   listening_socket=listening_socket,
+                   messages_codec=messages_codec,
+                   max_accepts_per_second=max_accepts_per_second,
+                   metrics=metrics)
+
+    def serve_forever(self):
+        """
+        Drive the server's sessions until the server is closed
+        """
+
+        while self._listening_socket:
+            self.run_once()
+
+    def run_once(self, timeout: float = None):
+        """
+        Wait for the ready sockets and handle them once
+
+        :param timeout: optional, the maximal time to wait for ready sockets
+        """
+
+        if self._accepts_resume_time is not None:
+            resume_delay = self._accepts_resume_time - time.monotonic()
+
+            if resume_delay <= 0:
+                self._accepts_resume_time = None
+                self._selector.register(self._listening_socket, selectors.EVENT_READ)
+            elif timeout is None or resume_delay < timeout:
+                timeout = resume_delay
+
+        for key, events in self._selector.select(timeout):
+            if key.data is None:
+                self._accept_sessions()
+                continue
+
+            session: GameSession = key.data
+
+            if events & selectors.EVENT_WRITE and session.state != SessionState.CLOSED:
+                session.flush()
+
+            if events & selectors.EVENT_READ and session.state != SessionState.CLOSED:
+                self._receive_messages(session)
+
+    def _accept_sessions(self):
+        """
+        Accept the pending connections, as far as the accept rate limit allows
+        """
+
+        while self._take_accept_token():
+            accepted = False
+
+            try:
+                game_socket, address = self._listening_socket.accept()
+                accepted = True
+            except BlockingIOError:
+                return
+            except socket.error as se:
+                # stop watching the listening socket for a while, or it stays ready (and the loop spins)
+                self._logger.warning(f'Network error: {se} (accepts paused)')
+                self._pause_accepts(constants.Network.ACCEPT_ERROR_BACKOFF)
+                return
+            finally:
+                # a failed accept gives its token back
+                if not accepted:
+                    self._accept_tokens += 1
+
+            game_socket.setblocking(False)
+            game_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = GameSession(self, game_socket, address)
+            self.sessions.add(session)
+            self._selector.register(game_socket, selectors.EVENT_READ, session)
+
+        # stop watching the listening socket until a new accept token is available
+        self._pause_accepts((1 - self._accept_tokens) / self._max_accepts_per_second)
+
+    def _pause_accepts(self, delay: float):
+        """
+        Stop watching the listening socket for a while
+
+        :param delay: The time (in seconds) until the accepts resume
+        """
+
+        self._selector.unregister(self._listening_socket)
+        self._accepts_resume_time = time.monotonic() + delay
+
+    def _take_accept_token(self) -> bool:
+        """
+        Take an accept token (used for the accept rate limit)
+
+        :return: Whether a token was available
+        """
+
+        if not self._max_accepts_per_second:
+            return True
+
+        now = time.monotonic()
+        self._accept_tokens = min(max(1.0, self._max_accepts_per_second),
+                                  self._accept_tokens + (now - self._last_tokens_update) * self._max_accepts_per_second)
+        self._last_tokens_update = now
+
+        if self._accept_tokens < 1:
+            return False
+
+        self._accept_tokens -= 1
+        return True
+
+    def _receive_messages(self, session: GameSession):
+        """
+        Receive the available data of a session and handle every complete message in it
+
+        :param session: The ready session
+        """
+
+        if self.metrics:
+            self.metrics.recv_calls += 1
+
+        try:
+            received_size = session.messages_decoder.receive_into(session.game_socket)
+        except BlockingIOError:
+            return
+        except socket.error as se:
+            self._logger.warning(f'Network error: {se}')
+            self._close_session(session)
+            return
+
+        if not received_size:
+            self._close_session(session)
+            return
+
+        try:
+            for frame in session.messages_decoder.iter_frames():
+                self._handle_message(session, self._decode_frame(frame))
+
+                if session.state == SessionState.CLOSED:
+                    break
+        except (exceptions.ProtocolException, ValueError) as pe:
+            self._logger.warning(f'Protocol error: {pe} (from {session.address})')
+
+            if self.metrics:
+                self.metrics.count_error(pe)
+
+            self._close_session(session)
+
+    def _encode_message(self, message: messages.BaseSubmarinesMessage) -> bytes:
+        """
+        Encode a message, and report it to the metrics (its encoding time and size)
+
+        :param message: The message you wish to encode
+        :return: The encoded message
+        """
+
+        if not self.metrics:
+            return self.messages_codec.encode_message(message)
+
+        start_time = time.perf_counter()
+        encoded_message = self.messages_codec.encode_message(message)
+        self.metrics.encode_seconds.observe(time.perf_counter() - start_time)
+        self.metrics.count_sent(message.get_message_type(), len(encoded_message))
+
+        return encoded_message
+
+    def _decode_frame(self, frame) -> messages.BaseSubmarinesMessage:
+        """
+        Decode a received message, and report it to the metrics (its decoding time and size)
+
+        :param frame: The encoded message (with headers)
+        :return: The decoded message
+        :raise ProtocolException: if the message is invalid
+        """
+
+        if not self.metrics:
+            return self.messages_codec.decode_message(frame)
+
+        self.metrics.count_received(frame[constants.Protocol.MAGIC_SIZE], len(frame))
+
+        start_time = time.perf_counter()
+        message = self.messages_codec.decode_message(frame)
+        self.metrics.decode_seconds.observe(time.perf_counter() - start_time)
+
+        return message
+
+    def _handle_message(self, session: GameSession, message: messages.BaseSubmarinesMessage):
+        """
+        Handle a single message of a session
+
+        :param session: The session the message was received on
+        :param message: The received message
+        :raise ProtocolException: if the session's handshake is invalid
+        """
+
+        if session.state == SessionState.IN_GAME:
+            self._session_handler.on_message(session, message)
+            return
+
+        # receive game request
+        protocol_utils.insure_message_type(message, SubmarineMessageType.GAME_REQUEST)
+        self._logger.info(f'Incoming game request: from {session.address}')
+
+        # send game reply
+        session.send_message(messages.GameReplyMessage())
+        session.state = SessionState.IN_GAME
+        self._logger.info(f'Game reply sent: game starts with {session.address}')
+
+        self._session_handler.on_game_started(session)
+
+    def _watch_session(self, session: GameSession, waits_for_write: bool):
+        """
+        Update the events the server waits for on a session's socket
+
+        :param session: The session
+        :param waits_for_write: Whether the session has pending data (and waits for its socket to be writable)
+        """
+
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if waits_for_write else 0)
+        self._selector.modify(session.game_socket, events, session)
+
+    def _close_session(self, session: GameSession):
+        """
+        Close a session and release its socket
+
+        :param session: The session to close
+        """
+
+        if session.state == SessionState.CLOSED:
+            return
+
+        session.state = SessionState.CLOSED
+        self.sessions.discard(session)
+        self._selector.unregister(session.game_socket)
+        session.game_socket.close()
+
+        if self._accepts_resume_time is not None:
+            # the closed session freed a descriptor, the accepts resume (the accept rate limit still holds)
+            self._accepts_resume_time = min(self._accepts_resume_time, time.monotonic())
+
+        self._session_handler.on_session_closed(session)
+
+    def close(self):
+        """
+        Close the server and all of its sessions
+        """
+
+        for session in list(self.sessions):
+            self._close_session(session)
+
+        if self._listening_socket:
+            if self._accepts_resume_time is None:
+                self._selector.unregister(self._listening_socket)
+
+            self._listening_socket.close()
+            self._listening_socket = None
+
+        self._selector.close()
+
+    def __enter__(self):
+        """
+        The server's entering point
+
+        :return: The server
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        The server's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self.close()
+
+        return False
@@ -0,0 +1,375 @@
+"""
+The self-play simulation, plays complete games between guess strategies,
+every message passes through the messages codec and an in-memory transport, as in a real game
+Note: the density strategy requires NumPy
+
+Usage: python -m submarines_client.simulation --games 1000000 --first-strategy density
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+from random import Random
+import time
+from typing import Callable, List, NamedTuple, Sequence
+
+from submarines_client import messages, transports
+from submarines_client.board import Board
+from submarines_client.client import TransportSubmarinesClient
+from submarines_client.constants import Protocol, Game
+from submarines_client.messages import SubmarineMessageType
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec, StructMessagesCodec, \
+    CachedMessagesCodec
+from submarines_client.strategy import BaseGuessStrategy, RandomGuessStrategy
+
+
+def _create_density_strategy(fleet: Sequence[Protocol.SubmarineSize], board_size: int, random_generator: Random):
+    """
+    Create a probability density strategy (imported only when used, as it requires NumPy)
+
+    :param fleet: The sizes of the opponent's submarines
+    :param board_size: The number of rows (and columns) of the opponent's board
+    :param random_generator: The random generator of the game (unused, the strategy is deterministic)
+    :return: A strategy instance
+    """
+
+    from submarines_client.density_strategy import ProbabilityDensityStrategy
+
+    return ProbabilityDensityStrategy(fleet=fleet, board_size=board_size)
+
+
+STRATEGIES = {
+    'random': lambda fleet, board_size, random_generator: RandomGuessStrategy(board_size, random_generator),
+    'density': _create_density_strategy,
+}
+
+CODECS = {
+    'default': MessagesCodec,
+    'struct': StructMessagesCodec,
+    'cached': CachedMessagesCodec,
+}
+
+# the turn latency histogram has a bucket per microsecond, the last bucket holds all the slower turns
+LATENCY_BUCKETS_COUNT = 1024
+
+
+class GameResult(NamedTuple):
+    """
+    The result of a simulated game
+    """
+
+    inviter_won: bool
+    turns: int
+    # the time (in seconds) of the game's turns, without the game's setup
+    turns_duration: float
+
+
+class SimulationStats(NamedTuple):
+    """
+    The statistics of simulated games, the stats of shards are merged into the simulation's stats
+    """
+
+    games: int
+    first_player_wins: int
+    inviter_wins: int
+    turns: int
+    turns_duration: float
+    latency_histogram: List[int]
+
+    @classmethod
+    def empty(cls):
+        """
+        Create stats of no games
+
+        :return: The empty stats
+        """
+
+        return cls(games=0, first_player_wins=0, inviter_wins=0, turns=0, turns_duration=0.0,
+                   latency_histogram=[0] * LATENCY_BUCKETS_COUNT)
+
+    def merge(self, other):
+        """
+        Merge the stats of other games into these stats
+
+        :param other: The other games' stats
+        :return: The merged stats
+        """
+
+        return SimulationStats(games=self.games + other.games,
+                               first_player_wins=self.first_player_wins + other.first_player_wins,
+                               inviter_wins=self.inviter_wins + other.inviter_wins,
+                               turns=self.turns + other.turns,
+                               turns_duration=self.turns_duration + other.turns_duration,
+                               latency_histogram=[count + other_count for count, other_count in
+                                                  zip(self.latency_histogram, other.latency_histogram)])
+
+    def calc_latency_percentile(self, percentile: float) -> int:
+        """
+        Get a percentile of the turns latency
+
+        :param percentile: The percentile (between 0 and 100)
+        :return: The latency percentile in microseconds (a lower bound, for the slowest bucket)
+        """
+
+        threshold = self.turns * percentile / 100
+        accumulated_count = 0
+
+        for latency, count in enumerate(self.latency_histogram):
+            accumulated_count += count
+
+            if count and accumulated_count >= threshold:
+                return latency
+
+        return len(self.latency_histogram) - 1
+
+
+class SimulationPlayer:
+    """
+    A simulated player, holds a board and a guess strategy and plays through a client
+    """
+
+    def __init__(self, client: TransportSubmarinesClient, board: Board, strategy: BaseGuessStrategy):
+        """
+        Initializing a player
+
+        :param client: The player's client (connected to the opponent)
+        :param board: The player's board
+        :param strategy: The player's guess strategy
+        """
+
+        self.client = client
+        self.board = board
+        self.strategy = strategy
+
+
+def play_game(inviter: SimulationPlayer,
+              invited: SimulationPlayer,
+              latency_histogram: List[int] = None) -> GameResult:
+    """
+    Play a complete game between two connected players, the players play in turns on the same thread
+    The game flow - a game request and reply, an order (the inviter guesses first),
+    then turns of a guess, its result and an acknowledge, until a player sinks the opponent's last submarine
+
+    :param inviter: The inviting player (guesses first)
+    :param invited: The invited player
+    :param latency_histogram: optional, a histogram (by microseconds) to count the turns latency in
+    :return: The game's result
+    :raise ProtocolException: if a player received an unexpected message
+    """
+
+    inviter.client.send_message(messages.GameRequestMessage())
+    invited.client.receive_message(SubmarineMessageType.GAME_REQUEST)
+    invited.client.send_message(messages.GameReplyMessage())
+    inviter.client.receive_message(SubmarineMessageType.GAME_REPLY)
+
+    inviter.client.send_message(messages.OrderMessage())
+    invited.client.receive_message(SubmarineMessageType.ORDER)
+
+    attacker, defender = inviter, invited
+    turns = 0
+    turns_duration_ns = 0
+    last_bucket = len(latency_histogram) - 1 if latency_histogram is not None else 0
+
+    while True:
+        turn_start_time = time.perf_counter_ns()
+        turns += 1
+
+        guess = attacker.strategy.next_guess()
+        attacker.client.send_message(guess)
+
+        guess = defender.client.receive_message(SubmarineMessageType.GUESS)
+        result = defender.board.attack(guess)
+        defender.client.send_message(result)
+
+        result = attacker.client.receive_message(SubmarineMessageType.RESULT)
+        attacker.strategy.update(guess, result)
+        attacker.client.send_message(messages.AcknowledgeMessage(result.result_code))
+
+        defender.client.receive_message(SubmarineMessageType.ACKNOWLEDGE)
+
+        turn_duration_ns = time.perf_counter_ns() - turn_start_time
+        turns_duration_ns += turn_duration_ns
+
+        if latency_histogram is not None:
+            latency_histogram[min(turn_duration_ns // 1000, last_bucket)] += 1
+
+        if result.did_sink_last:
+            return GameResult(inviter_won=attacker is inviter, turns=turns, turns_duration=turns_duration_ns / 1e9)
+
+        attacker, defender = defender, attacker
+
+
+def play_shard(games_count: int,
+               first_strategy: str = 'random',
+               second_strategy: str = 'random',
+               board_size: int = Game.BOARD_SIZE,
+               fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET,
+               codec: str = 'default',
+               seed: int = None) -> SimulationStats:
+    """
+    Play a shard of games (in the current process), the players take turns in inviting,
+    so the first move advantage is shared
+
+    :param games_count: The number of games to play
+    :param first_strategy: The name of the first player's strategy
+    :param second_strategy: The name of the second player's strategy
+    :param board_size: The number of rows (and columns) of the boards
+    :param fleet: The sizes of each player's submarines
+    :param codec: The name of the messages codec to use
+    :param seed: optional, the seed of the shard's random generator
+    :return: The shard's stats
+    """
+
+    random_generator = Random(seed)
+    messages_codec: BaseMessagesCodec = CODECS[codec]()
+    strategies_factories: Sequence[Callable] = (STRATEGIES[first_strategy], STRATEGIES[second_strategy])
+    latency_histogram = [0] * LATENCY_BUCKETS_COUNT
+
+    first_player_wins = inviter_wins = turns = 0
+    turns_duration = 0.0
+
+    for game_index in range(games_count):
+        players = []
+        game_transports = transports.memory_pair()
+
+        try:
+            for transport, strategy_factory in zip(game_transports, strategies_factories):
+                client = TransportSubmarinesClient(messages_codec=messages_codec,
+                                                   transport_factory=None,
+                                                   game_transport=transport)
+                players.append(SimulationPlayer(client=client,
+                                                board=Board.random(fleet, board_size, random_generator),
+                                                strategy=strategy_factory(fleet, board_size, random_generator)))
+
+            inviter, invited = players if game_index % 2 == 0 else reversed(players)
+            game_result = play_game(inviter, invited, latency_histogram)
+        finally:
+            for transport in game_transports:
+                transport.close()
+
+        turns += game_result.turns
+        turns_duration += game_result.turns_duration
+        inviter_wins += game_result.inviter_won
+        first_player_wins += game_result.inviter_won == (inviter is players[0])
+
+    return SimulationStats(games=games_count,
+                           first_player_wins=first_player_wins,
+                           inviter_wins=inviter_wins,
+                           turns=turns,
+                           turns_duration=turns_duration,
+                           latency_histogram=latency_histogram)
+
+
+def run_simulation(games_count: int,
+                   first_strategy: str = 'random',
+                   second_strategy: str = 'random',
+                   board_size: int = Game.BOARD_SIZE,
+                   fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET,
+                   codec: str = 'default',
+                   workers: int = None,
+                   shard_size: int = 1000,
+                   seed: int = None,
+                   on_shard_done: Callable[[SimulationStats], None] = None) -> SimulationStats:
+    """
+    Play games sharded across a process pool
+
+    :param games_count: The number of games to play
+    :param first_strategy: The name of the first player's strategy
+    :param second_strategy: The name of the second player's strategy
+    :param board_size: The number of rows (and columns) of the boards
+    :param fleet: The sizes of each player's submarines
+    :param codec: The name of the messages codec to use
+    :param workers: optional, the number of worker processes (the number of cpus by default)
+    :param shard_size: The number of games in every shard
+    :param seed: optional, the simulation's seed (every shard is seeded by it and its index)
+    :param on_shard_done: optional, called with the merged stats whenever a shard is done
+    :return: The simulation's stats
+    """
+
+    if first_strategy not in STRATEGIES or second_strategy not in STRATEGIES:
+        raise ValueError(f'The strategy has to be one of {", ".join(STRATEGIES)}')
+
+    if codec not in CODECS:
+        raise ValueError(f'The codec has to be one of {", ".join(CODECS)}')
+
+    base_seed = Random(seed).getrandbits(32)
+    stats = SimulationStats.empty()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(play_shard,
+                            min(shard_size, games_count - shard_start),
+                            first_strategy, second_strategy, board_size, fleet, codec,
+                            base_seed + shard_start)
+            for shard_start in range(0, games_count, shard_size)
+        ]
+
+        for future in as_completed(futures):
+            stats = stats.merge(future.result())
+
+            if on_shard_done:
+                on_shard_done(stats)
+
+    return stats
+
+
+def format_report(stats: SimulationStats, duration: float, first_strategy: str, second_strategy: str) -> str:
+    """
+    Format a simulation's report
+
+    :param stats: The simulation's stats
+    :param duration: The simulation's wall time (in seconds)
+    :param first_strategy: The name of the first player's strategy
+    :param second_strategy: The name of the second player's strategy
+    :return: The report's text
+    """
+
+    games = max(stats.games, 1)
+    turns = max(stats.turns, 1)
+
+    return '\n'.join([
+        f'games:          {stats.games} in {duration:.2f}s ({stats.games / max(duration, 1e-9):.0f} games/s)',
+        f'turns:          {stats.turns} ({stats.turns / games:.1f} per game)',
+        f'turn latency:   mean {stats.turns_duration / turns * 1e6:.1f}us, '
+        f'p50 {stats.calc_latency_percentile(50)}us, p99 {stats.calc_latency_percentile(99)}us',
+        f'first player:   {first_strategy} won {stats.first_player_wins} ({stats.first_player_wins / games:.1%})',
+        f'second player:  {second_strategy} won {stats.games - stats.first_player_wins} '
+        f'({(stats.games - stats.first_player_wins) / games:.1%})',
+        f'inviter wins:   {stats.inviter_wins} ({stats.inviter_wins / games:.1%})',
+    ])
+
+
+def main(arguments: Sequence[str] = None):
+    """
+    Run a simulation from the command line
+
+    :param arguments: optional, the command line arguments (sys.argv by default)
+    """
+
+    parser = argparse.ArgumentParser(description='Play simulated games between guess strategies')
+    parser.add_argument('--games', type=int, default=10000, help='the number of games to play')
+    parser.add_argument('--first-strategy', choices=STRATEGIES, default='random')
+    parser.add_argument('--second-strategy', choices=STRATEGIES, default='random')
+    parser.add_argument('--board-size', type=int, default=Game.BOARD_SIZE)
+    parser.add_argument('--codec', choices=CODECS, default='default',
+                        help='the messages codec (all the codecs produce the same frames)')
+    parser.add_argument('--workers', type=int, default=None, help='the number of worker processes')
+    parser.add_argument('--shard-size', type=int, default=1000, help='the number of games in a shard')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(arguments)
+
+    start_time = time.perf_counter()
+    stats = run_simulation(games_count=args.games,
+                           first_strategy=args.first_strategy,
+                           second_strategy=args.second_strategy,
+                           board_size=args.board_size,
+                           codec=args.codec,
+                           workers=args.workers,
+                           shard_size=args.shard_size,
+                           seed=args.seed)
+
+    print(format_report(stats, time.perf_counter() - start_time, args.first_strategy, args.second_strategy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,443 @@
+"""
+The spectators relay, broadcasts the message frames of a game to many spectator connections
+Every frame is encoded once and kept once in a shared log, every spectator has a cursor in the log,
+and a writer thread sends the spectators their frames through non blocking sockets - so the game only appends to the log
+Note: the spectators have no queues of their own - the shared log, bounded by the maximal pending frames,
+with a cursor per spectator acts as a bounded queue per spectator, without a copy of the frames per spectator
+"""
+
+import collections
+import enum
+import itertools
+import logging
+import selectors
+import socket
+import threading
+from typing import Deque, List, Set
+
+from submarines_client import messages, constants, recording
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
+
+DEFAULT_MAX_PENDING_FRAMES = 1024
+
+# the maximal number of frames passed to a single send call
+MAX_FRAMES_PER_SEND = 64
+
+_WAKEUP = object()
+_ACCEPT = object()
+
+
+@enum.unique
+class OverflowPolicy(enum.Enum):
+    # the spectator skips the frames it missed, and keeps watching
+    DROP = 0
+    # the spectator is disconnected
+    DISCONNECT = 1
+
+
+class Spectator:
+    """
+    A spectator connection and its position in the relay's frames log
+    """
+
+    __slots__ = ('address', 'dropped_frames', '_socket', '_sequence', '_partial_frame', '_waits_for_write')
+
+    def __init__(self, spectator_socket: socket.socket, address, sequence: int):
+        """
+        Initializing a spectator
+
+        :param spectator_socket: The spectator's (non blocking) socket
+        :param address: The spectator's address
+        :param sequence: The sequence number of the first frame to send the spectator
+        """
+
+        self.address = address
+        self.dropped_frames = 0
+
+        self._socket = spectator_socket
+
+        # the sequence number of the next frame to send, and the unsent part of a partly sent frame
+        self._sequence = sequence
+        self._partial_frame = None
+        self._waits_for_write = False
+
+    def fileno(self) -> int:
+        """
+        Get the file descriptor of the spectator's socket
+
+        :return: The file descriptor of the spectator's socket
+        """
+
+        return self._socket.fileno()
+
+
+class SpectatorRelay(recording.BaseRecorder):
+    """
+    Broadcasts message frames to spectators, a slow spectator never blocks the game:
+    a spectator that falls behind by more than the maximal pending frames loses the frames it missed
+    (or is disconnected, by the overflow policy)
+    Note: the relay is a recorder, so a client reports its sent and received frames to it
+    """
+
+    def __init__(self,
+                 messages_codec: BaseMessagesCodec = MessagesCodec(),
+                 max_pending_frames: int = DEFAULT_MAX_PENDING_FRAMES,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.DROP,
+                 listening_socket: socket.socket = None):
+        """
+        Initializing a relay
+
+        :param messages_codec: The codec of the published messages
+        :param max_pending_frames: The maximal number of frames a spectator may fall behind
+        :param overflow_policy: What to do with a spectator that fell behind too much
+        :param listening_socket: optional, a socket in which spectators connect to the relay
+        """
+
+        self.overflow_policy = overflow_policy
+        self.disconnected_spectators = 0
+
+        self._messages_codec = messages_codec
+        self._max_pending_frames = max_pending_frames
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+        # the frames log, and the sequence number of its first frame
+        self._frames: Deque[bytes] = collections.deque()
+        self._first_sequence = 0
+        self._lock = threading.Lock()
+
+        self._spectators: Set[Spectator] = set()
+        self._new_spectators: List[Spectator] = []
+
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self._selector.register(self._wakeup_receiver, selectors.EVENT_READ, _WAKEUP)
+        self._wakeup_pending = False
+
+        self._listening_socket = listening_socket
+
+        if listening_socket:
+            listening_socket.setblocking(False)
+            self._selector.register(listening_socket, selectors.EVENT_READ, _ACCEPT)
+
+        self._writer_thread = None
+        self._running = False
+
+    @classmethod
+    def listen(cls,
+               listening_port: int,
+               messages_codec: BaseMessagesCodec = MessagesCodec(),
+               max_pending_frames: int = DEFAULT_MAX_PENDING_FRAMES,
+               overflow_policy: OverflowPolicy = OverflowPolicy.DROP,
+               backlog: int = constants.Network.DEFAULT_BACKLOG):
+        """
+        Start listen to incoming tcp spectators
+
+        :param listening_port: The listening port to use
+        :param messages_codec: The codec of the published messages
+        :param max_pending_frames: The maximal number of frames a spectator may fall behind
+        :param overflow_policy: What to do with a spectator that fell behind too much
+        :param backlog: The listening socket's backlog
+        :return: A relay instance (on listen mode, call start to serve the spectators)
+        """
+
+        listening_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listening_socket.bind((constants.Network.PUBLIC_IP, listening_port))
+        listening_socket.listen(backlog)
+
+        return cls(messages_codec=messages_codec,
+                   max_pending_frames=max_pending_frames,
+                   overflow_policy=overflow_policy,
+                   listening_socket=listening_socket)
+
+    @property
+    def spectators_count(self) -> int:
+        """
+        Get the number of connected spectators
+
+        :return: The number of connected spectators
+        """
+
+        return len(self._spectators) + len(self._new_spectators)
+
+    def start(self):
+        """
+        Start the writer thread, that serves the spectators
+        """
+
+        self._running = True
+        self._writer_thread = threading.Thread(target=self._serve, name='spectators-relay', daemon=True)
+        self._writer_thread.start()
+
+    def add_spectator(self, spectator_socket: socket.socket, address=None) -> Spectator:
+        """
+        Add a connected spectator, it is sent the frames published from now on
+
+        :param spectator_socket: The spectator's socket (the relay owns it from now on)
+        :param address: optional, the spectator's address
+        :return: The spectator
+        """
+
+        spectator_socket.setblocking(False)
+
+        with self._lock:
+            spectator = Spectator(spectator_socket, address, self._first_sequence + len(self._frames))
+            self._new_spectators.append(spectator)
+
+        self._wakeup()
+        return spectator
+
+    def start_game(self):
+        """
+        Start relaying a new game
+        Note: the game boundaries are not marked, the frames of the games flow to the spectators back to back
+        """
+
+        pass
+
+    def record(self, direction: recording.Direction, frame: bytes):
+        """
+        Relay a sent or received message frame
+
+        :param direction: Whether the frame was sent or received
+        :param frame: The encoded message (with headers)
+        """
+
+        self.publish_frame(frame)
+
+    def publish(self, message: messages.BaseSubmarinesMessage):
+        """
+        Relay a message, it is encoded once for all the spectators
+
+        :param message: The message you wish to relay
+        """
+
+        self.publish_frame(self._messages_codec.encode_message(message))
+
+    def publish_frame(self, frame: bytes):
+        """
+        Relay an encoded message, the same frame is sent to all the spectators
+
+        :param frame: The encoded message (with headers)
+        """
+
+        # received frames are views of the client's buffer, they are copied once
+        if type(frame) is not bytes:
+            frame = bytes(frame)
+
+        with self._lock:
+            self._frames.append(frame)
+
+            if len(self._frames) > self._max_pending_frames:
+                self._frames.popleft()
+                self._first_sequence += 1
+
+        if not self._wakeup_pending:
+            self._wakeup()
+
+    def _wakeup(self):
+        """
+        Wake up the writer thread
+        """
+
+        self._wakeup_pending = True
+
+        try:
+            self._wakeup_sender.send(b'\0')
+        except (BlockingIOError, OSError):
+            # the writer thread has pending wakeups already (or the relay is closed)
+            pass
+
+    def _serve(self):
+        """
+        The writer thread's loop, sends the spectators their pending frames
+        """
+
+        while self._running:
+            woke_up = False
+
+            for key, events in self._selector.select():
+                if key.data is _WAKEUP:
+                    woke_up = True
+                elif key.data is _ACCEPT:
+                    self._accept_spectators()
+                else:
+                    self._flush_spectator(key.data)
+
+            if woke_up:
+                # cleared before the pending frames are sent, so no wakeup is missed
+                self._wakeup_pending = False
+
+                try:
+                    while self._wakeup_receiver.recv(constants.Network.BUFFER_SIZE):
+                        pass
+                except BlockingIOError:
+                    pass
+
+                with self._lock:
+                    self._spectators.update(self._new_spectators)
+                    self._new_spectators.clear()
+
+                for spectator in list(self._spectators):
+                    if not spectator._waits_for_write or self.overflow_policy == OverflowPolicy.DISCONNECT:
+                        self._flush_spectator(spectator)
+
+    def _accept_spectators(self):
+        """
+        Accept the pending spectator connections
+        """
+
+        while True:
+            try:
+                spectator_socket, address = self._listening_socket.accept()
+            except BlockingIOError:
+                return
+            except socket.error as se:
+                self._logger.warning(f'Network error: {se}')
+                return
+
+            self._logger.info(f'Spectator connected: {address}')
+            self.add_spectator(spectator_socket, address)
+
+    def _flush_spectator(self, spectator: Spectator):
+        """
+        Send a spectator as many of its pending frames as its socket takes
+        Note: frames are dropped only as a whole, a partly sent frame is always completed
+
+        :param spectator: The spectator
+        """
+
+        while True:
+            with self._lock:
+                if spectator._sequence < self._first_sequence:
+                    if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                        self._logger.warning(f'Spectator disconnected: {spectator.address} fell behind')
+                        self._remove_spectator(spectator)
+                        return
+
+                    spectator.dropped_frames += self._first_sequence - spectator._sequence
+                    spectator._sequence = self._first_sequence
+
+                first_index = spectator._sequence - self._first_sequence
+                frames = list(itertools.islice(self._frames, first_index, first_index + MAX_FRAMES_PER_SEND))
+
+            has_partial_frame = spectator._partial_frame is not None
+
+            if has_partial_frame:
+                frames.insert(0, spectator._partial_frame)
+
+            if not frames:
+                self._set_waits_for_write(spectator, False)
+                return
+
+            try:
+                sent_size = spectator._socket.sendmsg(frames)
+            except BlockingIOError:
+                sent_size = 0
+            except socket.error as se:
+                self._logger.info(f'Spectator disconnected: {spectator.address} ({se})')
+                self._remove_spectator(spectator)
+                return
+
+            for frame_index, frame in enumerate(frames):
+                is_partial_frame = has_partial_frame and not frame_index
+
+                if sent_size < len(frame):
+                    if sent_size or is_partial_frame:
+                        spectator._partial_frame = memoryview(frame)[sent_size:]
+
+                        if not is_partial_frame:
+                            spectator._sequence += 1
+
+                    self._set_waits_for_write(spectator, True)
+                    return
+
+                sent_size -= len(frame)
+
+                if is_partial_frame:
+                    spectator._partial_frame = None
+                else:
+                    spectator._sequence += 1
+
+    def _set_waits_for_write(self, spectator: Spectator, waits_for_write: bool):
+        """
+        Set whether the writer thread waits for a spectator's socket to be writable
+
+        :param spectator: The spectator
+        :param waits_for_write: Whether to wait for the socket to be writable
+        """
+
+        if spectator._waits_for_write == waits_for_write:
+            return
+
+        spectator._waits_for_write = waits_for_write
+
+        if waits_for_write:
+            self._selector.register(spectator._socket, selectors.EVENT_WRITE, spectator)
+        else:
+            self._selector.unregister(spectator._socket)
+
+    def _remove_spectator(self, spectator: Spectator):
+        """
+        Disconnect a spectator
+
+        :param spectator: The spectator
+        """
+
+        self._set_waits_for_write(spectator, False)
+        self._spectators.discard(spectator)
+        self.disconnected_spectators += 1
+        spectator._socket.close()
+
+    def close(self):
+        """
+        Stop the writer thread, and disconnect all the spectators
+        """
+
+        self._running = False
+        self._wakeup()
+
+        if self._writer_thread:
+            self._writer_thread.join()
+            self._writer_thread = None
+
+        with self._lock:
+            spectators = list(self._spectators) + self._new_spectators
+            self._spectators.clear()
+            self._new_spectators.clear()
+
+        for spectator in spectators:
+            if spectator._waits_for_write:
+                self._selector.unregister(spectator._socket)
+
+            spectator._socket.close()
+
+        if self._listening_socket:
+            self._selector.unregister(self._listening_socket)
+            self._listening_socket.close()
+            self._listening_socket = None
+
+        self._selector.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def __enter__(self):
+        """
+        The relay's entering point
+
+        :return: The relay
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        The relay's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self.close()
+        return False
@@ -0,0 +1,79 @@
+"""
+The guess strategies, produce a player's guesses by the results of the previous ones
+"""
+
+from abc import ABCMeta, abstractmethod
+from random import Random
+from typing import Union
+
+from submarines_client import messages
+from submarines_client.constants import Game
+
+
+class BaseGuessStrategy(metaclass=ABCMeta):
+    """
+    The base class for all guess strategies
+    """
+
+    @abstractmethod
+    def next_guess(self) -> messages.GuessMessage:
+        """
+        Get the next guess to send
+
+        :return: The next guess
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update(self,
+               guess: messages.GuessMessage,
+               result: Union[messages.ResultMessage, messages.AcknowledgeMessage]):
+        """
+        Update the strategy by the result of a guess
+
+        :param guess: The guess that was sent
+        :param result: The guess' result (or its acknowledge)
+        """
+
+        raise NotImplementedError()
+
+
+class RandomGuessStrategy(BaseGuessStrategy):
+    """
+    A strategy that guesses every cell of the board once, in a random order
+    """
+
+    def __init__(self, board_size: int = Game.BOARD_SIZE, random_generator: Random = None):
+        """
+        Initializing a strategy
+
+        :param board_size: The number of rows (and columns) of the opponent's board
+        :param random_generator: optional, the random generator to use
+        """
+
+        self._cells = [(row, column) for row in range(board_size) for column in range(board_size)]
+        (random_generator or Random()).shuffle(self._cells)
+
+    def next_guess(self) -> messages.GuessMessage:
+        """
+        Get the next guess to send
+
+        :return: The next guess
+        :raise IndexError: if all the board's cells were guessed
+        """
+
+        row, column = self._cells.pop()
+        return messages.GuessMessage(row=row, column=column)
+
+    def update(self,
+               guess: messages.GuessMessage,
+               result: Union[messages.ResultMessage, messages.AcknowledgeMessage]):
+        """
+        Update the strategy by the result of a guess (random guesses ignore the results)
+
+        :param guess: The guess that was sent
+        :param result: The guess' result (or its acknowledge)
+        """
+
+        pass
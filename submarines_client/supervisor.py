@@ -0,0 +1,262 @@
+"""
+The server supervisor, hosts games on all the cores - every worker process runs its own server,
+all the servers listen on the same port (SO_REUSEPORT) so the kernel balances the incoming connections between them
+"""
+
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+import os
+import signal
+from typing import Callable, List, Optional
+
+from submarines_client import constants
+from submarines_client.messages_codec import BaseMessagesCodec, MessagesCodec
+from submarines_client.metrics import ClientMetrics
+from submarines_client.server import BaseSessionHandler, TCPSubmarinesServer
+
+# the maximal time (in seconds) a worker takes to notice the supervisor's requests
+DEFAULT_POLL_INTERVAL = 0.1
+STOP_TIMEOUT = 5.0
+
+# the supervisor's requests to the workers (through their pipes)
+_REPORT_METRICS = 'metrics'
+_STOP = None
+
+
+def _run_worker(session_handler_factory: Callable[[], BaseSessionHandler],
+                listening_port: int,
+                messages_codec: BaseMessagesCodec,
+                backlog: int,
+                max_accepts_per_second: float,
+                poll_interval: float,
+                connection: Connection):
+    """
+    Run a worker's server until the supervisor stops it, reporting the server's metrics through the pipe
+    (once the server listens, whenever the supervisor requests them and once it is closed)
+    Note: the worker reports only on request, so unread reports never fill the pipe and block the worker
+
+    :param session_handler_factory: Creates the worker's session handler
+    :param listening_port: The shared listening port
+    :param messages_codec: The messages codec of the server
+    :param backlog: The listening socket's backlog
+    :param max_accepts_per_second: optional, the maximal rate of accepted connections of the worker
+    :param poll_interval: The maximal time (in seconds) to notice the supervisor's requests
+    :param connection: The worker's end of the supervisor's pipe
+    """
+
+    # the supervisor is the one to stop the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    metrics = ClientMetrics()
+
+    with TCPSubmarinesServer.listen(session_handler=session_handler_factory(),
+                                    listening_port=listening_port,
+                                    messages_codec=messages_codec,
+                                    backlog=backlog,
+                                    max_accepts_per_second=max_accepts_per_second,
+                                    reuse_port=True,
+                                    metrics=metrics) as server:
+        connection.send(metrics)
+
+        while True:
+            server.run_once(timeout=poll_interval)
+
+            if connection.poll():
+                if connection.recv() is _STOP:
+                    break
+
+                connection.send(metrics)
+
+    connection.send(metrics)
+    connection.close()
+
+
+class ServerSupervisor:
+    """
+    Starts and stops the worker processes of a multi-process game server, and aggregates their metrics
+    Note: every worker runs its own session handler, sessions of different workers share no state
+    """
+
+    def __init__(self,
+                 session_handler_factory: Callable[[], BaseSessionHandler],
+                 workers_count: int = None,
+                 listening_port: int = constants.Network.DEFAULT_PORT,
+                 messages_codec: BaseMessagesCodec = MessagesCodec(),
+                 backlog: int = constants.Network.DEFAULT_BACKLOG,
+                 max_accepts_per_second: float = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Initializing a supervisor
+
+        :param session_handler_factory: Creates the session handler of every worker (must be picklable)
+        :param workers_count: optional, the number of worker processes (the number of cores by default)
+        :param listening_port: The listening port of all the workers
+        :param messages_codec: The messages codec of the workers' servers
+        :param backlog: The backlog of every worker's listening socket
+        :param max_accepts_per_second: optional, the maximal rate of accepted connections of every worker
+        :param poll_interval: The maximal time (in seconds) a worker takes to notice the supervisor's requests
+        """
+
+        self.workers_count = workers_count or os.cpu_count()
+        self.listening_port = listening_port
+
+        self._session_handler_factory = session_handler_factory
+        self._messages_codec = messages_codec
+        self._backlog = backlog
+        self._max_accepts_per_second = max_accepts_per_second
+        self._poll_interval = poll_interval
+        self._logger = logging.getLogger(constants.LOGGER_NAME)
+
+        self._workers: List[multiprocessing.Process] = []
+        self._connections: List[Connection] = []
+        self._workers_metrics: List[Optional[ClientMetrics]] = []
+
+    def start(self):
+        """
+        Start the workers, returns once all of them listen
+
+        :raise OSError: if a worker failed to listen
+        """
+
+        for worker_index in range(self.workers_count):
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_run_worker,
+                                             args=(self._session_handler_factory,
+                                                   self.listening_port,
+                                                   self._messages_codec,
+                                                   self._backlog,
+                                                   self._max_accepts_per_second,
+                                                   self._poll_interval,
+                                                   worker_connection),
+                                             name=f'submarines-worker-{worker_index}',
+                                             daemon=True)
+            worker.start()
+            worker_connection.close()
+
+            self._workers.append(worker)
+            self._connections.append(connection)
+            self._workers_metrics.append(None)
+
+        for worker_index, connection in enumerate(self._connections):
+            try:
+                self._workers_metrics[worker_index] = connection.recv()
+            except EOFError:
+                self.stop()
+                raise OSError(f'Worker {worker_index} failed to listen on port {self.listening_port}')
+
+        self._logger.info(f'{self.workers_count} workers listen on port {self.listening_port}')
+
+    def collect_metrics(self) -> ClientMetrics:
+        """
+        Request the metrics of all the workers, and aggregate them
+
+        :return: The workers' metrics, merged
+        """
+
+        for connection in self._connections:
+            try:
+                connection.send(_REPORT_METRICS)
+            except OSError:
+                # the worker is gone, its last report stays
+                pass
+
+        self._receive_reports(STOP_TIMEOUT)
+
+        return self._aggregate_metrics()
+
+    def _receive_reports(self, timeout: float):
+        """
+        Receive the pending metrics reports of the workers (the latest report of every worker is kept)
+
+        :param timeout: The maximal time (in seconds) to wait for the report of every worker
+        """
+
+        for worker_index, connection in enumerate(self._connections):
+            try:
+                if not connection.poll(timeout):
+                    self._logger.warning(f'Worker {worker_index} did not report its metrics')
+                    continue
+
+                while connection.poll():
+                    self._workers_metrics[worker_index] = connection.recv()
+            except (EOFError, OSError):
+                # the worker is gone, its last report stays
+                pass
+
+    def _aggregate_metrics(self) -> ClientMetrics:
+        """
+        Merge the latest metrics reports of all the workers
+
+        :return: The workers' metrics, merged
+        """
+
+        aggregated_metrics = ClientMetrics()
+
+        for worker_metrics in self._workers_metrics:
+            if worker_metrics:
+                aggregated_metrics.merge(worker_metrics)
+
+        return aggregated_metrics
+
+    def serve_forever(self):
+        """
+        Wait until all the workers exit (or until interrupted)
+        """
+
+        for worker in self._workers:
+            worker.join()
+
+    def stop(self) -> ClientMetrics:
+        """
+        Stop all the workers (a worker closes its sessions and sends its final metrics)
+
+        :return: The workers' final metrics, merged
+        """
+
+        for connection in self._connections:
+            try:
+                connection.send(_STOP)
+            except OSError:
+                pass
+
+        for worker in self._workers:
+            worker.join(STOP_TIMEOUT)
+
+            if worker.is_alive():
+                self._logger.warning(f'{worker.name} did not stop, terminating it')
+                worker.terminate()
+                worker.join()
+
+        # the stopped workers sent their final reports before they exited
+        self._receive_reports(0)
+        aggregated_metrics = self._aggregate_metrics()
+
+        for connection in self._connections:
+            connection.close()
+
+        self._workers.clear()
+        self._connections.clear()
+        self._workers_metrics.clear()
+
+        return aggregated_metrics
+
+    def __enter__(self):
+        """
+        The supervisor's entering point, starts the workers
+
+        :return: The supervisor
+        """
+
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        The supervisor's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self.stop()
+        return False
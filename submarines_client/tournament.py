@@ -0,0 +1,680 @@
+"""
+The tournaments scheduler, plays round-robin and swiss tournaments between guess strategies
+A tournament is split into game tasks, spread over the task queues of worker processes -
+a worker whose queue is empty steals tasks from the other workers' queues, so no worker idles behind a slow game.
+The results stream back as the games end, and the standings are updated with every result
+
+Usage: python -m submarines_client.tournament --entrants random density density --format swiss --rounds 5
+"""
+
+import argparse
+import collections
+import enum
+import multiprocessing
+from multiprocessing.synchronize import Event
+import os
+import queue
+from random import Random
+import signal
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from submarines_client import transports
+from submarines_client.board import Board
+from submarines_client.client import TransportSubmarinesClient
+from submarines_client.constants import Protocol, Game
+from submarines_client.simulation import CODECS, STRATEGIES, SimulationPlayer, play_game
+
+# the time (in seconds) an idle worker waits on its own queue before it tries to steal again
+IDLE_WAIT = 0.01
+
+# the time (in seconds) between checks that the workers are alive, while waiting for results
+WORKERS_CHECK_INTERVAL = 1.0
+
+STOP_TIMEOUT = 5.0
+
+
+@enum.unique
+class TournamentFormat(enum.Enum):
+    # every entrant plays every other entrant
+    ROUND_ROBIN = 'round-robin'
+    # every round pairs entrants of similar scores, that did not play each other yet
+    SWISS = 'swiss'
+
+
+# creates a connected pair of game transports
+TRANSPORTS = {
+    'memory': transports.memory_pair,
+    'socket': transports.socket_pair,
+}
+
+
+class Entrant(NamedTuple):
+    """
+    A tournament's entrant, a named guess strategy
+    """
+
+    name: str
+    strategy: str
+
+
+class GameTask(NamedTuple):
+    """
+    A single game of a tournament
+    """
+
+    task_id: int
+    round_index: int
+    inviter: Entrant
+    invited: Entrant
+    seed: int
+
+
+class TaskResult(NamedTuple):
+    """
+    The result of a game task, as reported by the worker that played it
+    """
+
+    task: GameTask
+    worker_index: int
+    stolen: bool
+    inviter_won: bool
+    turns: int
+    duration: float
+    error: Optional[str]
+
+    @property
+    def winner(self) -> Entrant:
+        """
+        Get the game's winner
+
+        :return: The winning entrant
+        """
+
+        return self.task.inviter if self.inviter_won else self.task.invited
+
+    @property
+    def loser(self) -> Entrant:
+        """
+        Get the game's loser
+
+        :return: The losing entrant
+        """
+
+        return self.task.invited if self.inviter_won else self.task.inviter
+
+
+class EntrantStanding:
+    """
+    The standing of an entrant in a tournament
+    """
+
+    __slots__ = ('entrant', 'games', 'wins', 'byes', 'bye_points', 'turns', 'opponents')
+
+    def __init__(self, entrant: Entrant):
+        self.entrant = entrant
+        self.games = 0
+        self.wins = 0
+        self.byes = 0
+        self.bye_points = 0
+        self.turns = 0
+        self.opponents: Set[str] = set()
+
+    @property
+    def points(self) -> int:
+        """
+        Get the entrant's points, a point for every win (and the points of the byes)
+
+        :return: The entrant's points
+        """
+
+        return self.wins + self.bye_points
+
+
+class Standings:
+    """
+    The standings of a tournament, updated with every game result
+    """
+
+    def __init__(self, entrants: Sequence[Entrant]):
+        """
+        Initializing the standings of a tournament that did not start
+
+        :param entrants: The tournament's entrants
+        """
+
+        self.games = 0
+        self._standings: Dict[str, EntrantStanding] = {entrant.name: EntrantStanding(entrant) for entrant in entrants}
+
+    def __getitem__(self, entrant_name: str) -> EntrantStanding:
+        """
+        Get the standing of an entrant
+
+        :param entrant_name: The entrant's name
+        :return: The entrant's standing
+        """
+
+        return self._standings[entrant_name]
+
+    def record(self, result: TaskResult):
+        """
+        Update the standings with a game's result
+
+        :param result: The game's result
+        """
+
+        self.games += 1
+
+        for entrant, opponent in ((result.winner, result.loser), (result.loser, result.winner)):
+            standing = self._standings[entrant.name]
+            standing.games += 1
+            standing.turns += result.turns
+            standing.opponents.add(opponent.name)
+
+        self._standings[result.winner.name].wins += 1
+
+    def record_bye(self, entrant: Entrant, points: int):
+        """
+        Update the standings with a bye (a swiss round the entrant was not paired in)
+
+        :param entrant: The entrant
+        :param points: The points of the bye (as the wins of all the round's games of a pair)
+        """
+
+        standing = self._standings[entrant.name]
+        standing.byes += 1
+        standing.bye_points += points
+
+    def ranking(self) -> List[EntrantStanding]:
+        """
+        Get the entrants' standings, ordered by points (then by the win rate, then by name)
+
+        :return: The ordered standings
+        """
+
+        return sorted(self._standings.values(),
+                      key=lambda standing: (-standing.points, -standing.wins / max(standing.games, 1),
+                                            standing.entrant.name))
+
+
+def play_task(task: GameTask,
+              messages_codec,
+              transport: str = 'memory',
+              board_size: int = Game.BOARD_SIZE,
+              fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET) -> Tuple[bool, int]:
+    """
+    Play a game task, through clients connected over a pair of transports
+
+    :param task: The game task
+    :param messages_codec: The messages codec of the players' clients
+    :param transport: The name of the game transports to use
+    :param board_size: The number of rows (and columns) of the boards
+    :param fleet: The sizes of each player's submarines
+    :return: Whether the inviter won, and the game's number of turns
+    """
+
+    random_generator = Random(task.seed)
+    game_transports = TRANSPORTS[transport]()
+    players = []
+
+    try:
+        for game_transport, entrant in zip(game_transports, (task.inviter, task.invited)):
+            client = TransportSubmarinesClient(messages_codec=messages_codec,
+                                               transport_factory=None,
+                                               game_transport=game_transport)
+            players.append(SimulationPlayer(
+                client=client,
+                board=Board.random(fleet, board_size, random_generator),
+                strategy=STRATEGIES[entrant.strategy](fleet, board_size, random_generator)))
+
+        game_result = play_game(*players)
+    finally:
+        for game_transport in game_transports:
+            game_transport.close()
+
+    return game_result.inviter_won, game_result.turns
+
+
+def _take_task(worker_index: int, tasks_queues: Sequence[multiprocessing.Queue]) -> Tuple[Optional[GameTask], bool]:
+    """
+    Take a task from the worker's own queue, or steal one from the other workers' queues
+
+    :param worker_index: The worker's index
+    :param tasks_queues: The task queues of all the workers
+    :return: The task (None if all the queues are empty), and whether it was stolen
+    """
+
+    for offset in range(len(tasks_queues)):
+        try:
+            return tasks_queues[(worker_index + offset) % len(tasks_queues)].get_nowait(), offset > 0
+        except queue.Empty:
+            pass
+
+    return None, False
+
+
+def _run_worker(worker_index: int,
+                tasks_queues: Sequence[multiprocessing.Queue],
+                results_queue: multiprocessing.Queue,
+                stop_event: Event,
+                codec: str,
+                transport: str,
+                board_size: int,
+                fleet: Sequence[Protocol.SubmarineSize]):
+    """
+    Play game tasks until the scheduler stops the worker, reporting every game's result
+
+    :param worker_index: The worker's index
+    :param tasks_queues: The task queues of all the workers
+    :param results_queue: The queue of the games' results
+    :param stop_event: Set by the scheduler to stop the workers
+    :param codec: The name of the messages codec to use
+    :param transport: The name of the game transports to use
+    :param board_size: The number of rows (and columns) of the boards
+    :param fleet: The sizes of each player's submarines
+    """
+
+    # the scheduler is the one to stop the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    messages_codec = CODECS[codec]()
+    own_queue = tasks_queues[worker_index]
+
+    while not stop_event.is_set():
+        task, stolen = _take_task(worker_index, tasks_queues)
+
+        if task is None:
+            try:
+                task, stolen = own_queue.get(timeout=IDLE_WAIT), False
+            except queue.Empty:
+                continue
+
+        start_time = time.perf_counter()
+
+        try:
+            inviter_won, turns = play_task(task, messages_codec, transport, board_size, fleet)
+            error = None
+        except Exception as e:
+            inviter_won, turns, error = False, 0, f'{type(e).__name__}: {e}'
+
+        results_queue.put(TaskResult(task=task,
+                                     worker_index=worker_index,
+                                     stolen=stolen,
+                                     inviter_won=inviter_won,
+                                     turns=turns,
+                                     duration=time.perf_counter() - start_time,
+                                     error=error))
+
+
+def create_entrants(strategies: Sequence[str]) -> List[Entrant]:
+    """
+    Create the entrants of strategies, entrants of the same strategy are numbered
+
+    :param strategies: The strategy names of the entrants
+    :return: The entrants
+    """
+
+    counts = collections.Counter(strategies)
+    indexes = collections.Counter()
+    entrants = []
+
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(f'The strategy has to be one of {", ".join(STRATEGIES)}')
+
+        indexes[strategy] += 1
+        entrants.append(Entrant(name=f'{strategy}-{indexes[strategy]}' if counts[strategy] > 1 else strategy,
+                                strategy=strategy))
+
+    return entrants
+
+
+def pair_swiss_round(standings: Standings,
+                     entrants: Sequence[Entrant]) -> Tuple[List[Tuple[Entrant, Entrant]], Optional[Entrant]]:
+    """
+    Pair the entrants of a swiss round - entrants are paired by their ranking, with the nearest ranked entrant
+    they did not play yet (a rematch only when there is no such entrant)
+
+    :param standings: The tournament's standings
+    :param entrants: The tournament's entrants
+    :return: The round's pairs, and the entrant with a bye (None if the number of entrants is even)
+    """
+
+    ranking = [standing.entrant for standing in standings.ranking()]
+    bye = None
+
+    if len(ranking) % 2:
+        # the lowest ranked entrant with the fewest byes sits out
+        bye = min(reversed(ranking), key=lambda entrant: standings[entrant.name].byes)
+        ranking.remove(bye)
+
+    pairs = []
+
+    while ranking:
+        entrant = ranking.pop(0)
+        played = standings[entrant.name].opponents
+        opponent_index = next((index for index, opponent in enumerate(ranking) if opponent.name not in played), 0)
+        pairs.append((entrant, ranking.pop(opponent_index)))
+
+    return pairs, bye
+
+
+class TournamentScheduler:
+    """
+    Runs a tournament over a pool of worker processes, every worker has its own task queue
+    and steals from the others once its queue is empty
+    Note: the games of a swiss round are scheduled once the previous round ended, as they are paired by its results
+    """
+
+    def __init__(self,
+                 workers_count: int = None,
+                 codec: str = 'default',
+                 transport: str = 'memory',
+                 board_size: int = Game.BOARD_SIZE,
+                 fleet: Sequence[Protocol.SubmarineSize] = Game.DEFAULT_FLEET):
+        """
+        Initializing a scheduler
+
+        :param workers_count: optional, the number of worker processes (the number of cpus by default)
+        :param codec: The name of the messages codec to use
+        :param transport: The name of the game transports to use
+        :param board_size: The number of rows (and columns) of the boards
+        :param fleet: The sizes of each player's submarines
+        """
+
+        if codec not in CODECS:
+            raise ValueError(f'The codec has to be one of {", ".join(CODECS)}')
+
+        if transport not in TRANSPORTS:
+            raise ValueError(f'The transport has to be one of {", ".join(TRANSPORTS)}')
+
+        self.workers_count = workers_count or os.cpu_count()
+        self.stolen_tasks = 0
+        self.worker_tasks = [0] * self.workers_count
+
+        self._codec = codec
+        self._transport = transport
+        self._board_size = board_size
+        self._fleet = fleet
+
+        self._tasks_queues: List[multiprocessing.Queue] = []
+        self._results_queue: Optional[multiprocessing.Queue] = None
+        self._stop_event: Optional[Event] = None
+        self._workers: List[multiprocessing.Process] = []
+        self._next_task_id = 0
+        self._next_queue_index = 0
+
+    def start(self):
+        """
+        Start the worker processes
+        """
+
+        self._tasks_queues = [multiprocessing.Queue() for _ in range(self.workers_count)]
+        self._results_queue = multiprocessing.Queue()
+        self._stop_event = multiprocessing.Event()
+
+        for worker_index in range(self.workers_count):
+            worker = multiprocessing.Process(target=_run_worker,
+                                             args=(worker_index, self._tasks_queues, self._results_queue,
+                                                   self._stop_event, self._codec, self._transport,
+                                                   self._board_size, self._fleet),
+                                             name=f'tournament-worker-{worker_index}',
+                                             daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        """
+        Stop the worker processes (their unplayed tasks are discarded)
+        """
+
+        if self._stop_event:
+            self._stop_event.set()
+
+        for worker in self._workers:
+            worker.join(STOP_TIMEOUT)
+
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+        for tasks_queue in self._tasks_queues + [self._results_queue]:
+            if tasks_queue:
+                tasks_queue.cancel_join_thread()
+                tasks_queue.close()
+
+        self._workers.clear()
+        self._tasks_queues.clear()
+        self._results_queue = None
+
+    def run(self,
+            entrants: Sequence[Entrant],
+            tournament_format: TournamentFormat = TournamentFormat.ROUND_ROBIN,
+            games_per_pairing: int = 10,
+            rounds: int = None,
+            seed: int = None,
+            on_game_done: Callable[[TaskResult, Standings], None] = None) -> Standings:
+        """
+        Run a tournament, the paired entrants take turns in inviting so the first move advantage is shared
+
+        :param entrants: The tournament's entrants
+        :param tournament_format: The tournament's format
+        :param games_per_pairing: The number of games every pair of entrants plays
+        :param rounds: The number of swiss rounds (enough rounds to rank all the entrants by default)
+        :param seed: optional, the tournament's seed (every game is seeded by it and the game's id)
+        :param on_game_done: optional, called with every game's result and the updated standings, as the games end
+        :return: The final standings
+        :raise RuntimeError: if a game failed, or a worker exited
+        """
+
+        if len({entrant.name for entrant in entrants}) != len(entrants):
+            raise ValueError('The names of the entrants have to be unique')
+
+        standings = Standings(entrants)
+        base_seed = Random(seed).getrandbits(32)
+
+        if tournament_format == TournamentFormat.ROUND_ROBIN:
+            pairs = [(entrant, opponent) for index, entrant in enumerate(entrants) for opponent in entrants[index + 1:]]
+            self._play_round(0, pairs, games_per_pairing, base_seed, standings, on_game_done)
+            return standings
+
+        rounds = rounds or max(1, (len(entrants) - 1).bit_length())
+
+        for round_index in range(rounds):
+            pairs, bye = pair_swiss_round(standings, entrants)
+
+            if bye:
+                standings.record_bye(bye, games_per_pairing)
+
+            self._play_round(round_index, pairs, games_per_pairing, base_seed, standings, on_game_done)
+
+        return standings
+
+    def _play_round(self,
+                    round_index: int,
+                    pairs: Sequence[Tuple[Entrant, Entrant]],
+                    games_per_pairing: int,
+                    base_seed: int,
+                    standings: Standings,
+                    on_game_done: Optional[Callable[[TaskResult, Standings], None]]):
+        """
+        Schedule the games of a round, and wait for all their results
+
+        :param round_index: The round's index
+        :param pairs: The round's pairs of entrants
+        :param games_per_pairing: The number of games every pair plays
+        :param base_seed: The tournament's seed
+        :param standings: The standings to update with the results
+        :param on_game_done: optional, called with every game's result and the updated standings
+        :raise RuntimeError: if a game failed, or a worker exited
+        """
+
+        first_task_id = self._next_task_id
+        pending_games = 0
+
+        # the games are dealt to the workers' queues in turns, stealing balances the rest
+        for game_index in range(games_per_pairing):
+            for entrant, opponent in pairs:
+                inviter, invited = (entrant, opponent) if game_index % 2 == 0 else (opponent, entrant)
+                task = GameTask(task_id=self._next_task_id,
+                                round_index=round_index,
+                                inviter=inviter,
+                                invited=invited,
+                                seed=base_seed + self._next_task_id)
+
+                self._tasks_queues[self._next_queue_index].put(task)
+                self._next_task_id += 1
+                self._next_queue_index = (self._next_queue_index + 1) % self.workers_count
+                pending_games += 1
+
+        try:
+            while pending_games:
+                result = self._receive_result(first_task_id)
+                pending_games -= 1
+
+                if result.error:
+                    raise RuntimeError(f'Game {result.task.task_id} ({result.task.inviter.name} vs '
+                                       f'{result.task.invited.name}) failed: {result.error}')
+
+                self.worker_tasks[result.worker_index] += 1
+                self.stolen_tasks += result.stolen
+                standings.record(result)
+
+                if on_game_done:
+                    on_game_done(result, standings)
+        except BaseException:
+            # the round is aborted, its unplayed games must not be played with the next rounds
+            self._discard_tasks()
+            raise
+
+    def _receive_result(self, first_task_id: int) -> TaskResult:
+        """
+        Wait for the next game result of the current round
+        (results of the games of an aborted round, that were in progress, are skipped)
+
+        :param first_task_id: The id of the current round's first task
+        :return: The result
+        :raise RuntimeError: if a worker exited
+        """
+
+        while True:
+            try:
+                result = self._results_queue.get(timeout=WORKERS_CHECK_INTERVAL)
+
+                if result.task.task_id >= first_task_id:
+                    return result
+
+                continue
+            except queue.Empty:
+                pass
+
+            for worker in self._workers:
+                if not worker.is_alive():
+                    raise RuntimeError(f'{worker.name} exited (exit code {worker.exitcode})')
+
+    def _discard_tasks(self):
+        """
+        Discard the unplayed tasks of an aborted round, so they are not played with the next rounds
+        """
+
+        for tasks_queue in self._tasks_queues:
+            try:
+                while True:
+                    tasks_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+    def __enter__(self):
+        """
+        The scheduler's entering point, starts the workers
+
+        :return: The scheduler
+        """
+
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        The scheduler's exit point (used for cleanup)
+
+        :return: Should the exception be suppressed
+        """
+
+        self.stop()
+        return False
+
+
+def format_standings(standings: Standings) -> str:
+    """
+    Format a tournament's standings table
+
+    :param standings: The tournament's standings
+    :return: The table's text
+    """
+
+    lines = [f'{"rank":<6}{"entrant":<20}{"points":>8}{"games":>8}{"wins":>8}{"win rate":>10}{"turns/game":>12}']
+
+    for rank, standing in enumerate(standings.ranking(), start=1):
+        games = max(standing.games, 1)
+        lines.append(f'{rank:<6}{standing.entrant.name:<20}{standing.points:>8}{standing.games:>8}'
+                     f'{standing.wins:>8}{standing.wins / games:>10.1%}{standing.turns / games:>12.1f}')
+
+    return '\n'.join(lines)
+
+
+def main(arguments: Sequence[str] = None):
+    """
+    Run a tournament from the command line
+
+    :param arguments: optional, the command line arguments (sys.argv by default)
+    """
+
+    parser = argparse.ArgumentParser(description='Play a tournament between guess strategies')
+    parser.add_argument('--entrants', nargs='+', choices=STRATEGIES, default=['random', 'density'],
+                        help='the strategies of the entrants (a strategy may enter more than once)')
+    parser.add_argument('--format', choices=[tournament_format.value for tournament_format in TournamentFormat],
+                        default=TournamentFormat.ROUND_ROBIN.value)
+    parser.add_argument('--rounds', type=int, default=None, help='the number of swiss rounds')
+    parser.add_argument('--games-per-pairing', type=int, default=10)
+    parser.add_argument('--board-size', type=int, default=Game.BOARD_SIZE)
+    parser.add_argument('--codec', choices=CODECS, default='default')
+    parser.add_argument('--transport', choices=TRANSPORTS, default='memory',
+                        help='the game transports (in-memory, or connected sockets)')
+    parser.add_argument('--workers', type=int, default=None, help='the number of worker processes')
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help='the time (in seconds) between standings reports while the games run')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(arguments)
+
+    entrants = create_entrants(args.entrants)
+    next_report_time = time.monotonic() + args.report_interval
+
+    def report_progress(result: TaskResult, standings: Standings):
+        nonlocal next_report_time
+
+        if time.monotonic() >= next_report_time:
+            print(f'{standings.games} games played\n{format_standings(standings)}\n')
+            next_report_time = time.monotonic() + args.report_interval
+
+    start_time = time.perf_counter()
+
+    with TournamentScheduler(workers_count=args.workers,
+                             codec=args.codec,
+                             transport=args.transport,
+                             board_size=args.board_size) as scheduler:
+        standings = scheduler.run(entrants=entrants,
+                                  tournament_format=TournamentFormat(args.format),
+                                  games_per_pairing=args.games_per_pairing,
+                                  rounds=args.rounds,
+                                  seed=args.seed,
+                                  on_game_done=report_progress)
+
+    duration = time.perf_counter() - start_time
+    print(format_standings(standings))
+    print(f'\n{standings.games} games in {duration:.2f}s ({standings.games / max(duration, 1e-9):.0f} games/s), '
+          f'{scheduler.stolen_tasks} stolen, games per worker: {scheduler.worker_tasks}')
+
+
+if __name__ == '__main__':
+    main()
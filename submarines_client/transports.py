@@ -0,0 +1,1045 @@
+"""
+The transports carry the encoded messages between the players,
+a transport factory creates the transports of a kind (listening to players and connecting to them)
+"""
+
+from abc import ABCMeta, abstractmethod
+from multiprocessing import resource_tracker, shared_memory
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import Sequence, Tuple
+
+from submarines_client import constants
+
+# the options of tcp game sockets - small frames are sent right away, instead of waiting for the previous frame's ack
+TCP_NO_DELAY_OPTIONS = ((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),)
+
+
+class BaseTransport(metaclass=ABCMeta):
+    """
+    The base class for all transports, a transport is a connected bytes stream
+    """
+
+    @abstractmethod
+    def sendall(self, data: bytes):
+        """
+        Send all the data to the connected player
+
+        :param data: The data you wish to send
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def recv_into(self, buffer) -> int:
+        """
+        Receive data into a buffer, blocks until some data is available
+
+        :param buffer: The writable buffer you wish to receive into
+        :return: The number of received bytes (0 means the transport is closed)
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def close(self):
+        """
+        Close the transport
+        """
+
+        raise NotImplementedError()
+
+
+class BaseListener(metaclass=ABCMeta):
+    """
+    The base class for all listeners, a listener accepts incoming transports
+    """
+
+    @abstractmethod
+    def accept(self) -> Tuple[BaseTransport, object]:
+        """
+        Accept an incoming transport, blocks until one is available
+
+        :return: The transport and the connected player's address
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def close(self):
+        """
+        Close the listener
+        """
+
+        raise NotImplementedError()
+
+
+class BaseTransportFactory(metaclass=ABCMeta):
+    """
+    The base class for all transport factories
+    """
+
+    @abstractmethod
+    def listen(self, listening_port: int, backlog: int = constants.Network.DEFAULT_BACKLOG) -> BaseListener:
+        """
+        Start listen to incoming transports
+
+        :param listening_port: The listening port to use
+        :param backlog: The number of transports that may wait to be accepted
+        :return: A listener
+        """
+
+        raise NotImplementedError()
+
+    @abstractmethod
+    def connect(self, player_host: str, player_port: int) -> BaseTransport:
+        """
+        Connect to a listening player
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: The connected transport
+        """
+
+        raise NotImplementedError()
+
+
+class SocketTransport(BaseTransport):
+    """
+    A transport over a connected stream socket
+    """
+
+    def __init__(self, connected_socket: socket.socket):
+        self.socket = connected_socket
+
+    def sendall(self, data: bytes):
+        """
+        Send all the data to the connected player
+
+        :param data: The data you wish to send
+        """
+
+        self.socket.sendall(data)
+
+    def recv_into(self, buffer) -> int:
+        """
+        Receive data into a buffer, blocks until some data is available
+
+        :param buffer: The writable buffer you wish to receive into
+        :return: The number of received bytes (0 means the transport is closed)
+        """
+
+        return self.socket.recv_into(buffer)
+
+    def close(self):
+        """
+        Close the transport
+        Note: the socket is shut down first, so a thread that waits to receive on it wakes up
+        """
+
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            # not connected, or already closed by the player
+            pass
+
+        self.socket.close()
+
+
+class SocketListener(BaseListener):
+    """
+    A listener over a listening stream socket
+    """
+
+    def __init__(self, listening_socket: socket.socket, socket_options: Sequence[Tuple[int, int, int]] = ()):
+        """
+        Initializing a listener
+
+        :param listening_socket: The listening socket
+        :param socket_options: The options (level, option, value) to set on every accepted socket
+        """
+
+        self.socket = listening_socket
+        self._socket_options = socket_options
+
+    def accept(self) -> Tuple[SocketTransport, object]:
+        """
+        Accept an incoming transport, blocks until one is available
+
+        :return: The transport and the connected player's address
+        """
+
+        connected_socket, address = self.socket.accept()
+
+        for level, option, value in self._socket_options:
+            connected_socket.setsockopt(level, option, value)
+
+        return SocketTransport(connected_socket), address
+
+    def close(self):
+        """
+        Close the listener
+        """
+
+        self.socket.close()
+
+
+class TCPTransportFactory(BaseTransportFactory):
+    """
+    Creates tcp transports
+    """
+
+    def __init__(self, no_delay: bool = True):
+        """
+        Initializing a factory
+
+        :param no_delay: Whether to disable nagle's algorithm on the transports (TCP_NODELAY),
+        so a frame is never held back until the previous one is acknowledged
+        """
+
+        self.socket_options = TCP_NO_DELAY_OPTIONS if no_delay else ()
+
+    def listen(self, listening_port: int, backlog: int = constants.Network.DEFAULT_BACKLOG) -> SocketListener:
+        """
+        Start listen to incoming transports
+
+        :param listening_port: The listening port to use
+        :param backlog: The number of transports that may wait to be accepted
+        :return: A listener
+        """
+
+        listening_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listening_socket.bind((constants.Network.PUBLIC_IP, listening_port))
+        listening_socket.listen(backlog)
+
+        return SocketListener(listening_socket, self.socket_options)
+
+    def connect(self, player_host: str, player_port: int) -> SocketTransport:
+        """
+        Connect to a listening player
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: The connected transport
+        """
+
+        connected_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        try:
+            connected_socket.connect((player_host, player_port))
+
+            for level, option, value in self.socket_options:
+                connected_socket.setsockopt(level, option, value)
+        except socket.error:
+            connected_socket.close()
+            raise
+
+        return SocketTransport(connected_socket)
+
+
+class UnixTransportFactory(BaseTransportFactory):
+    """
+    Creates unix domain socket transports,
+    a port is mapped to a socket path (the host is ignored, all players are on the same machine)
+    """
+
+    DEFAULT_PATH_TEMPLATE = '/tmp/submarines-{port}.sock'
+
+    def __init__(self, path_template: str = DEFAULT_PATH_TEMPLATE):
+        """
+        Initializing a factory
+
+        :param path_template: The template of the socket paths, formatted with the port
+        """
+
+        self._path_template = path_template
+
+    def listen(self, listening_port: int, backlog: int = constants.Network.DEFAULT_BACKLOG) -> SocketListener:
+        """
+        Start listen to incoming transports
+
+        :param listening_port: The listening port to use
+        :param backlog: The number of transports that may wait to be accepted
+        :return: A listener
+        """
+
+        path = self._path_template.format(port=listening_port)
+
+        if os.path.exists(path):
+            os.unlink(path)
+
+        listening_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listening_socket.bind(path)
+        listening_socket.listen(backlog)
+
+        return SocketListener(listening_socket)
+
+    def connect(self, player_host: str, player_port: int) -> SocketTransport:
+        """
+        Connect to a listening player
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: The connected transport
+        """
+
+        connected_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            connected_socket.connect(self._path_template.format(port=player_port))
+        except socket.error:
+            connected_socket.close()
+            raise
+
+        return SocketTransport(connected_socket)
+
+
+def socket_pair() -> Tuple[SocketTransport, SocketTransport]:
+    """
+    Create two transports connected to each other, over a socket pair
+
+    :return: The two connected transports
+    """
+
+    first_socket, second_socket = socket.socketpair()
+    return SocketTransport(first_socket), SocketTransport(second_socket)
+
+
+class _MemoryPipe:
+    """
+    A one directional in-memory bytes stream
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+        self.condition = threading.Condition()
+
+
+class InMemoryTransport(BaseTransport):
+    """
+    A transport over in-memory pipes, for players in the same process
+    """
+
+    def __init__(self, incoming_pipe: _MemoryPipe, outgoing_pipe: _MemoryPipe):
+        self._incoming_pipe = incoming_pipe
+        self._outgoing_pipe = outgoing_pipe
+
+    def sendall(self, data: bytes):
+        """
+        Send all the data to the connected player
+
+        :param data: The data you wish to send
+        """
+
+        with self._outgoing_pipe.condition:
+            if self._outgoing_pipe.closed:
+                raise BrokenPipeError('The transport is closed')
+
+            self._outgoing_pipe.data += data
+            self._outgoing_pipe.condition.notify()
+
+    def recv_into(self, buffer) -> int:
+        """
+        Receive data into a buffer, blocks until some data is available
+
+        :param buffer: The writable buffer you wish to receive into
+        :return: The number of received bytes (0 means the transport is closed)
+        """
+
+        with self._incoming_pipe.condition:
+            while not self._incoming_pipe.data and not self._incoming_pipe.closed:
+                self._incoming_pipe.condition.wait()
+
+            received_size = min(len(buffer), len(self._incoming_pipe.data))
+            buffer[:received_size] = self._incoming_pipe.data[:received_size]
+            del self._incoming_pipe.data[:received_size]
+
+            return received_size
+
+    def close(self):
+        """
+        Close the transport
+        """
+
+        for pipe in (self._incoming_pipe, self._outgoing_pipe):
+            with pipe.condition:
+                pipe.closed = True
+                pipe.condition.notify_all()
+
+
+def memory_pair() -> Tuple[InMemoryTransport, InMemoryTransport]:
+    """
+    Create two transports connected to each other, over in-memory pipes
+
+    :return: The two connected transports
+    """
+
+    first_pipe, second_pipe = _MemoryPipe(), _MemoryPipe()
+    return InMemoryTransport(first_pipe, second_pipe), InMemoryTransport(second_pipe, first_pipe)
+
+
+class InMemoryListener(BaseListener):
+    """
+    A listener of in-memory transports
+    """
+
+    def __init__(self, factory, listening_port: int, backlog: int):
+        self._factory = factory
+        self._listening_port = listening_port
+        self._incoming_transports = queue.Queue(backlog)
+
+    def accept(self) -> Tuple[InMemoryTransport, object]:
+        """
+        Accept an incoming transport, blocks until one is available
+
+        :return: The transport and the connected player's address
+        """
+
+        transport = self._incoming_transports.get()
+
+        if transport is None:
+            raise ConnectionAbortedError('The listener is closed')
+
+        return transport, ('memory', self._listening_port)
+
+    def close(self):
+        """
+        Close the listener
+        """
+
+        self._factory._unregister(self._listening_port, self)
+
+        try:
+            self._incoming_transports.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class InMemoryTransportFactory(BaseTransportFactory):
+    """
+    Creates in-memory transports, a factory instance is an in-memory network of players
+    (the host is ignored, all players are in the same process)
+    """
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def listen(self, listening_port: int, backlog: int = constants.Network.DEFAULT_BACKLOG) -> InMemoryListener:
+        """
+        Start listen to incoming transports
+
+        :param listening_port: The listening port to use
+        :param backlog: The number of transports that may wait to be accepted
+        :return: A listener
+        """
+
+        with self._lock:
+            if listening_port in self._listeners:
+                raise OSError(f'The in-memory port {listening_port} is already in use')
+
+            listener = InMemoryListener(self, listening_port, backlog)
+            self._listeners[listening_port] = listener
+
+            return listener
+
+    def connect(self, player_host: str, player_port: int) -> InMemoryTransport:
+        """
+        Connect to a listening player
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: The connected transport
+        """
+
+        with self._lock:
+            listener = self._listeners.get(player_port)
+
+        if listener is None:
+            raise ConnectionRefusedError(f'No player listens on the in-memory port {player_port}')
+
+        transport, listener_transport = memory_pair()
+
+        try:
+            listener._incoming_transports.put_nowait(listener_transport)
+        except queue.Full:
+            raise ConnectionRefusedError(f'The backlog of the in-memory port {player_port} is full')
+
+        return transport
+
+    def _unregister(self, listening_port: int, listener: InMemoryListener):
+        """
+        Stop routing transports to a listener
+
+        :param listening_port: The listener's port
+        :param listener: The listener
+        """
+
+        with self._lock:
+            if self._listeners.get(listening_port) is listener:
+                del self._listeners[listening_port]
+
+
+# the layout of a shared memory segment - a header, then a ring buffer for every direction
+# (the host is the listening side, the guest is the connecting side)
+_SEGMENT_HEADER_SIZE = 64
+_SEGMENT_CAPACITY_OFFSET = 0
+_SEGMENT_ATTACHED_OFFSET = 8
+_SEGMENT_HOST_PID_OFFSET = 16
+_SEGMENT_GUEST_PID_OFFSET = 24
+
+# connecting players claim a segment by creating a segment of its name and this suffix (holding their pid)
+_CLAIM_SUFFIX = '-claim'
+_CLAIM_SIZE = 8
+
+# the number of sleeps of a waiting listener between checks for a claim of a dead player
+_STALE_CLAIM_CHECK_SLEEPS = 100
+
+# the header of a ring buffer - the producer's fields and the consumer's fields are on different cache lines
+_RING_HEADER_SIZE = 128
+_RING_HEAD_OFFSET = 0
+_RING_WRITER_CLOSED_OFFSET = 8
+_RING_TAIL_OFFSET = 64
+_RING_READER_CLOSED_OFFSET = 72
+
+_COUNTER_FORMAT = '<Q'
+
+# the waiting strategy of a blocked ring buffer side - spin, then yield the cpu, then sleep
+# (spinning on a single core only delays the other side)
+_SPIN_CHECKS = 2000 if (os.cpu_count() or 1) > 1 else 0
+_YIELD_CHECKS = 2000
+_MAX_SLEEP = 0.001
+
+
+def _open_segment(name: str, create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    Open a shared memory segment, whose lifetime is managed by the transports (and not by the resource tracker)
+
+    :param name: The segment's name
+    :param create: Whether to create a new segment
+    :param size: The size of a new segment
+    :return: The segment
+    :raise FileExistsError: if a new segment's name is in use
+    :raise FileNotFoundError: if there is no segment of the name
+    """
+
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+
+    # the tracker would unlink the segment once the process that opened it exits
+    if os.name == 'posix':
+        resource_tracker.unregister(_tracked_name(segment), 'shared_memory')
+
+    return segment
+
+
+def _tracked_name(segment: shared_memory.SharedMemory) -> str:
+    """
+    Get the name the resource tracker knows a segment by (the posix name, with a leading slash)
+
+    :param segment: The segment
+    :return: The segment's tracked name
+    """
+
+    return '/' + segment.name
+
+
+def _unlink_segment(name: str):
+    """
+    Remove the name of a shared memory segment (the segment exists until all its users close it)
+
+    :param name: The segment's name
+    """
+
+    try:
+        segment = _open_segment(name)
+    except FileNotFoundError:
+        return
+
+    segment.close()
+
+    # unlink unregisters the segment from the tracker, so it is registered again first
+    if os.name == 'posix':
+        resource_tracker.register(_tracked_name(segment), 'shared_memory')
+
+    segment.unlink()
+
+
+def _is_process_alive(pid: int) -> bool:
+    """
+    Check whether a process is alive (a zombie process is dead)
+
+    :param pid: The process id
+    :return: Whether the process is alive
+    """
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    try:
+        with open(f'/proc/{pid}/stat') as stat_file:
+            state = stat_file.read().rsplit(')', 1)[1].split()[0]
+    except (OSError, IndexError):
+        # no procfs, the process exists
+        return True
+
+    return state not in ('Z', 'X')
+
+
+def _remove_stale_claim(name: str):
+    """
+    Remove the claim of a segment, if the player that claimed it is dead
+
+    :param name: The segment's name
+    """
+
+    try:
+        claim_segment = _open_segment(name + _CLAIM_SUFFIX)
+    except FileNotFoundError:
+        return
+
+    claimer_pid, = struct.unpack_from(_COUNTER_FORMAT, claim_segment.buf)
+    claim_segment.close()
+
+    # a pid of 0 is a claim that is just being created
+    if claimer_pid and not _is_process_alive(claimer_pid):
+        _unlink_segment(name + _CLAIM_SUFFIX)
+
+
+class _Backoff:
+    """
+    The waiting strategy of a blocked ring buffer side
+    """
+
+    def __init__(self):
+        self.sleeps = 0
+        self._checks = 0
+
+    def wait(self) -> bool:
+        """
+        Wait before the next check
+
+        :return: Whether the wait slept (the other side is slow, so slower checks are affordable)
+        """
+
+        self._checks += 1
+
+        if self._checks < _SPIN_CHECKS:
+            return False
+
+        if self._checks < _SPIN_CHECKS + _YIELD_CHECKS:
+            os.sched_yield()
+            return False
+
+        self.sleeps += 1
+        time.sleep(min(_MAX_SLEEP, self.sleeps * 1e-5))
+
+        return True
+
+
+class SharedMemoryTransport(BaseTransport):
+    """
+    A transport over a shared memory segment, for players on the same host
+    Every direction is a lock-free single producer single consumer ring buffer:
+    the producer writes the data and then advances the head, the consumer reads it and then advances the tail
+    (the head and the tail are ever growing counters, their difference is the number of pending bytes)
+    Note: a blocked side polls the ring buffer (spins, yields the cpu and then sleeps), nothing goes through the kernel,
+    once it sleeps it checks that the other side's process is alive
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, is_host: bool):
+        """
+        Initializing a transport
+
+        :param segment: The game's segment
+        :param is_host: Whether this is the host's side of the segment (or the guest's)
+        """
+
+        self._segment = segment
+        self._buffer = segment.buf
+        self._capacity, = struct.unpack_from(_COUNTER_FORMAT, self._buffer, _SEGMENT_CAPACITY_OFFSET)
+
+        host_ring = _SEGMENT_HEADER_SIZE
+        guest_ring = host_ring + _RING_HEADER_SIZE + self._capacity
+        self._outgoing_ring, self._incoming_ring = (host_ring, guest_ring) if is_host else (guest_ring, host_ring)
+        self._peer_pid_offset = _SEGMENT_GUEST_PID_OFFSET if is_host else _SEGMENT_HOST_PID_OFFSET
+
+        # only this side changes the outgoing head and the incoming tail, so they are cached
+        self._outgoing_head = self._read_counter(self._outgoing_ring + _RING_HEAD_OFFSET)
+        self._incoming_tail = self._read_counter(self._incoming_ring + _RING_TAIL_OFFSET)
+        self._closed = False
+
+        # the segment is released by the last of close and the calls in progress (which may be on other threads)
+        self._active_calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create_segment(cls, name: str, ring_size: int) -> shared_memory.SharedMemory:
+        """
+        Create the named segment of a game (a stale segment of the name is replaced)
+
+        :param name: The segment's name
+        :param ring_size: The capacity (in bytes) of every ring buffer
+        :return: The segment
+        """
+
+        segment_size = _SEGMENT_HEADER_SIZE + 2 * (_RING_HEADER_SIZE + ring_size)
+
+        try:
+            segment = _open_segment(name, create=True, size=segment_size)
+        except FileExistsError:
+            _unlink_segment(name)
+            segment = _open_segment(name, create=True, size=segment_size)
+
+        segment.buf[:segment_size] = bytes(segment_size)
+        struct.pack_into(_COUNTER_FORMAT, segment.buf, _SEGMENT_CAPACITY_OFFSET, ring_size)
+        struct.pack_into(_COUNTER_FORMAT, segment.buf, _SEGMENT_HOST_PID_OFFSET, os.getpid())
+
+        return segment
+
+    def sendall(self, data: bytes):
+        """
+        Send all the data to the connected player, blocks while the outgoing ring buffer is full
+
+        :param data: The data you wish to send
+        :raise BrokenPipeError: if the transport or the connected player's side is closed
+        :raise ConnectionResetError: if the connected player's process is dead
+        """
+
+        if not self._enter_call():
+            raise BrokenPipeError('The transport is closed')
+
+        try:
+            self._send(memoryview(data).cast('B'))
+        finally:
+            self._exit_call()
+
+    def _send(self, data: memoryview):
+        """
+        Write all the data into the outgoing ring buffer
+
+        :param data: The data you wish to send
+        :raise BrokenPipeError: if the transport or the connected player's side is closed
+        :raise ConnectionResetError: if the connected player's process is dead
+        """
+
+        data_start = self._outgoing_ring + _RING_HEADER_SIZE
+        sent_size = 0
+        backoff = None
+
+        while sent_size < len(data):
+            if self._closed or self._read_counter(self._outgoing_ring + _RING_READER_CLOSED_OFFSET):
+                raise BrokenPipeError('The transport is closed')
+
+            free_size = self._capacity - (self._outgoing_head -
+                                          self._read_counter(self._outgoing_ring + _RING_TAIL_OFFSET))
+
+            if not free_size:
+                backoff = backoff or _Backoff()
+                self._wait(backoff)
+                continue
+
+            chunk_size = min(free_size, len(data) - sent_size)
+            position = self._outgoing_head % self._capacity
+            first_part_size = min(chunk_size, self._capacity - position)
+
+            self._buffer[data_start + position:data_start + position + first_part_size] = \
+                data[sent_size:sent_size + first_part_size]
+            self._buffer[data_start:data_start + chunk_size - first_part_size] = \
+                data[sent_size + first_part_size:sent_size + chunk_size]
+
+            # the data is published only after it is written
+            self._outgoing_head += chunk_size
+            self._write_counter(self._outgoing_ring + _RING_HEAD_OFFSET, self._outgoing_head)
+            sent_size += chunk_size
+
+    def recv_into(self, buffer) -> int:
+        """
+        Receive data into a buffer, blocks until some data is available
+
+        :param buffer: The writable buffer you wish to receive into
+        :return: The number of received bytes (0 means the transport is closed)
+        :raise ConnectionResetError: if the connected player's process is dead
+        """
+
+        if not self._enter_call():
+            return 0
+
+        try:
+            return self._receive(buffer)
+        finally:
+            self._exit_call()
+
+    def _receive(self, buffer) -> int:
+        """
+        Read the available data of the incoming ring buffer into a buffer, blocks until some data is available
+
+        :param buffer: The writable buffer you wish to receive into
+        :return: The number of received bytes (0 means the transport is closed)
+        :raise ConnectionResetError: if the connected player's process is dead
+        """
+
+        data_start = self._incoming_ring + _RING_HEADER_SIZE
+        backoff = None
+
+        while not self._closed:
+            available_size = self._read_counter(self._incoming_ring + _RING_HEAD_OFFSET) - self._incoming_tail
+
+            if not available_size:
+                if self._read_counter(self._incoming_ring + _RING_WRITER_CLOSED_OFFSET):
+                    # the data written before the writer closed its side is received first
+                    if self._read_counter(self._incoming_ring + _RING_HEAD_OFFSET) == self._incoming_tail:
+                        return 0
+
+                    continue
+
+                backoff = backoff or _Backoff()
+                self._wait(backoff)
+                continue
+
+            received_size = min(len(buffer), available_size)
+            position = self._incoming_tail % self._capacity
+            first_part_size = min(received_size, self._capacity - position)
+
+            buffer[:first_part_size] = self._buffer[data_start + position:data_start + position + first_part_size]
+            buffer[first_part_size:received_size] = self._buffer[data_start:data_start + received_size - first_part_size]
+
+            self._incoming_tail += received_size
+            self._write_counter(self._incoming_ring + _RING_TAIL_OFFSET, self._incoming_tail)
+
+            return received_size
+
+        return 0
+
+    def close(self):
+        """
+        Close the transport
+        Note: a call in progress on another thread returns (or raises) once it notices the close,
+        and the segment is released once it does
+        """
+
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+            self._write_counter(self._outgoing_ring + _RING_WRITER_CLOSED_OFFSET, 1)
+            self._write_counter(self._incoming_ring + _RING_READER_CLOSED_OFFSET, 1)
+
+            if not self._active_calls:
+                self._release_segment()
+
+    def _enter_call(self) -> bool:
+        """
+        Register a call in progress, so the segment is not released under it
+
+        :return: Whether the call may proceed (the transport is not closed)
+        """
+
+        with self._lock:
+            if self._closed:
+                return False
+
+            self._active_calls += 1
+            return True
+
+    def _exit_call(self):
+        """
+        Unregister a call in progress, the last call releases the segment of a closed transport
+        """
+
+        with self._lock:
+            self._active_calls -= 1
+
+            if self._closed and not self._active_calls:
+                self._release_segment()
+
+    def _release_segment(self):
+        """
+        Release the segment (once the transport is closed and no call is in progress)
+        """
+
+        self._buffer = None
+        self._segment.close()
+
+    def _wait(self, backoff: _Backoff):
+        """
+        Wait for the other side, and check that its process is alive while sleeping
+
+        :param backoff: The waiting strategy of the blocked call
+        :raise ConnectionResetError: if the connected player's process is dead
+        """
+
+        if backoff.wait() and not _is_process_alive(self._read_counter(self._peer_pid_offset)):
+            raise ConnectionResetError('The connected player\'s process is dead')
+
+    def _read_counter(self, offset: int) -> int:
+        """
+        Read a counter of the segment
+
+        :param offset: The counter's offset in the segment
+        :return: The counter's value
+        """
+
+        return struct.unpack_from(_COUNTER_FORMAT, self._buffer, offset)[0]
+
+    def _write_counter(self, offset: int, value: int):
+        """
+        Write a counter of the segment
+
+        :param offset: The counter's offset in the segment
+        :param value: The counter's value
+        """
+
+        struct.pack_into(_COUNTER_FORMAT, self._buffer, offset, value)
+
+
+class SharedMemoryListener(BaseListener):
+    """
+    A listener of shared memory transports, a connecting player attaches to the listener's named segment
+    """
+
+    def __init__(self, name: str, ring_size: int):
+        """
+        Initializing a listener
+
+        :param name: The name of the listener's segments
+        :param ring_size: The capacity (in bytes) of every ring buffer
+        """
+
+        self._name = name
+        self._ring_size = ring_size
+        self._closed = False
+
+    def accept(self) -> Tuple[SharedMemoryTransport, object]:
+        """
+        Accept an incoming transport, blocks until a player attaches to the listener's segment
+        Note: the segment's name is removed once a player attached, so the next player gets a new segment,
+        and the claims of dead players are removed, so they do not block the next players
+
+        :return: The transport and the connected player's address
+        :raise ConnectionAbortedError: if the listener is closed
+        """
+
+        segment = SharedMemoryTransport.create_segment(self._name, self._ring_size)
+        backoff = _Backoff()
+        _remove_stale_claim(self._name)
+
+        try:
+            while not struct.unpack_from(_COUNTER_FORMAT, segment.buf, _SEGMENT_ATTACHED_OFFSET)[0]:
+                if self._closed:
+                    raise ConnectionAbortedError('The listener is closed')
+
+                if backoff.wait() and backoff.sleeps % _STALE_CLAIM_CHECK_SLEEPS == 0:
+                    _remove_stale_claim(self._name)
+        except BaseException:
+            _unlink_segment(self._name)
+            segment.close()
+            raise
+
+        _unlink_segment(self._name)
+        _unlink_segment(self._name + _CLAIM_SUFFIX)
+
+        return SharedMemoryTransport(segment, is_host=True), ('shared_memory', self._name)
+
+    def close(self):
+        """
+        Close the listener
+        """
+
+        self._closed = True
+
+
+class SharedMemoryTransportFactory(BaseTransportFactory):
+    """
+    Creates shared memory transports, a port is mapped to a segment name
+    (the host is ignored, all players are on the same host)
+    """
+
+    DEFAULT_NAME_TEMPLATE = 'submarines-{port}'
+    DEFAULT_RING_SIZE = 2 ** 16
+    DEFAULT_CONNECT_TIMEOUT = 5.0
+
+    def __init__(self,
+                 name_template: str = DEFAULT_NAME_TEMPLATE,
+                 ring_size: int = DEFAULT_RING_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT):
+        """
+        Initializing a factory
+
+        :param name_template: The template of the segment names, formatted with the port
+        :param ring_size: The capacity (in bytes) of every ring buffer
+        :param connect_timeout: The maximal time (in seconds) to wait for a listener's segment
+        """
+
+        self._name_template = name_template
+        self._ring_size = ring_size
+        self._connect_timeout = connect_timeout
+
+    def listen(self, listening_port: int, backlog: int = constants.Network.DEFAULT_BACKLOG) -> SharedMemoryListener:
+        """
+        Start listen to incoming transports
+
+        :param listening_port: The listening port to use
+        :param backlog: unused, a single player may wait to be accepted
+        :return: A listener
+        """
+
+        return SharedMemoryListener(self._name_template.format(port=listening_port), self._ring_size)
+
+    def connect(self, player_host: str, player_port: int) -> SharedMemoryTransport:
+        """
+        Connect to a listening player
+        Note: connecting players claim the listener's segment by creating a claim segment (an atomic operation),
+        so only a single player attaches to every segment
+
+        :param player_host: The player's host
+        :param player_port: The player's port
+        :return: The connected transport
+        :raise ConnectionRefusedError: if no listener accepted the player within the connect timeout
+        """
+
+        name = self._name_template.format(port=player_port)
+        deadline = time.monotonic() + self._connect_timeout
+        claim_segment = None
+
+        while claim_segment is None:
+            try:
+                claim_segment = _open_segment(name + _CLAIM_SUFFIX, create=True, size=_CLAIM_SIZE)
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    raise ConnectionRefusedError(f'The shared memory segment {name} is claimed by another player')
+
+                time.sleep(_MAX_SLEEP)
+
+        struct.pack_into(_COUNTER_FORMAT, claim_segment.buf, 0, os.getpid())
+        claim_segment.close()
+
+        try:
+            while True:
+                try:
+                    segment = _open_segment(name)
+                    break
+                except FileNotFoundError:
+                    if time.monotonic() > deadline:
+                        raise ConnectionRefusedError(f'No player listens on the shared memory segment {name}')
+
+                    time.sleep(_MAX_SLEEP)
+        except BaseException:
+            _unlink_segment(name + _CLAIM_SUFFIX)
+            raise
+
+        transport = SharedMemoryTransport(segment, is_host=False)
+        struct.pack_into(_COUNTER_FORMAT, segment.buf, _SEGMENT_GUEST_PID_OFFSET, os.getpid())
+        struct.pack_into(_COUNTER_FORMAT, segment.buf, _SEGMENT_ATTACHED_OFFSET, 1)
+
+        return transport
@@ -0,0 +1,73 @@
+"""
+The lobby's pairing flow, driven through a session handler with in-memory sessions
+"""
+
+import unittest
+
+from submarines_client import messages
+from submarines_client.lobby import LobbySessionHandler
+from submarines_client.messages import SubmarineMessageType
+
+
+class _FakeSession:
+    """
+    A server session that records the messages sent to it
+    """
+
+    def __init__(self, handler: LobbySessionHandler, address: str):
+        self.address = address
+        self.context = None
+        self.sent_messages = []
+        self.closed = False
+
+        self._handler = handler
+
+    def send_message(self, message: messages.BaseSubmarinesMessage):
+        self.sent_messages.append(message)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._handler.on_session_closed(self)
+
+
+class LobbyRepairTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = LobbySessionHandler()
+        self.first, self.second, self.third = (_FakeSession(self.handler, address) for address in 'abc')
+
+        # the first player invites the second, the third waits
+        for session in (self.first, self.second, self.third):
+            self.handler.on_game_started(session)
+
+        self.assertIs(self.first.context.opponent, self.second)
+        self.assertTrue(self.first.context.is_inviter)
+
+    def _assert_repaired(self):
+        # the former inviter is paired again, as the invited player of the waiting player
+        self.assertIs(self.first.context.opponent, self.third)
+        self.assertFalse(self.first.context.is_inviter)
+        self.assertTrue(self.third.context.is_inviter)
+        self.assertEqual(self.first.sent_messages[-1].get_message_type(), SubmarineMessageType.GAME_REQUEST)
+
+        self.handler.on_message(self.first, messages.GameReplyMessage())
+
+        self.assertTrue(self.first.context.is_bridged)
+        self.assertTrue(self.third.context.is_bridged)
+        self.assertEqual(self.third.sent_messages[-1].get_message_type(), SubmarineMessageType.GAME_REPLY)
+        self.assertFalse(self.first.closed or self.third.closed)
+
+    def test_decline_then_repair(self):
+        self.handler.on_message(self.second, messages.GameReplyMessage(response=False))
+
+        self.assertTrue(self.second.closed)
+        self._assert_repaired()
+
+    def test_disconnect_then_repair(self):
+        self.second.close()
+
+        self._assert_repaired()
+
+
+if __name__ == '__main__':
+    unittest.main()